@@ -40,3 +40,81 @@ class Config:
 
     # Clave secreta para proteger contra ataques CSRF y firmar cookies de sesión
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'tu-clave-secreta-super-segura'
+
+    # NOTA: Las cachés del grafo se invalidan con una versión de la red local a cada
+    # proceso (ver utils/version_red.py). Con varios procesos (p. ej. varios workers
+    # de gunicorn) solo el proceso que atiende un cambio de ciudades o rutas lo ve;
+    # los demás siguen usando el grafo anterior hasta reiniciarse. Se recomienda un
+    # solo proceso con varios hilos, o reiniciar los procesos tras cada cambio.
+
+    # Motor de grafos para el cálculo de rutas: 'networkx' o 'csr' (arreglos de NumPy)
+    MOTOR_GRAFO = os.environ.get('MOTOR_GRAFO') or 'networkx'
+
+    # Precálculo en segundo plano de la matriz de rutas entre todos los pares de ciudades
+    PRECALCULAR_MATRIZ_RUTAS = (os.environ.get('PRECALCULAR_MATRIZ_RUTAS') or 'true').lower() == 'true'
+    MATRIZ_RUTAS_MAX_CIUDADES = int(os.environ.get('MATRIZ_RUTAS_MAX_CIUDADES') or 2000)  # Límite por memoria (n²)
+
+    # Capacidad de la caché LRU de árboles de caminos más cortos (uno por ciudad de origen)
+    CACHE_ARBOLES_CAPACIDAD = int(os.environ.get('CACHE_ARBOLES_CAPACIDAD') or 64)
+
+    # Número máximo de pares origen/destino por petición en la API de rutas por lotes
+    LOTE_RUTAS_MAX_PARES = int(os.environ.get('LOTE_RUTAS_MAX_PARES') or 500)
+
+    # Número máximo de celdas (orígenes × destinos) por petición en la API de matrices de costos
+    MATRIZ_API_MAX_CELDAS = int(os.environ.get('MATRIZ_API_MAX_CELDAS') or 1000000)
+
+    # Archivo donde se guardan las posiciones de los nodos usadas en las imágenes del grafo
+    LAYOUT_GRAFO_ARCHIVO = os.environ.get('LAYOUT_GRAFO_ARCHIVO') or os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), 'instance', 'layout_grafo.json')
+
+    # Cabecera Cache-Control de las imágenes del grafo (se revalidan con ETag en cada uso;
+    # detrás de un proxy inverso puede usarse por ejemplo 'public, max-age=60')
+    CACHE_CONTROL_IMAGENES = os.environ.get('CACHE_CONTROL_IMAGENES') or 'private, no-cache'
+
+    # Caché de imágenes PNG del grafo: límite en memoria y directorio opcional en disco
+    CACHE_IMAGENES_MAX_BYTES = int(os.environ.get('CACHE_IMAGENES_MAX_BYTES') or 64 * 1024 * 1024)
+    CACHE_IMAGENES_DIRECTORIO = os.environ.get('CACHE_IMAGENES_DIRECTORIO') or None  # None desactiva el disco
+    CACHE_IMAGENES_DISCO_MAX_BYTES = int(os.environ.get('CACHE_IMAGENES_DISCO_MAX_BYTES') or 256 * 1024 * 1024)
+
+    # Procesos trabajadores dedicados al renderizado de imágenes (0 = renderizar en el proceso web)
+    RENDER_WORKERS = int(os.environ.get('RENDER_WORKERS') or 0)
+    RENDER_TIMEOUT = float(os.environ.get('RENDER_TIMEOUT') or 30)  # Segundos máximos por imagen
+
+    # A partir de este número de ciudades las imágenes usan por defecto las vistas reducidas
+    # (agregada por provincias o subgrafo local del camino resaltado)
+    LOD_UMBRAL_CIUDADES = int(os.environ.get('LOD_UMBRAL_CIUDADES') or 150)
+
+    # Caché de reportes PDF de rutas: límite en memoria y directorio opcional en disco
+    CACHE_PDF_MAX_BYTES = int(os.environ.get('CACHE_PDF_MAX_BYTES') or 32 * 1024 * 1024)
+    CACHE_PDF_DIRECTORIO = os.environ.get('CACHE_PDF_DIRECTORIO') or None  # None desactiva el disco
+    CACHE_PDF_DISCO_MAX_BYTES = int(os.environ.get('CACHE_PDF_DISCO_MAX_BYTES') or 256 * 1024 * 1024)
+
+    # Exportación asíncrona a PDF: hilos de trabajo, segundos que se conservan los
+    # resultados, número máximo de trabajos pendientes o en proceso y total de bytes
+    # de los PDF terminados en memoria (se descartan primero los más antiguos)
+    PDF_TRABAJOS_HILOS = int(os.environ.get('PDF_TRABAJOS_HILOS') or 2)
+    PDF_TRABAJOS_EXPIRACION = int(os.environ.get('PDF_TRABAJOS_EXPIRACION') or 600)
+    PDF_TRABAJOS_MAX_ACTIVOS = int(os.environ.get('PDF_TRABAJOS_MAX_ACTIVOS') or 50)
+    PDF_TRABAJOS_MAX_BYTES = int(os.environ.get('PDF_TRABAJOS_MAX_BYTES') or 64 * 1024 * 1024)
+
+    # Exportación masiva de rutas: número máximo de pares y bytes del PDF combinado
+    # que se mantienen en memoria antes de pasar a un archivo temporal en disco
+    EXPORTAR_LOTE_MAX_PARES = int(os.environ.get('EXPORTAR_LOTE_MAX_PARES') or 50)
+    EXPORTAR_LOTE_MAX_MEMORIA = int(os.environ.get('EXPORTAR_LOTE_MAX_MEMORIA') or 8 * 1024 * 1024)
+
+    # Resultados de rutas guardados por token para exportarlos o dibujarlos sin
+    # recalcularlos: número máximo y segundos de vida de cada resultado
+    RESULTADOS_RUTAS_CAPACIDAD = int(os.environ.get('RESULTADOS_RUTAS_CAPACIDAD') or 500)
+    RESULTADOS_RUTAS_EXPIRACION = int(os.environ.get('RESULTADOS_RUTAS_EXPIRACION') or 900)
+
+    # Analítica de la red (costo promedio, diámetro, intermediación) calculada en
+    # segundo plano: procesos para las búsquedas (0 = en el mismo hilo) y número
+    # de ciudades centrales mostradas
+    ANALITICA_PROCESOS = int(os.environ.get('ANALITICA_PROCESOS') or 2)
+    ANALITICA_CIUDADES_CENTRALES = int(os.environ.get('ANALITICA_CIUDADES_CENTRALES') or 5)
+
+    # Segundos que se reutilizan los datos consolidados del dashboard
+    DASHBOARD_CACHE_TTL = int(os.environ.get('DASHBOARD_CACHE_TTL') or 30)
+
+    # Cabecera Cache-Control de los datos del dashboard en JSON (se revalidan con ETag)
+    CACHE_CONTROL_DASHBOARD = os.environ.get('CACHE_CONTROL_DASHBOARD') or 'private, no-cache'
@@ -11,6 +11,7 @@ Funcionalidades principales:
 - CRUD completo de rutas
 - Validaciones de datos administrativos
 - Gestión de relaciones entre entidades
+- Invalidación de las cachés del grafo tras cada cambio en la red
 
 Autor: Joaquín Bermeo
 Fecha: Julio 2025
@@ -20,6 +21,8 @@ from flask import render_template, request, redirect, url_for, flash, jsonify
 from flask_login import login_required
 from extensions import db
 from models import Provincia, Ciudad, Ruta
+from utils.version_red import incrementar_version_red
+from utils.grafo_db_utils import programar_analitica_red
 
 class AdminController:
     """
@@ -124,6 +127,8 @@ class AdminController:
             # Intentar guardar cambios en base de datos
             try:
                 db.session.commit()
+                incrementar_version_red()  # Invalidar cachés que incluyen la provincia
+                programar_analitica_red()  # Recalcular la analítica de la red en segundo plano
                 flash('Provincia actualizada exitosamente', 'success')
                 return redirect(url_for('admin.listar_provincias'))
             except Exception as e:
@@ -271,6 +276,8 @@ class AdminController:
                             db.session.add(ruta)
                 
                 db.session.commit()
+                incrementar_version_red()  # Invalidar cachés del grafo
+                programar_analitica_red()  # Recalcular la analítica de la red en segundo plano
                 flash('Ciudad creada exitosamente con rutas no dirigidas', 'success')
                 
             except ValueError:
@@ -360,6 +367,8 @@ class AdminController:
             
             try:
                 db.session.commit()
+                incrementar_version_red()  # Invalidar cachés del grafo
+                programar_analitica_red()  # Recalcular la analítica de la red en segundo plano
                 flash('Ciudad actualizada exitosamente', 'success')
                 return redirect(url_for('admin.listar_ciudades'))
             except Exception as e:
@@ -390,6 +399,8 @@ class AdminController:
             # Eliminar la ciudad
             db.session.delete(ciudad)
             db.session.commit()
+            incrementar_version_red()  # Invalidar cachés del grafo
+            programar_analitica_red()  # Recalcular la analítica de la red en segundo plano
             flash('Ciudad y sus rutas eliminadas exitosamente', 'success')
         except Exception as e:
             db.session.rollback()
@@ -459,6 +470,8 @@ class AdminController:
             
             db.session.add(ruta)
             db.session.commit()
+            incrementar_version_red()  # Invalidar cachés del grafo
+            programar_analitica_red()  # Recalcular la analítica de la red en segundo plano
             flash('Conexión no dirigida agregada exitosamente', 'success')
             
         except ValueError:
@@ -492,6 +505,8 @@ class AdminController:
                 db.session.delete(ruta_inversa)
             
             db.session.commit()
+            incrementar_version_red()  # Invalidar cachés del grafo
+            programar_analitica_red()  # Recalcular la analítica de la red en segundo plano
             flash('Conexión eliminada exitosamente', 'success')
             
         except Exception as e:
@@ -545,6 +560,8 @@ class AdminController:
                 
                 db.session.add(ruta)
                 db.session.commit()
+                incrementar_version_red()  # Invalidar cachés del grafo
+                programar_analitica_red()  # Recalcular la analítica de la red en segundo plano
                 flash(f'Conexión entre {ciudad_origen.nombre} y {ciudad_destino.nombre} creada exitosamente (costo: ${costo:.2f})', 'success')
                 
             except ValueError:
@@ -601,6 +618,8 @@ class AdminController:
                     ruta_inversa.costo = nuevo_costo
                 
                 db.session.commit()
+                incrementar_version_red()  # Invalidar cachés del grafo
+                programar_analitica_red()  # Recalcular la analítica de la red en segundo plano
                 flash(f'Costo actualizado de ${costo_anterior:.2f} a ${nuevo_costo:.2f} para la conexión entre {ciudad_origen.nombre} y {ciudad_destino.nombre}', 'success')
                 
             except ValueError:
@@ -651,6 +670,8 @@ class AdminController:
                     db.session.delete(ruta_inversa)
                 
                 db.session.commit()
+                incrementar_version_red()  # Invalidar cachés del grafo
+                programar_analitica_red()  # Recalcular la analítica de la red en segundo plano
                 flash(f'Conexión entre {ciudad_origen.nombre} y {ciudad_destino.nombre} (costo: ${costo:.2f}) eliminada exitosamente', 'success')
                 
             except ValueError:
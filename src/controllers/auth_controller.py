@@ -19,6 +19,7 @@ from flask import render_template, request, redirect, url_for, flash
 from flask_login import login_user, current_user
 from models import User
 from extensions import db
+from utils.cache_dashboard import invalidar_dashboard
 from datetime import datetime
 
 class AuthController:
@@ -124,6 +125,9 @@ class AuthController:
                 db.session.add(user)
                 db.session.commit()
                 
+                # Las estadísticas de usuarios del dashboard cambiaron
+                invalidar_dashboard()
+                
                 flash('¡Registro exitoso! Ya puedes iniciar sesión.', 'success')
                 return redirect(url_for('auth.login'))
                 
@@ -225,16 +229,18 @@ class AuthController:
         Returns:
             dict: Diccionario con las estadísticas de usuarios
         """
-        total_users = User.query.count()
-        active_users = User.query.filter_by(is_active=True).count()
+        # Inicio del mes actual (registros desde el día 1 a las 00:00)
+        inicio_mes = datetime.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
         
-        # Usuarios registrados en el mes actual
-        recent_users = User.query.filter(
-            User.created_at >= datetime.now().replace(day=1)
-        ).count()
+        # Los tres conteos en una sola consulta de agregación condicional
+        total_users, active_users, recent_users = db.session.query(
+            db.func.count(User.id),
+            db.func.coalesce(db.func.sum(db.case((User.is_active == True, 1), else_=0)), 0),
+            db.func.coalesce(db.func.sum(db.case((User.created_at >= inicio_mes, 1), else_=0)), 0)
+        ).one()
         
         return {
             'total': total_users,
-            'active': active_users,
-            'recent': recent_users
+            'active': int(active_users),
+            'recent': int(recent_users)
         }
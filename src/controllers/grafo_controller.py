@@ -9,29 +9,122 @@ Funcionalidades principales:
 - Cálculo de rutas óptimas entre ciudades
 - Generación de visualizaciones del grafo
 - Estadísticas del sistema de rutas
-- Exportación de resultados a PDF
+- Exportación de resultados a PDF (con caché de documentos generados)
+- Exportación asíncrona a PDF mediante trabajos en segundo plano
+- Analítica de la red (diámetro, costo promedio, ciudades centrales) en JSON
+- Resultados de rutas reutilizables mediante token (PDF e imagen sin recalcular)
+- Exportación masiva de rutas a un PDF combinado o a un ZIP, enviada por partes
+- Consulta del estado de las cachés de rutas
+- API JSON de cálculo de rutas por lotes
+- API de matrices de costos origen × destino
+- Caché HTTP de imágenes del grafo (ETag, Cache-Control y respuestas 304)
+- Representación JSON de la red para la vista SVG en el navegador
+- Imágenes con nivel de detalle (por provincias, por provincia y camino local)
 
 Autor: Joaquín Bermeo
 Fecha: Julio 2025
 """
 
-from flask import render_template, request, Response
+from flask import render_template, request, Response, jsonify, current_app, url_for, stream_with_context
+from flask_login import current_user
 from utils.grafo_db_utils import (
     grafo_a_imagen, 
     camino_optimo_con_costera, 
     obtener_ciudades, 
     grafo_a_imagen_camino,
     obtener_estadisticas_grafo,
-    validar_ciudades_existen
+    validar_ciudades_existen,
+    estadisticas_cache_rutas,
+    calcular_rutas_lote,
+    seleccionar_ciudades,
+    calcular_matriz_costos,
+    obtener_red_json,
+    grafo_a_imagen_provincias,
+    grafo_a_imagen_provincia,
+    grafo_a_imagen_camino_local,
+    usar_vista_reducida,
+    obtener_pdf_ruta,
+    guardar_resultado_ruta,
+    obtener_resultado_ruta,
+    diagrama_pdf_camino,
+    resumen_analitica_red,
+    ciudades_fuera_de_red
 )
+from utils.version_red import obtener_etiqueta_version
+from utils.respuesta_http import respuesta_condicional
+from utils.trabajos_fondo import GestorTrabajos, COMPLETADO
 from datetime import datetime
+from concurrent import futures
+import hashlib
 import io
+import tempfile
+import zipfile
+import numpy as np
 from reportlab.lib.pagesizes import A4
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image, Table, TableStyle
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib import colors
 from reportlab.lib.enums import TA_CENTER, TA_LEFT
 
+# Tamaño de los fragmentos enviados al transmitir archivos por partes
+_TAMANO_FRAGMENTO = 64 * 1024
+
+
+class _SalidaPorPartes:
+    """
+    Destino de escritura que acumula lo escrito hasta que se retira.
+    
+    Permite generar un ZIP con zipfile y enviarlo al cliente a medida que se
+    escribe cada archivo, sin conservar el ZIP completo en memoria. Al no
+    tener tell() ni seek(), zipfile lo trata como un flujo no posicionable.
+    """
+    
+    def __init__(self):
+        """Inicializa la salida vacía."""
+        self._partes = []
+    
+    def write(self, datos):
+        """Acumula un bloque de datos escrito por zipfile."""
+        self._partes.append(bytes(datos))
+        return len(datos)
+    
+    def flush(self):
+        """No hace nada: los datos se retiran con retirar()."""
+    
+    def retirar(self):
+        """
+        Retira los datos acumulados desde la última llamada.
+        
+        Returns:
+            bytes: Datos escritos pendientes de enviar
+        """
+        datos = b''.join(self._partes)
+        self._partes = []
+        return datos
+
+
+# Gestor de trabajos de exportación a PDF (se crea con la configuración de la aplicación)
+_gestor_trabajos_pdf = None
+
+
+def _obtener_gestor_trabajos_pdf():
+    """
+    Obtiene el gestor de trabajos de exportación a PDF, creándolo la primera vez.
+    
+    Returns:
+        GestorTrabajos: Gestor de trabajos en segundo plano
+    """
+    global _gestor_trabajos_pdf
+    if _gestor_trabajos_pdf is None:
+        config = current_app.config
+        _gestor_trabajos_pdf = GestorTrabajos(
+            config.get('PDF_TRABAJOS_HILOS', 2),
+            config.get('PDF_TRABAJOS_EXPIRACION', 600),
+            config.get('PDF_TRABAJOS_MAX_ACTIVOS', 50),
+            config.get('PDF_TRABAJOS_MAX_BYTES', 64 * 1024 * 1024)
+        )
+    return _gestor_trabajos_pdf
+
 class GrafoController:
     """
     Controlador que maneja toda la lógica relacionada con grafos y rutas.
@@ -73,7 +166,7 @@ class GrafoController:
         Proceso:
         1. Obtiene lista de ciudades disponibles
         2. Valida datos de entrada del formulario
-        3. Ejecuta algoritmo de Dijkstra
+        3. Ejecuta algoritmo de Dijkstra (opcionalmente exigiendo paso por la costa)
         4. Formatea y presenta resultados
         
         Returns:
@@ -96,6 +189,7 @@ class GrafoController:
             # Obtener datos del formulario
             origen = request.form.get('origen')
             destino = request.form.get('destino')
+            exigir_costera = request.form.get('exigir_costera') == 'on'  # Checkbox
             
             # Validación básica de datos de entrada
             if not origen or not destino:
@@ -124,7 +218,15 @@ class GrafoController:
             
             # Ejecutar algoritmo de Dijkstra para encontrar la ruta óptima
             try:
-                resultado = camino_optimo_con_costera(origen, destino)
+                resultado = camino_optimo_con_costera(origen, destino, exigir_costera)
+                
+                # Informar si no existe ninguna ruta que pase por la costa
+                if exigir_costera and not resultado['camino']:
+                    return render_template(
+                        'grafos/calcular_camino.html', 
+                        ciudades=ciudades, 
+                        error=f'No existe una ruta entre {origen} y {destino} que pase por una ciudad costera'
+                    )
                 
                 # Enriquecer resultado con información adicional
                 if resultado and resultado['camino']:
@@ -137,6 +239,11 @@ class GrafoController:
                         resultado['info_costeras'] = f"Pasa por las ciudades costeras: {', '.join(resultado['ciudades_costeras_en_ruta'])}"
                     else:
                         resultado['info_costeras'] = "Esta ruta no pasa por ciudades costeras"
+                    
+                    # Guardar el resultado para exportarlo o dibujarlo sin recalcularlo
+                    resultado['token'] = guardar_resultado_ruta(
+                        current_user.get_id(), origen, destino, exigir_costera, resultado
+                    )
                         
             except Exception as e:
                 print(f"Error calculando ruta: {e}")
@@ -185,6 +292,11 @@ class GrafoController:
                     resultado['info_costeras'] = f"Pasa por las ciudades costeras: {', '.join(resultado['ciudades_costeras_en_ruta'])}"
                 else:
                     resultado['info_costeras'] = "Esta ruta no pasa por ciudades costeras"
+                
+                # Guardar el resultado para exportarlo o dibujarlo sin recalcularlo
+                resultado['token'] = guardar_resultado_ruta(
+                    current_user.get_id(), "Ibarra", "Loja", False, resultado
+                )
             
             return render_template('grafos/camino.html', resultado=resultado)
             
@@ -199,14 +311,42 @@ class GrafoController:
         Genera una imagen visual del grafo completo del sistema.
         
         Utiliza NetworkX y Matplotlib para crear una representación gráfica
-        de todas las ciudades y sus conexiones.
+        de todas las ciudades y sus conexiones. En redes grandes (más de
+        LOD_UMBRAL_CIUDADES ciudades) se muestra por defecto la vista
+        agregada por provincias.
+        
+        Args (via URL parameters):
+            vista (str, optional): 'completa' o 'provincias' para forzar una vista
+            provincia (str, optional): Muestra solo las ciudades de esa provincia
         
         Returns:
-            Response: Imagen PNG del grafo o error 500
+            Response: Imagen PNG del grafo, 304 si el cliente ya la tiene,
+                      404 si la provincia no tiene ciudades en la red,
+                      503 si se supera el tiempo límite o error 500
         """
+        vista = request.args.get('vista', '')
+        provincia = request.args.get('provincia', '')
+        
+        def generar():
+            if provincia:
+                buf = grafo_a_imagen_provincia(provincia)
+                if buf is None:
+                    raise LookupError(provincia)
+            elif vista == 'provincias' or (vista != 'completa' and usar_vista_reducida()):
+                buf = grafo_a_imagen_provincias()
+            else:
+                buf = grafo_a_imagen()
+            return buf.getvalue()
+        
         try:
-            buf = grafo_a_imagen()
-            return Response(buf.getvalue(), mimetype='image/png')
+            # La imagen solo cambia con la versión de la red y la vista solicitada
+            huella_vista = hashlib.sha1(f'{vista}\x1f{provincia}'.encode('utf-8')).hexdigest()[:16]
+            etag = f'grafo-{obtener_etiqueta_version()}-{huella_vista}'
+            return respuesta_condicional(etag, generar)
+        except LookupError:
+            return Response("La provincia no tiene ciudades en la red", status=404)
+        except futures.TimeoutError:
+            return Response("La generación de la imagen superó el tiempo límite", status=503)
         except Exception as e:
             print(f"Error generando imagen: {e}")
             return Response("Error generando imagen", status=500)
@@ -217,23 +357,67 @@ class GrafoController:
         Genera una imagen del grafo con una ruta específica resaltada.
         
         Recibe una lista de ciudades que forman un camino y las resalta
-        en color diferente sobre el grafo completo.
+        en color diferente sobre el grafo completo. En redes grandes (más de
+        LOD_UMBRAL_CIUDADES ciudades) se dibuja por defecto solo el subgrafo
+        local formado por el camino y las ciudades vecinas.
         
         Args (via URL parameters):
+            resultado (str, optional): Token de un resultado de ruta guardado; si es
+                                       válido se resalta su camino
             camino (list): Lista de nombres de ciudades que forman la ruta
+                           (se usa si no hay token o ya no es válido)
+            vista (str, optional): 'completa' o 'local' para forzar una vista
             
         Returns:
-            Response: Imagen PNG del grafo con camino resaltado o error 500
+            Response: Imagen PNG del grafo con camino resaltado, 304 si el cliente
+                      ya la tiene, 404 si alguna ciudad del camino no existe,
+                      503 si se supera el tiempo límite o error 500
         """
         try:
-            # Obtener el camino desde los parámetros de la URL
-            camino = request.args.getlist('camino')
-            buf = grafo_a_imagen_camino(camino)
-            return Response(buf.getvalue(), mimetype='image/png')
+            # Obtener el camino (del resultado guardado o de la URL) y la vista
+            datos = obtener_resultado_ruta(request.args.get('resultado'), current_user.get_id())
+            camino = list(datos['resultado']['camino']) if datos else request.args.getlist('camino')
+            vista = request.args.get('vista', '')
+            
+            desconocidas = ciudades_fuera_de_red(camino)
+            if desconocidas:
+                return Response(f"Ciudades inexistentes: {', '.join(desconocidas)}", status=404)
+            
+            def generar():
+                if vista == 'local' or (vista != 'completa' and usar_vista_reducida()):
+                    return grafo_a_imagen_camino_local(camino).getvalue()
+                return grafo_a_imagen_camino(camino).getvalue()
+            
+            # La imagen depende de la versión de la red, del camino resaltado y de la vista
+            huella_camino = hashlib.sha1('\x1f'.join(camino + [vista]).encode('utf-8')).hexdigest()[:16]
+            etag = f'camino-{obtener_etiqueta_version()}-{huella_camino}'
+            return respuesta_condicional(etag, generar)
+        except futures.TimeoutError:
+            return Response("La generación de la imagen superó el tiempo límite", status=503)
         except Exception as e:
             print(f"Error generando imagen con camino: {e}")
             return Response("Error generando imagen", status=500)
     
+    @staticmethod
+    def obtener_grafo_json():
+        """
+        Retorna la red completa en formato JSON compacto para dibujarla en el navegador.
+        
+        El contenido incluye ciudades (ID, nombre, si es costera, provincia y
+        posición) y rutas (IDs y costo). Se valida con una ETag derivada de la
+        versión de la red, por lo que el navegador solo lo descarga de nuevo
+        cuando la red cambia.
+        
+        Returns:
+            Response: JSON de la red, 304 si el cliente ya lo tiene o error 500
+        """
+        try:
+            etag = f'red-{obtener_etiqueta_version()}'
+            return respuesta_condicional(etag, obtener_red_json, 'application/json')
+        except Exception as e:
+            print(f"Error generando JSON de la red: {e}")
+            return jsonify({'error': 'Error obteniendo la red'}), 500
+    
     @staticmethod
     def get_estadisticas_grafo():
         """
@@ -260,9 +444,425 @@ class GrafoController:
             }
 
     @staticmethod
-    def exportar_ruta_pdf():
+    def _validar_pares(pares):
         """
-        Genera un archivo PDF con los detalles completos de una ruta calculada.
+        Valida una lista de pares origen/destino recibida en una petición JSON.
+        
+        Args:
+            pares (list): Lista de objetos {"origen": ..., "destino": ...}
+            
+        Returns:
+            tuple: (errores {índice: mensaje}, lista de tuplas (origen, destino) válidas)
+        """
+        ciudades = set(obtener_ciudades())
+        
+        errores = {}
+        validos = []
+        for i, par in enumerate(pares):
+            origen = par.get('origen') if isinstance(par, dict) else None
+            destino = par.get('destino') if isinstance(par, dict) else None
+            if not origen or not destino:
+                errores[i] = 'Cada par debe indicar origen y destino'
+            elif not isinstance(origen, str) or not isinstance(destino, str):
+                errores[i] = 'El origen y destino deben ser nombres de ciudades'
+            elif origen == destino:
+                errores[i] = 'El origen y destino no pueden ser iguales'
+            elif origen not in ciudades:
+                errores[i] = f"La ciudad de origen '{origen}' no existe"
+            elif destino not in ciudades:
+                errores[i] = f"La ciudad de destino '{destino}' no existe"
+            else:
+                validos.append((origen, destino))
+        
+        return errores, validos
+
+    @staticmethod
+    def _opcion_booleana(datos, campo, defecto=False):
+        """
+        Lee una opción booleana de una petición JSON.
+        
+        Solo se aceptan los valores true y false de JSON; textos como "false"
+        o números no se convierten, para no activar una opción por error.
+        
+        Args:
+            datos (dict): Cuerpo JSON de la petición
+            campo (str): Nombre de la opción
+            defecto (bool): Valor si la opción no está presente
+            
+        Returns:
+            bool: Valor de la opción o None si no es un booleano
+        """
+        valor = datos.get(campo, defecto)
+        return valor if isinstance(valor, bool) else None
+
+    @staticmethod
+    def _validar_criterio(criterio, nombre_conjunto):
+        """
+        Valida los tipos de los filtros de un conjunto de ciudades de la matriz.
+        
+        Args:
+            criterio (dict): Filtros 'nombres', 'provincia' y/o 'es_costera'
+            nombre_conjunto (str): Nombre del conjunto para el mensaje de error
+            
+        Returns:
+            str: Mensaje de error o None si el criterio es válido
+        """
+        nombres = criterio.get('nombres')
+        if nombres is not None and (not isinstance(nombres, list)
+                                    or not all(isinstance(n, str) for n in nombres)):
+            return f'"{nombre_conjunto}.nombres" debe ser una lista de nombres de ciudades'
+        
+        provincia = criterio.get('provincia')
+        if provincia is not None and not isinstance(provincia, str):
+            return f'"{nombre_conjunto}.provincia" debe ser un texto'
+        
+        es_costera = criterio.get('es_costera')
+        if es_costera is not None and not isinstance(es_costera, bool):
+            return f'"{nombre_conjunto}.es_costera" debe ser true o false'
+        
+        return None
+
+    @staticmethod
+    def calcular_rutas_lote():
+        """
+        Calcula en una sola petición las rutas de muchos pares origen/destino.
+        
+        Recibe un JSON con la forma:
+            {"pares": [{"origen": "Ibarra", "destino": "Loja"}, ...],
+             "exigir_costera": false}
+        
+        Todos los pares se calculan sobre la misma instantánea de la red,
+        ejecutando una sola búsqueda por cada ciudad de origen distinta.
+        Los errores de un par (ciudad inexistente, datos incompletos) se
+        reportan en ese par sin afectar al resto.
+        
+        Returns:
+            Response: JSON con un resultado (o error) por cada par, 400 si el
+                      cuerpo no es válido o 413 si se supera el límite de pares
+        """
+        datos = request.get_json(silent=True)
+        if not isinstance(datos, dict) or not isinstance(datos.get('pares'), list):
+            return jsonify({'error': 'Se esperaba un JSON con la lista "pares"'}), 400
+        
+        pares = datos['pares']
+        exigir_costera = GrafoController._opcion_booleana(datos, 'exigir_costera')
+        if exigir_costera is None:
+            return jsonify({'error': '"exigir_costera" debe ser true o false'}), 400
+        
+        # Limitar el tamaño de la petición
+        max_pares = current_app.config.get('LOTE_RUTAS_MAX_PARES', 500)
+        if len(pares) > max_pares:
+            return jsonify({'error': f'El lote no puede tener más de {max_pares} pares'}), 413
+        
+        try:
+            # Validar cada par y separar los válidos para calcularlos juntos
+            errores, validos = GrafoController._validar_pares(pares)
+            version, calculados = calcular_rutas_lote(validos, exigir_costera)
+        except Exception as e:
+            print(f"Error calculando lote de rutas: {e}")
+            return jsonify({'error': 'Error calculando las rutas'}), 500
+        
+        # Armar la respuesta en el mismo orden de los pares recibidos
+        resultados = []
+        for i, par in enumerate(pares):
+            if i in errores:
+                error = {'indice': i, 'error': errores[i]}
+                if isinstance(par, dict):
+                    error.update({'origen': par.get('origen'), 'destino': par.get('destino')})
+                resultados.append(error)
+            else:
+                resultado = dict(calculados[(par['origen'], par['destino'])])
+                resultado.update({'indice': i, 'origen': par['origen'], 'destino': par['destino']})
+                resultados.append(resultado)
+        
+        return jsonify({
+            'version_red': version,
+            'exigir_costera': exigir_costera,
+            'total': len(pares),
+            'errores': len(errores),
+            'resultados': resultados
+        })
+
+    @staticmethod
+    def calcular_matriz():
+        """
+        Calcula la matriz de costos mínimos entre dos conjuntos de ciudades.
+        
+        Recibe un JSON con la forma:
+            {"origenes": {"es_costera": true},
+             "destinos": {"es_costera": false, "provincia": "Azuay"},
+             "formato": "json"}
+        
+        Cada conjunto se define con los filtros 'nombres' (lista de textos),
+        'provincia' (texto) y/o 'es_costera' (booleano). La matriz se calcula con una sola llamada vectorizada
+        a scipy.sparse.csgraph.dijkstra desde los orígenes.
+        
+        Con formato "npz" la respuesta es un archivo NumPy comprimido con los
+        arreglos 'costos' (float64, infinito si no hay camino), 'origenes' y
+        'destinos'. Con formato "json" (por defecto) los costos sin camino son null.
+        
+        Returns:
+            Response: Matriz en JSON o binario NumPy, 400 si la petición no es
+                      válida o 413 si la matriz supera el tamaño permitido
+        """
+        datos = request.get_json(silent=True)
+        if not isinstance(datos, dict):
+            return jsonify({'error': 'Se esperaba un JSON con "origenes" y "destinos"'}), 400
+        
+        criterio_origenes = datos.get('origenes') or {}
+        criterio_destinos = datos.get('destinos') or {}
+        formato = datos.get('formato', 'json')
+        if not isinstance(criterio_origenes, dict) or not isinstance(criterio_destinos, dict):
+            return jsonify({'error': 'Los conjuntos "origenes" y "destinos" deben ser objetos'}), 400
+        if formato not in ('json', 'npz'):
+            return jsonify({'error': 'El formato debe ser "json" o "npz"'}), 400
+        
+        error = (GrafoController._validar_criterio(criterio_origenes, 'origenes')
+                 or GrafoController._validar_criterio(criterio_destinos, 'destinos'))
+        if error:
+            return jsonify({'error': error}), 400
+        
+        try:
+            origenes, desconocidos_origen = seleccionar_ciudades(criterio_origenes)
+            destinos, desconocidos_destino = seleccionar_ciudades(criterio_destinos)
+            
+            desconocidas = sorted(set(desconocidos_origen) | set(desconocidos_destino))
+            if desconocidas:
+                return jsonify({'error': 'Ciudades inexistentes', 'ciudades': desconocidas}), 400
+            
+            # Limitar el tamaño de la matriz solicitada
+            max_celdas = current_app.config.get('MATRIZ_API_MAX_CELDAS', 1000000)
+            if len(origenes) * len(destinos) > max_celdas:
+                return jsonify({'error': f'La matriz no puede superar {max_celdas} celdas'}), 413
+            
+            version, costos = calcular_matriz_costos(origenes, destinos)
+        except Exception as e:
+            print(f"Error calculando matriz de costos: {e}")
+            return jsonify({'error': 'Error calculando la matriz de costos'}), 500
+        
+        if formato == 'npz':
+            buffer = io.BytesIO()
+            np.savez_compressed(buffer, costos=costos,
+                                origenes=np.array(origenes), destinos=np.array(destinos))
+            return Response(
+                buffer.getvalue(),
+                mimetype='application/octet-stream',
+                headers={
+                    'Content-Disposition': 'attachment; filename="matriz_costos.npz"',
+                    'X-Version-Red': str(version)
+                }
+            )
+        
+        return jsonify({
+            'version_red': version,
+            'origenes': origenes,
+            'destinos': destinos,
+            'costos': [[float(c) if np.isfinite(c) else None for c in fila] for fila in costos]
+        })
+
+    @staticmethod
+    def obtener_estadisticas_cache():
+        """
+        Retorna en formato JSON el estado de las cachés del cálculo de rutas.
+        
+        Returns:
+            Response: JSON con la versión de la red y las estadísticas de las cachés
+        """
+        return jsonify(estadisticas_cache_rutas())
+
+    @staticmethod
+    def obtener_analitica_red():
+        """
+        Retorna la analítica de la red y el progreso de su cálculo en segundo plano.
+        
+        Returns:
+            Response: JSON con el estado ('lista' o 'calculando'), el progreso y,
+                      si está disponible, las métricas de la versión actual de la red
+        """
+        try:
+            return jsonify(resumen_analitica_red())
+        except Exception as e:
+            print(f"Error obteniendo analítica de la red: {e}")
+            return jsonify({'error': 'Error obteniendo la analítica de la red'}), 500
+
+    @staticmethod
+    def _estilos_pdf():
+        """
+        Define los estilos de párrafo usados en los reportes PDF.
+        
+        Returns:
+            tuple: (estilo de título, estilo de subtítulo, estilo normal)
+        """
+        styles = getSampleStyleSheet()
+        title_style = ParagraphStyle(
+            'CustomTitle',
+            parent=styles['Heading1'],
+            fontSize=24,
+            spaceAfter=30,
+            alignment=TA_CENTER,
+            textColor=colors.darkblue
+        )
+        
+        subtitle_style = ParagraphStyle(
+            'CustomSubtitle',
+            parent=styles['Heading2'],
+            fontSize=16,
+            spaceAfter=15,
+            alignment=TA_LEFT,
+            textColor=colors.darkgreen
+        )
+        
+        normal_style = styles['Normal']
+        normal_style.fontSize = 12
+        normal_style.spaceAfter = 10
+        
+        return title_style, subtitle_style, normal_style
+
+    @staticmethod
+    def _encabezado_pdf(estilos, subtitulo):
+        """
+        Construye el encabezado de un reporte PDF (título, subtítulo y fecha).
+        
+        Args:
+            estilos (tuple): Estilos retornados por _estilos_pdf()
+            subtitulo (str): Subtítulo del reporte
+            
+        Returns:
+            list: Elementos (flowables) del encabezado
+        """
+        title_style, subtitle_style, normal_style = estilos
+        fecha_actual = datetime.now().strftime('%d/%m/%Y %H:%M')
+        return [
+            Paragraph("Sistema de Análisis de Grafos", title_style),
+            Paragraph(subtitulo, subtitle_style),
+            Spacer(1, 20),
+            Paragraph(f"<b>Fecha de generación:</b> {fecha_actual}", normal_style)
+        ]
+
+    @staticmethod
+    def _contenido_pdf_ruta(origen, destino, exigir_costera, resultado, estilos, reportar_progreso):
+        """
+        Construye la sección de un reporte PDF con los detalles de una ruta.
+        
+        Incluye origen y destino, la ruta paso a paso con sus costos,
+        estadísticas adicionales y la imagen del grafo con la ruta resaltada.
+        
+        Args:
+            origen (str): Ciudad de origen
+            destino (str): Ciudad de destino
+            exigir_costera (bool): Si la ruta debe pasar por una ciudad costera
+            resultado (dict): Resultado de la ruta (formato de camino_optimo_con_costera)
+            estilos (tuple): Estilos retornados por _estilos_pdf()
+            reportar_progreso (callable): Función que recibe el avance (0-100)
+            
+        Returns:
+            list: Elementos (flowables) de la sección
+        """
+        _, subtitle_style, normal_style = estilos
+        story = []
+        
+        # Información general del cálculo
+        story.append(Paragraph(f"<b>Origen:</b> {origen}", normal_style))
+        story.append(Paragraph(f"<b>Destino:</b> {destino}", normal_style))
+        if exigir_costera:
+            story.append(Paragraph("<b>Modo:</b> Ruta más económica que pasa por una ciudad costera", normal_style))
+        story.append(Spacer(1, 20))
+        
+        # Sección con detalles de la ruta calculada
+        story.append(Paragraph("Detalles de la Ruta Calculada", subtitle_style))
+        
+        # Mostrar la ruta completa como una cadena de ciudades
+        ruta_texto = " → ".join(resultado['camino'])
+        story.append(Paragraph(f"<b>Ruta óptima:</b> {ruta_texto}", normal_style))
+        story.append(Paragraph(f"<b>Costo total:</b> ${resultado['costo']:.2f}", normal_style))
+        
+        # Calcular y mostrar estadísticas adicionales
+        paradas = len(resultado['camino']) - 1
+        story.append(Paragraph(f"<b>Número de paradas:</b> {paradas} conexiones", normal_style))
+        
+        tiempo_estimado = resultado['costo'] * 2  # Estimación simple
+        story.append(Paragraph(f"<b>Tiempo estimado:</b> {tiempo_estimado:.1f} horas", normal_style))
+        
+        # Información sobre validación de ciudades costeras
+        if resultado.get('valido'):
+            story.append(Paragraph("--> <b>Esta ruta pasa por al menos una ciudad costera</b>", normal_style))
+        else:
+            story.append(Paragraph("--> <b>Esta ruta NO pasa por ciudades costeras</b>", normal_style))
+            
+        story.append(Spacer(1, 30))
+        
+        # Crear tabla con detalles paso a paso de la ruta
+        story.append(Paragraph("Detalles Paso a Paso", subtitle_style))
+        
+        # Preparar datos para la tabla
+        table_data = [['Paso', 'Desde', 'Hacia', 'Costo']]
+        
+        # Llenar la tabla con cada segmento de la ruta y su costo real
+        costos_tramos = resultado.get('costos_tramos', [])
+        for i in range(len(resultado['camino']) - 1):
+            paso = i + 1
+            desde = resultado['camino'][i]
+            hacia = resultado['camino'][i + 1]
+            costo_tramo = f"${costos_tramos[i]:.2f}" if i < len(costos_tramos) else "-"
+            table_data.append([str(paso), desde, hacia, costo_tramo])
+        
+        # Crear y estilizar la tabla
+        table = Table(table_data)
+        table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),        # Fondo gris para encabezado
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),   # Texto blanco en encabezado
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),               # Centrar todo el texto
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),     # Fuente bold para encabezado
+            ('FONTSIZE', (0, 0), (-1, 0), 12),                   # Tamaño de fuente del encabezado
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),              # Padding inferior del encabezado
+            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),      # Fondo beige para filas de datos
+            ('GRID', (0, 0), (-1, -1), 1, colors.black)          # Bordes negros
+        ]))
+        
+        story.append(table)
+        story.append(Spacer(1, 30))
+        
+        # Intentar agregar el diagrama del grafo con la ruta resaltada
+        try:
+            # Diagrama vectorial de ReportLab dibujado con las posiciones en caché
+            diagrama = diagrama_pdf_camino(resultado['camino'])
+            diagrama.hAlign = 'CENTER'
+            reportar_progreso(60)
+            
+            story.append(Paragraph("Visualización del Grafo", subtitle_style))
+            story.append(diagrama)
+            story.append(Paragraph("Grafo con la ruta óptima resaltada", normal_style))
+            
+        except Exception as e:
+            print(f"Error agregando diagrama al PDF: {e}")
+            story.append(Paragraph("Error: No se pudo generar el diagrama del grafo", normal_style))
+        
+        story.append(Spacer(1, 20))
+        return story
+
+    @staticmethod
+    def _pie_pdf(estilos):
+        """
+        Construye la sección final de información del sistema de un reporte PDF.
+        
+        Args:
+            estilos (tuple): Estilos retornados por _estilos_pdf()
+            
+        Returns:
+            list: Elementos (flowables) de la sección
+        """
+        _, subtitle_style, normal_style = estilos
+        return [
+            Paragraph("Información del Sistema", subtitle_style),
+            Paragraph("Este reporte fue generado por el Sistema de Análisis de Grafos y Rutas Óptimas. Realizado por: Joaquin Bermeo.", normal_style),
+            Paragraph("Algoritmo utilizado: Dijkstra para encontrar el camino más corto.", normal_style),
+            Paragraph("Los costos están expresados en unidades monetarias.", normal_style)
+        ]
+
+    @staticmethod
+    def _construir_pdf_ruta(origen, destino, exigir_costera, resultado, reportar_progreso=None):
+        """
+        Construye el documento PDF de una ruta ya calculada.
         
         El PDF incluye:
         - Información de origen y destino
@@ -270,166 +870,407 @@ class GrafoController:
         - Costo total y tiempo estimado
         - Fecha de generación
         - Estadísticas adicionales
+        - Diagrama vectorial del grafo con la ruta resaltada
         
-        Args (via URL parameters):
+        Args:
+            origen (str): Ciudad de origen
+            destino (str): Ciudad de destino
+            exigir_costera (bool): Si la ruta debe pasar por una ciudad costera
+            resultado (dict): Resultado de la ruta (formato de camino_optimo_con_costera)
+            reportar_progreso (callable, optional): Función que recibe el avance (0-100)
+            
+        Returns:
+            bytes: Contenido del PDF
+        """
+        reportar_progreso = reportar_progreso or (lambda progreso: None)
+        
+        # Crear el documento PDF en memoria usando ReportLab
+        buffer = io.BytesIO()
+        doc = SimpleDocTemplate(buffer, pagesize=A4)
+        estilos = GrafoController._estilos_pdf()
+        
+        # Lista de elementos que formarán el contenido del PDF
+        story = GrafoController._encabezado_pdf(estilos, "Reporte de Ruta Óptima")
+        story += GrafoController._contenido_pdf_ruta(
+            origen, destino, exigir_costera, resultado, estilos, reportar_progreso
+        )
+        story += GrafoController._pie_pdf(estilos)
+        
+        # Construir el PDF con todos los elementos
+        reportar_progreso(70)
+        doc.build(story)
+        return buffer.getvalue()
+
+    @staticmethod
+    def _generar_pdf_ruta(origen, destino, exigir_costera=False, reportar_progreso=None):
+        """
+        Calcula una ruta y construye su documento PDF completo.
+        
+        Args:
+            origen (str): Ciudad de origen
+            destino (str): Ciudad de destino
+            exigir_costera (bool): Si la ruta debe pasar por una ciudad costera
+            reportar_progreso (callable, optional): Función que recibe el avance (0-100)
+            
+        Returns:
+            bytes: Contenido del PDF o None si no se pudo calcular la ruta
+        """
+        reportar_progreso = reportar_progreso or (lambda progreso: None)
+        
+        # Calcular la ruta usando el algoritmo de Dijkstra
+        resultado = camino_optimo_con_costera(origen, destino, exigir_costera)
+        
+        # Verificar que se haya encontrado una ruta válida
+        if not resultado or not resultado.get('camino'):
+            return None
+        reportar_progreso(20)
+        
+        return GrafoController._construir_pdf_ruta(origen, destino, exigir_costera, resultado, reportar_progreso)
+
+    @staticmethod
+    def _generador_pdf(origen, destino, exigir_costera, datos, reportar_progreso=None):
+        """
+        Retorna la función que construye el PDF de una ruta para obtener_pdf_ruta.
+        
+        Args:
             origen (str): Ciudad de origen
             destino (str): Ciudad de destino
+            exigir_costera (bool): Si la ruta debe pasar por una ciudad costera
+            datos (dict): Resultado guardado por token (None para calcular la ruta)
+            reportar_progreso (callable, optional): Función que recibe el avance (0-100)
+            
+        Returns:
+            callable: Función sin argumentos que retorna los bytes del PDF o None
+        """
+        if datos:
+            # La ruta ya está calculada: solo se construye el documento
+            return lambda: GrafoController._construir_pdf_ruta(
+                origen, destino, exigir_costera, datos['resultado'], reportar_progreso
+            )
+        return lambda: GrafoController._generar_pdf_ruta(origen, destino, exigir_costera, reportar_progreso)
+
+    @staticmethod
+    def exportar_ruta_pdf():
+        """
+        Genera un archivo PDF con los detalles completos de una ruta calculada.
+        
+        Los PDF generados se guardan en una caché acotada (memoria y disco)
+        con clave (origen, destino, modo, contenido de la red), por lo que
+        una descarga repetida envía el documento almacenado sin recalcular
+        la ruta ni volver a construirlo. Con el token de un resultado guardado
+        tampoco se calcula la ruta cuando el PDF no está en caché.
+        
+        Args (via URL parameters):
+            resultado (str, optional): Token de un resultado de ruta guardado
+            origen (str): Ciudad de origen (se usa si no hay token o ya no es válido)
+            destino (str): Ciudad de destino
+            costera (str): '1' para exigir que la ruta pase por una ciudad costera
             
         Returns:
             Response: Archivo PDF descargable o mensaje de error
         """
         try:
-            # Obtener parámetros de la URL
-            origen = request.args.get('origen')
-            destino = request.args.get('destino')
+            # Obtener parámetros de la URL (el resultado guardado tiene prioridad)
+            datos = obtener_resultado_ruta(request.args.get('resultado'), current_user.get_id())
+            if datos:
+                origen, destino, exigir_costera = datos['origen'], datos['destino'], datos['exigir_costera']
+            else:
+                origen = request.args.get('origen')
+                destino = request.args.get('destino')
+                exigir_costera = request.args.get('costera') == '1'
             
             # Validar que se proporcionen ambos parámetros
             if not origen or not destino:
                 return Response("Faltan parámetros origen y destino", status=400)
             
-            # Calcular la ruta usando el algoritmo de Dijkstra
-            resultado = camino_optimo_con_costera(origen, destino)
+            # Obtener el PDF desde la caché o generarlo
+            pdf = obtener_pdf_ruta(
+                origen, destino, exigir_costera,
+                GrafoController._generador_pdf(origen, destino, exigir_costera, datos)
+            )
             
             # Verificar que se haya encontrado una ruta válida
-            if not resultado or not resultado.get('camino'):
+            if pdf is None:
                 return Response("No se pudo calcular la ruta", status=404)
             
-            # Crear el documento PDF en memoria usando ReportLab
-            buffer = io.BytesIO()
-            doc = SimpleDocTemplate(buffer, pagesize=A4)
-            story = []  # Lista de elementos que formarán el contenido del PDF
-            
-            # Definir estilos personalizados para el documento
-            styles = getSampleStyleSheet()
-            title_style = ParagraphStyle(
-                'CustomTitle',
-                parent=styles['Heading1'],
-                fontSize=24,
-                spaceAfter=30,
-                alignment=TA_CENTER,
-                textColor=colors.darkblue
-            )
+            # Preparar la respuesta HTTP con el PDF
+            filename = f"ruta_{origen}_{destino}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
             
-            subtitle_style = ParagraphStyle(
-                'CustomSubtitle',
-                parent=styles['Heading2'],
-                fontSize=16,
-                spaceAfter=15,
-                alignment=TA_LEFT,
-                textColor=colors.darkgreen
+            return Response(
+                pdf,
+                mimetype='application/pdf',
+                headers={
+                    'Content-Disposition': f'attachment; filename="{filename}"',
+                    'Content-Type': 'application/pdf'
+                }
             )
             
-            normal_style = styles['Normal']
-            normal_style.fontSize = 12
-            normal_style.spaceAfter = 10
+        except Exception as e:
+            print(f"Error generando PDF: {e}")
+            return Response(f"Error generando PDF: {str(e)}", status=500)
+
+    @staticmethod
+    def crear_trabajo_pdf():
+        """
+        Encola la exportación de una ruta a PDF como trabajo en segundo plano.
+        
+        La petición termina de inmediato con el identificador del trabajo; el
+        PDF se genera en un hilo del gestor de trabajos (o se toma de la caché
+        de reportes) sin ocupar el hilo de la petición.
+        
+        Args (via form o JSON):
+            resultado (str, optional): Token de un resultado de ruta guardado
+            origen (str): Ciudad de origen (se usa si no hay token o ya no es válido)
+            destino (str): Ciudad de destino
+            costera (str): '1' para exigir que la ruta pase por una ciudad costera
             
-            # Agregar título y encabezado del documento
-            story.append(Paragraph("Sistema de Análisis de Grafos", title_style))
-            story.append(Paragraph("Reporte de Ruta Óptima", subtitle_style))
-            story.append(Spacer(1, 20))
+        Returns:
+            Response: JSON con el estado del trabajo y sus URLs (202), 400 si
+                      faltan parámetros o 429 si hay demasiados trabajos activos
+        """
+        parametros = request.get_json(silent=True) or request.form
+        datos = obtener_resultado_ruta(parametros.get('resultado'), current_user.get_id())
+        if datos:
+            origen, destino, exigir_costera = datos['origen'], datos['destino'], datos['exigir_costera']
+        else:
+            origen = parametros.get('origen')
+            destino = parametros.get('destino')
+            exigir_costera = str(parametros.get('costera', '')) in ('1', 'true', 'True')
+        
+        if not origen or not destino:
+            return jsonify({'error': 'Faltan parámetros origen y destino'}), 400
+        
+        def tarea(reportar_progreso):
+            pdf = obtener_pdf_ruta(
+                origen, destino, exigir_costera,
+                GrafoController._generador_pdf(origen, destino, exigir_costera, datos, reportar_progreso)
+            )
+            if pdf is None:
+                raise ValueError('No se pudo calcular la ruta')
+            return pdf
+        
+        trabajo = _obtener_gestor_trabajos_pdf().encolar(
+            current_app._get_current_object(), current_user.get_id(),
+            {'origen': origen, 'destino': destino, 'exigir_costera': exigir_costera},
+            tarea
+        )
+        if trabajo is None:
+            return jsonify({'error': 'Hay demasiadas exportaciones en curso, intente más tarde'}), 429
+        
+        return jsonify(GrafoController._estado_trabajo_pdf(trabajo)), 202
+
+    @staticmethod
+    def _estado_trabajo_pdf(trabajo):
+        """
+        Construye el estado JSON de un trabajo de exportación con sus URLs.
+        
+        Args:
+            trabajo (Trabajo): Trabajo de exportación
             
-            # Información general del cálculo
-            fecha_actual = datetime.now().strftime('%d/%m/%Y %H:%M')
-            story.append(Paragraph(f"<b>Fecha de generación:</b> {fecha_actual}", normal_style))
-            story.append(Paragraph(f"<b>Origen:</b> {origen}", normal_style))
-            story.append(Paragraph(f"<b>Destino:</b> {destino}", normal_style))
-            story.append(Spacer(1, 20))
+        Returns:
+            dict: Estado del trabajo con las URLs de consulta y descarga
+        """
+        estado = trabajo.a_dict()
+        estado['url_estado'] = url_for('grafos.estado_trabajo_pdf', trabajo_id=trabajo.id)
+        estado['url_descarga'] = url_for('grafos.descargar_trabajo_pdf', trabajo_id=trabajo.id)
+        return estado
+
+    @staticmethod
+    def consultar_trabajo_pdf(trabajo_id):
+        """
+        Retorna el estado y el progreso de un trabajo de exportación a PDF.
+        
+        Args:
+            trabajo_id (str): Identificador del trabajo
             
-            # Sección con detalles de la ruta calculada
-            story.append(Paragraph("Detalles de la Ruta Calculada", subtitle_style))
+        Returns:
+            Response: JSON con el estado del trabajo o 404 si no existe o expiró
+        """
+        trabajo = _obtener_gestor_trabajos_pdf().obtener(trabajo_id, current_user.get_id())
+        if trabajo is None:
+            return jsonify({'error': 'Trabajo no encontrado o expirado'}), 404
+        return jsonify(GrafoController._estado_trabajo_pdf(trabajo))
+
+    @staticmethod
+    def descargar_trabajo_pdf(trabajo_id):
+        """
+        Descarga el PDF generado por un trabajo de exportación terminado.
+        
+        Args:
+            trabajo_id (str): Identificador del trabajo
             
-            # Mostrar la ruta completa como una cadena de ciudades
-            ruta_texto = " → ".join(resultado['camino'])
-            story.append(Paragraph(f"<b>Ruta óptima:</b> {ruta_texto}", normal_style))
-            story.append(Paragraph(f"<b>Costo total:</b> ${resultado['costo']:.2f}", normal_style))
+        Returns:
+            Response: Archivo PDF, 404 si el trabajo no existe o expiró, o 409
+                      si todavía no terminó o falló
+        """
+        trabajo = _obtener_gestor_trabajos_pdf().obtener(trabajo_id, current_user.get_id())
+        if trabajo is None:
+            return jsonify({'error': 'Trabajo no encontrado o expirado'}), 404
+        if trabajo.estado != COMPLETADO:
+            return jsonify(GrafoController._estado_trabajo_pdf(trabajo)), 409
+        
+        origen = trabajo.descripcion['origen']
+        destino = trabajo.descripcion['destino']
+        filename = f"ruta_{origen}_{destino}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
+        return Response(
+            trabajo.resultado,
+            mimetype='application/pdf',
+            headers={'Content-Disposition': f'attachment; filename="{filename}"'}
+        )
+
+    @staticmethod
+    def exportar_lote_pdf():
+        """
+        Exporta muchas rutas en un solo archivo: un PDF combinado o un ZIP de PDFs.
+        
+        Recibe un JSON con la forma:
+            {"pares": [{"origen": "Ibarra", "destino": "Loja"}, ...],
+             "exigir_costera": false,
+             "formato": "zip"}
+        
+        Todas las rutas se calculan sobre la misma instantánea de la red,
+        agrupando las búsquedas por ciudad de origen:
+        - zip: se transmite mientras se genera; cada PDF (con el mismo formato
+          que exportar_ruta_pdf) se envía en cuanto está listo y los pares sin
+          ruta se listan en errores.txt
+        - pdf: un solo documento con una sección por ruta. No se transmite
+          mientras se genera: como el formato PDF escribe su índice al final,
+          el documento completo se construye primero en un archivo temporal
+          (en memoria hasta EXPORTAR_LOTE_MAX_MEMORIA y luego en disco) y
+          después se envía por partes desde ese archivo
+        
+        Returns:
+            Response: Archivo enviado por partes, 400 si la petición no es
+                      válida o 413 si se supera el límite de pares
+        """
+        datos = request.get_json(silent=True)
+        if not isinstance(datos, dict) or not isinstance(datos.get('pares'), list):
+            return jsonify({'error': 'Se esperaba un JSON con la lista "pares"'}), 400
+        
+        pares = datos['pares']
+        exigir_costera = GrafoController._opcion_booleana(datos, 'exigir_costera')
+        if exigir_costera is None:
+            return jsonify({'error': '"exigir_costera" debe ser true o false'}), 400
+        formato = datos.get('formato', 'zip')
+        if formato not in ('zip', 'pdf'):
+            return jsonify({'error': 'El formato debe ser "zip" o "pdf"'}), 400
+        
+        # Limitar el tamaño de la petición
+        max_pares = current_app.config.get('EXPORTAR_LOTE_MAX_PARES', 50)
+        if len(pares) > max_pares:
+            return jsonify({'error': f'El lote no puede tener más de {max_pares} pares'}), 413
+        
+        try:
+            errores, validos = GrafoController._validar_pares(pares)
+            if not validos:
+                return jsonify({'error': 'Ningún par es válido', 'errores': errores}), 400
+            _, calculados = calcular_rutas_lote(validos, exigir_costera)
+        except Exception as e:
+            print(f"Error calculando lote de rutas para exportar: {e}")
+            return jsonify({'error': 'Error calculando las rutas'}), 500
+        
+        # Separar las rutas encontradas de los pares sin ruta, en el orden recibido
+        rutas = []
+        mensajes_error = [f"{par.get('origen') if isinstance(par, dict) else par} → "
+                          f"{par.get('destino') if isinstance(par, dict) else ''}: {errores[i]}"
+                          for i, par in enumerate(pares) if i in errores]
+        for origen, destino in validos:
+            resultado = calculados[(origen, destino)]
+            if resultado.get('camino'):
+                rutas.append((origen, destino, resultado))
+            else:
+                mensajes_error.append(f"{origen} → {destino}: No existe una ruta")
+        
+        fecha = datetime.now().strftime('%Y%m%d_%H%M%S')
+        if formato == 'zip':
+            generador = GrafoController._transmitir_zip_rutas(rutas, mensajes_error, exigir_costera)
+            mimetype, filename = 'application/zip', f"rutas_{fecha}.zip"
+        else:
+            generador = GrafoController._transmitir_pdf_combinado(rutas, mensajes_error, exigir_costera)
+            mimetype, filename = 'application/pdf', f"rutas_{fecha}.pdf"
+        
+        return Response(
+            stream_with_context(generador),
+            mimetype=mimetype,
+            headers={'Content-Disposition': f'attachment; filename="{filename}"'}
+        )
+
+    @staticmethod
+    def _transmitir_zip_rutas(rutas, mensajes_error, exigir_costera):
+        """
+        Genera por partes un ZIP con un PDF por cada ruta.
+        
+        Args:
+            rutas (list): Tuplas (origen, destino, resultado) de las rutas encontradas
+            mensajes_error (list): Mensajes de los pares que no se pudieron exportar
+            exigir_costera (bool): Si las rutas deben pasar por una ciudad costera
             
-            # Calcular y mostrar estadísticas adicionales
-            paradas = len(resultado['camino']) - 1
-            story.append(Paragraph(f"<b>Número de paradas:</b> {paradas} conexiones", normal_style))
+        Yields:
+            bytes: Fragmentos consecutivos del archivo ZIP
+        """
+        salida = _SalidaPorPartes()
+        with zipfile.ZipFile(salida, 'w', compression=zipfile.ZIP_DEFLATED) as archivo_zip:
+            for numero, (origen, destino, resultado) in enumerate(rutas, start=1):
+                # Cada PDF pasa por la caché de reportes (mismo contenido que la exportación individual)
+                pdf = obtener_pdf_ruta(
+                    origen, destino, exigir_costera,
+                    lambda: GrafoController._construir_pdf_ruta(origen, destino, exigir_costera, resultado)
+                )
+                archivo_zip.writestr(f"{numero:03d}_ruta_{origen}_{destino}.pdf", pdf)
+                yield salida.retirar()
             
-            tiempo_estimado = resultado['costo'] * 2  # Estimación simple
-            story.append(Paragraph(f"<b>Tiempo estimado:</b> {tiempo_estimado:.1f} horas", normal_style))
+            if mensajes_error:
+                archivo_zip.writestr('errores.txt', '\n'.join(mensajes_error) + '\n')
+        
+        # Directorio central del ZIP, escrito al cerrar el archivo
+        yield salida.retirar()
+
+    @staticmethod
+    def _transmitir_pdf_combinado(rutas, mensajes_error, exigir_costera):
+        """
+        Genera un PDF con una sección por ruta y lo envía por partes.
+        
+        El documento no se transmite mientras se genera: se construye completo
+        en un archivo temporal (en memoria hasta EXPORTAR_LOTE_MAX_MEMORIA y
+        luego en disco) y el primer fragmento se envía cuando ya está terminado.
+        Así se acota la memoria usada, pero no el tiempo hasta el primer byte.
+        
+        Args:
+            rutas (list): Tuplas (origen, destino, resultado) de las rutas encontradas
+            mensajes_error (list): Mensajes de los pares que no se pudieron exportar
+            exigir_costera (bool): Si las rutas deben pasar por una ciudad costera
             
-            # Información sobre validación de ciudades costeras
-            if resultado.get('valido'):
-                story.append(Paragraph("--> <b>Esta ruta pasa por al menos una ciudad costera</b>", normal_style))
-            else:
-                story.append(Paragraph("--> <b>Esta ruta NO pasa por ciudades costeras</b>", normal_style))
-                
-            story.append(Spacer(1, 30))
-            
-            # Crear tabla con detalles paso a paso de la ruta
-            story.append(Paragraph("Detalles Paso a Paso", subtitle_style))
-            
-            # Preparar datos para la tabla
-            table_data = [['Paso', 'Desde', 'Hacia', 'Observaciones']]
-            
-            # Llenar la tabla con cada segmento de la ruta
-            for i in range(len(resultado['camino']) - 1):
-                paso = i + 1
-                desde = resultado['camino'][i]
-                hacia = resultado['camino'][i + 1]
-                obs = "Conexión directa"
-                table_data.append([str(paso), desde, hacia, obs])
-            
-            # Crear y estilizar la tabla
-            table = Table(table_data)
-            table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.grey),        # Fondo gris para encabezado
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),   # Texto blanco en encabezado
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),               # Centrar todo el texto
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),     # Fuente bold para encabezado
-                ('FONTSIZE', (0, 0), (-1, 0), 12),                   # Tamaño de fuente del encabezado
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),              # Padding inferior del encabezado
-                ('BACKGROUND', (0, 1), (-1, -1), colors.beige),      # Fondo beige para filas de datos
-                ('GRID', (0, 0), (-1, -1), 1, colors.black)          # Bordes negros
-            ]))
-            
-            story.append(table)
-            story.append(Spacer(1, 30))
-            
-            # Intentar agregar imagen del grafo con la ruta resaltada
-            try:
-                # Generar imagen del grafo con la ruta resaltada
-                img_buffer = grafo_a_imagen_camino(resultado['camino'])
-                img_buffer.seek(0)
-                
-                # Crear objeto Image para el PDF con dimensiones específicas
-                img = Image(img_buffer, width=400, height=300)
-                img.hAlign = 'CENTER'
-                
-                story.append(Paragraph("Visualización del Grafo", subtitle_style))
-                story.append(img)
-                story.append(Paragraph("Grafo con la ruta óptima resaltada", normal_style))
-                
-            except Exception as e:
-                print(f"Error agregando imagen al PDF: {e}")
-                story.append(Paragraph("Error: No se pudo generar la imagen del grafo", normal_style))
+        Yields:
+            bytes: Fragmentos consecutivos del documento PDF ya construido
+        """
+        max_memoria = current_app.config.get('EXPORTAR_LOTE_MAX_MEMORIA', 8 * 1024 * 1024)
+        sin_progreso = lambda progreso: None
+        
+        with tempfile.SpooledTemporaryFile(max_size=max_memoria) as temporal:
+            doc = SimpleDocTemplate(temporal, pagesize=A4)
+            estilos = GrafoController._estilos_pdf()
+            _, subtitle_style, normal_style = estilos
             
+            story = GrafoController._encabezado_pdf(estilos, f"Reporte de Rutas ({len(rutas)} rutas)")
             story.append(Spacer(1, 20))
+            for numero, (origen, destino, resultado) in enumerate(rutas, start=1):
+                story.append(Paragraph(f"Ruta {numero}: {origen} → {destino}", subtitle_style))
+                story += GrafoController._contenido_pdf_ruta(
+                    origen, destino, exigir_costera, resultado, estilos, sin_progreso
+                )
+                story.append(PageBreak())
             
-            # Agregar información adicional sobre el sistema
-            story.append(Paragraph("Información del Sistema", subtitle_style))
-            story.append(Paragraph("Este reporte fue generado por el Sistema de Análisis de Grafos y Rutas Óptimas. Realizado por: Joaquin Bermeo.", normal_style))
-            story.append(Paragraph("Algoritmo utilizado: Dijkstra para encontrar el camino más corto.", normal_style))
-            story.append(Paragraph("Los costos están expresados en unidades monetarias.", normal_style))
+            if mensajes_error:
+                story.append(Paragraph("Rutas no exportadas", subtitle_style))
+                story += [Paragraph(mensaje, normal_style) for mensaje in mensajes_error]
+                story.append(Spacer(1, 20))
+            story += GrafoController._pie_pdf(estilos)
             
-            # Construir el PDF con todos los elementos
             doc.build(story)
             
-            # Preparar la respuesta HTTP con el PDF
-            buffer.seek(0)
-            filename = f"ruta_{origen}_{destino}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
-            
-            return Response(
-                buffer.getvalue(),
-                mimetype='application/pdf',
-                headers={
-                    'Content-Disposition': f'attachment; filename="{filename}"',
-                    'Content-Type': 'application/pdf'
-                }
-            )
-            
-        except Exception as e:
-            print(f"Error generando PDF: {e}")
-            return Response(f"Error generando PDF: {str(e)}", status=500)
+            temporal.seek(0)
+            while True:
+                fragmento = temporal.read(_TAMANO_FRAGMENTO)
+                if not fragmento:
+                    break
+                yield fragmento
@@ -9,17 +9,23 @@ Funcionalidades principales:
 - Dashboard principal con estadísticas
 - Información del usuario actual
 - Datos del sistema y grafos
+- Datos del dashboard en caché de corta duración y en JSON (con ETag)
 - Coordinación entre diferentes módulos
 
 Autor: Joaquín Bermeo
 Fecha: Julio 2025
 """
 
-from flask import render_template
+from flask import render_template, current_app
 from flask_login import current_user
 from controllers.auth_controller import AuthController
 from controllers.grafo_controller import GrafoController
+from utils import cache_dashboard
+from utils.respuesta_http import respuesta_condicional
 from datetime import datetime
+import hashlib
+import json
+
 
 class HomeController:
     """
@@ -51,11 +57,10 @@ class HomeController:
             'activo': current_user.is_active
         }
         
-        # Obtener estadísticas de usuarios del sistema
-        stats_usuarios = AuthController.get_user_stats()
-        
-        # Obtener estadísticas del grafo y rutas
-        stats_grafos = GrafoController.get_estadisticas_grafo()
+        # Obtener estadísticas de usuarios y del grafo (datos consolidados en caché)
+        datos = HomeController.get_dashboard_data()
+        stats_usuarios = datos['usuarios']
+        stats_grafos = datos['grafos']
         
         # Información general del sistema
         sistema_info = {
@@ -73,17 +78,14 @@ class HomeController:
         )
     
     @staticmethod
-    def get_dashboard_data():
+    def _construir_datos_dashboard():
         """
-        Obtiene datos consolidados para el dashboard desde múltiples fuentes.
-        
-        Esta función centraliza la recopilación de datos para APIs o
-        actualizaciones dinámicas del dashboard.
+        Recopila los datos del dashboard y los serializa para la respuesta JSON.
         
         Returns:
-            dict: Diccionario con todas las estadísticas del sistema
+            tuple: (datos, cuerpo JSON en bytes, ETag calculado sobre las estadísticas)
         """
-        return {
+        datos = {
             'usuarios': AuthController.get_user_stats(),    # Estadísticas de usuarios
             'grafos': GrafoController.get_estadisticas_grafo(),  # Estadísticas del grafo
             'sistema': {
@@ -92,3 +94,59 @@ class HomeController:
                 'ultima_actualizacion': datetime.now().strftime('%d/%m/%Y %H:%M')
             }
         }
+        
+        # El ETag depende solo de las estadísticas, no de la hora de construcción
+        estadisticas = json.dumps([datos['usuarios'], datos['grafos']], sort_keys=True, default=str)
+        etag = 'dashboard-' + hashlib.sha1(estadisticas.encode('utf-8')).hexdigest()[:16]
+        cuerpo = json.dumps(datos, ensure_ascii=False, default=str).encode('utf-8')
+        return datos, cuerpo, etag
+    
+    @staticmethod
+    def _datos_dashboard_en_cache():
+        """
+        Obtiene los datos del dashboard desde la caché de corta duración.
+        
+        Si las estadísticas del grafo no pudieron obtenerse (error de base de
+        datos) los datos se retornan pero no se guardan, para no mostrar el
+        error durante todo el TTL.
+        
+        Returns:
+            tuple: (datos, cuerpo JSON en bytes, ETag)
+        """
+        return cache_dashboard.obtener_datos_dashboard(
+            HomeController._construir_datos_dashboard,
+            conservar=lambda entrada: 'error' not in entrada[0]['grafos']
+        )
+    
+    @staticmethod
+    def get_dashboard_data():
+        """
+        Obtiene datos consolidados para el dashboard desde múltiples fuentes.
+        
+        Esta función centraliza la recopilación de datos para APIs o
+        actualizaciones dinámicas del dashboard. Los datos se guardan en una
+        caché de corta duración (DASHBOARD_CACHE_TTL segundos).
+        
+        Returns:
+            dict: Diccionario con todas las estadísticas del sistema
+        """
+        datos, _, _ = HomeController._datos_dashboard_en_cache()
+        return datos
+    
+    @staticmethod
+    def obtener_datos_dashboard():
+        """
+        Retorna los datos consolidados del dashboard en formato JSON.
+        
+        Responde con ETag: si el cliente envía If-None-Match con el valor
+        vigente se responde 304 sin cuerpo, lo que permite refrescar los
+        indicadores del dashboard periódicamente sin transferir datos.
+        
+        Returns:
+            Response: JSON con los datos del dashboard o 304 si no cambiaron
+        """
+        _, cuerpo, etag = HomeController._datos_dashboard_en_cache()
+        return respuesta_condicional(
+            etag, lambda: cuerpo, 'application/json',
+            current_app.config.get('CACHE_CONTROL_DASHBOARD', 'private, no-cache')
+        )
@@ -11,7 +11,14 @@ Rutas incluidas:
 - /grafos/camino: Ruta predefinida de ejemplo
 - /grafos/grafo_imagen: Imagen del grafo completo
 - /grafos/grafo_imagen_camino: Imagen con camino resaltado
+- /grafos/grafo.json: Red completa en JSON para la vista SVG
 - /grafos/exportar_pdf: Exportación de rutas a PDF
+- /grafos/exportar_pdf/trabajos: Exportación asíncrona a PDF (crear, consultar, descargar)
+- /grafos/exportar_pdf/lote: Exportación masiva de rutas (PDF combinado o ZIP)
+- /grafos/estadisticas_cache: Estado de las cachés de rutas (JSON)
+- /grafos/analitica: Analítica de la red y progreso de su cálculo (JSON)
+- /grafos/rutas_lote: Cálculo de rutas por lotes (API JSON)
+- /grafos/matriz: Matriz de costos entre conjuntos de ciudades (API)
 
 Autor: Joaquín Bermeo
 Fecha: Julio 2025
@@ -45,7 +52,9 @@ def calcular_camino():
     Calculadora de rutas óptimas entre ciudades.
     
     GET: Muestra formulario de selección de ciudades
-    POST: Procesa el cálculo de ruta usando Dijkstra
+    POST: Procesa el cálculo de ruta usando Dijkstra. Con el campo
+          'exigir_costera' calcula la ruta más económica que pasa
+          por al menos una ciudad costera.
     
     Returns:
         Response: Formulario o resultados del cálculo de ruta
@@ -73,7 +82,8 @@ def grafo_imagen():
     Genera y retorna imagen del grafo completo del sistema.
     
     Crea una visualización de todas las ciudades y sus conexiones
-    usando NetworkX y Matplotlib.
+    usando NetworkX y Matplotlib. Acepta los parámetros vista=provincias
+    (vista agregada) y provincia=<nombre> (detalle de una provincia).
     
     Returns:
         Response: Imagen PNG del grafo completo
@@ -87,13 +97,28 @@ def grafo_imagen_camino():
     Genera imagen del grafo con un camino específico resaltado.
     
     Recibe parámetros de URL con las ciudades del camino
-    y las resalta sobre el grafo completo.
+    y las resalta sobre el grafo completo, o sobre el subgrafo
+    local del camino con vista=local.
     
     Returns:
         Response: Imagen PNG del grafo con camino resaltado
     """
     return GrafoController.generar_imagen_camino()
 
+@starter_bp.route('/grafo.json')
+@login_required
+def grafo_json():
+    """
+    Retorna la red (ciudades, posiciones y rutas) en JSON compacto.
+    
+    Es usada por la vista SVG del navegador, que resalta los caminos
+    sin pedir imágenes al servidor.
+    
+    Returns:
+        Response: JSON de la red versionado con ETag
+    """
+    return GrafoController.obtener_grafo_json()
+
 @starter_bp.route('/exportar_pdf')
 @login_required
 def exportar_pdf():
@@ -101,9 +126,114 @@ def exportar_pdf():
     Exporta los detalles de una ruta calculada a PDF.
     
     Genera un documento PDF completo con información de la ruta,
-    estadísticas, tabla paso a paso e imagen del grafo.
+    estadísticas, tabla paso a paso y diagrama vectorial del grafo.
+    Acepta el parámetro costera=1 para exigir paso por la costa.
     
     Returns:
         Response: Archivo PDF para descarga
     """
     return GrafoController.exportar_ruta_pdf()
+
+@starter_bp.route('/exportar_pdf/lote', methods=['POST'])
+@login_required
+def exportar_lote_pdf():
+    """
+    Exporta muchas rutas en un PDF combinado o en un ZIP de PDFs.
+    
+    El ZIP se envía por partes a medida que se genera; el PDF combinado se
+    construye completo en un archivo temporal y luego se envía por partes.
+    
+    Returns:
+        Response: Archivo PDF o ZIP enviado por partes
+    """
+    return GrafoController.exportar_lote_pdf()
+
+@starter_bp.route('/exportar_pdf/trabajos', methods=['POST'])
+@login_required
+def crear_trabajo_pdf():
+    """
+    Encola la exportación de una ruta a PDF en segundo plano.
+    
+    Returns:
+        Response: JSON con el identificador y el estado del trabajo
+    """
+    return GrafoController.crear_trabajo_pdf()
+
+@starter_bp.route('/exportar_pdf/trabajos/<trabajo_id>')
+@login_required
+def estado_trabajo_pdf(trabajo_id):
+    """
+    Consulta el estado y el progreso de un trabajo de exportación.
+    
+    Returns:
+        Response: JSON con el estado del trabajo
+    """
+    return GrafoController.consultar_trabajo_pdf(trabajo_id)
+
+@starter_bp.route('/exportar_pdf/trabajos/<trabajo_id>/descarga')
+@login_required
+def descargar_trabajo_pdf(trabajo_id):
+    """
+    Descarga el PDF de un trabajo de exportación terminado.
+    
+    Returns:
+        Response: Archivo PDF generado
+    """
+    return GrafoController.descargar_trabajo_pdf(trabajo_id)
+
+@starter_bp.route('/rutas_lote', methods=['POST'])
+@login_required
+def rutas_lote():
+    """
+    API JSON para calcular muchas rutas origen/destino en una sola petición.
+    
+    Agrupa los pares por ciudad de origen y ejecuta una sola búsqueda
+    por origen sobre la misma instantánea de la red.
+    
+    Returns:
+        Response: JSON con el resultado o error de cada par
+    """
+    return GrafoController.calcular_rutas_lote()
+
+@starter_bp.route('/matriz', methods=['POST'])
+@login_required
+def matriz():
+    """
+    API para calcular la matriz de costos entre dos conjuntos de ciudades.
+    
+    Los conjuntos se definen por nombres, provincia o condición de
+    ciudad costera, y la respuesta puede ser JSON o binario NumPy.
+    
+    Returns:
+        Response: Matriz de costos origen × destino
+    """
+    return GrafoController.calcular_matriz()
+
+@starter_bp.route('/estadisticas_cache')
+@login_required
+def estadisticas_cache():
+    """
+    Retorna el estado de las cachés del cálculo de rutas.
+    
+    Incluye la versión de la red, si la matriz precalculada está disponible
+    y las entradas y tasa de aciertos de la caché de árboles de rutas.
+    
+    Returns:
+        Response: JSON con las estadísticas de las cachés
+    """
+    return GrafoController.obtener_estadisticas_cache()
+
+@starter_bp.route('/analitica')
+@login_required
+def analitica_red():
+    """
+    Retorna la analítica de la red calculada en segundo plano.
+    
+    Incluye el costo promedio entre todos los pares, el diámetro, el radio,
+    la excentricidad de cada ciudad y las ciudades más centrales, o el
+    progreso del cálculo si aún no termina.
+    
+    Returns:
+        Response: JSON con la analítica de la red
+    """
+    return GrafoController.obtener_analitica_red()
@@ -8,6 +8,7 @@ incluyendo la página de inicio y el dashboard principal.
 Rutas incluidas:
 - /: Página de entrada (redirige según autenticación)
 - /home: Dashboard principal para usuarios autenticados
+- /home/datos: Datos del dashboard en JSON (con ETag)
 
 Autor: Joaquín Bermeo
 Fecha: Julio 2025
@@ -50,4 +51,18 @@ def home():
     Returns:
         Response: Página de dashboard con estadísticas completas
     """
-    return HomeController.mostrar_bienvenida()
\ No newline at end of file
+    return HomeController.mostrar_bienvenida()
+
+@home_bp.route('/home/datos')
+@login_required
+def datos_dashboard():
+    """
+    Datos consolidados del dashboard en formato JSON.
+    
+    Permite refrescar los indicadores del dashboard sin renderizar la
+    página completa; responde 304 si los datos no cambiaron.
+    
+    Returns:
+        Response: JSON con estadísticas de usuarios, grafos y sistema
+    """
+    return HomeController.obtener_datos_dashboard()
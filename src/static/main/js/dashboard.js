@@ -0,0 +1,55 @@
+/**
+ * Actualización periódica de los indicadores del dashboard
+ *
+ * Consulta /home/datos (JSON validado con ETag) y actualiza los elementos
+ * marcados con data-panel="seccion.campo" sin volver a renderizar la página.
+ * Si los datos no cambiaron el servidor responde 304 y el navegador reutiliza
+ * la copia que ya tiene.
+ */
+
+// Intervalo de actualización de los indicadores (milisegundos)
+const INTERVALO_DASHBOARD = 30000;
+
+/**
+ * Obtiene un valor anidado a partir de una ruta "seccion.campo".
+ */
+function valorPanel(datos, ruta) {
+    return ruta.split('.').reduce((objeto, clave) => (objeto == null ? undefined : objeto[clave]), datos);
+}
+
+/**
+ * Descarga los datos del dashboard y actualiza los indicadores.
+ * @param {HTMLElement} contenedor - Elemento con data-url-datos
+ */
+function actualizarDashboard(contenedor) {
+    fetch(contenedor.dataset.urlDatos, { credentials: 'same-origin', cache: 'no-cache' })
+        .then(response => {
+            if (!response.ok) {
+                throw new Error(`Error ${response.status} obteniendo los datos del dashboard`);
+            }
+            return response.json();
+        })
+        .then(datos => {
+            // La sección de analítica cambia de estructura: se recarga la página al terminar su cálculo
+            const estadoAnalitica = valorPanel(datos, 'grafos.analitica_estado');
+            if (contenedor.dataset.analiticaEstado && estadoAnalitica !== contenedor.dataset.analiticaEstado) {
+                window.location.reload();
+                return;
+            }
+
+            contenedor.querySelectorAll('[data-panel]').forEach(elemento => {
+                const valor = valorPanel(datos, elemento.dataset.panel);
+                if (valor !== undefined) {
+                    elemento.textContent = (elemento.dataset.prefijo || '') + valor;
+                }
+            });
+        })
+        .catch(error => console.error(error));
+}
+
+document.addEventListener('DOMContentLoaded', function() {
+    const contenedor = document.querySelector('[data-url-datos]');
+    if (contenedor) {
+        setInterval(() => actualizarDashboard(contenedor), INTERVALO_DASHBOARD);
+    }
+});
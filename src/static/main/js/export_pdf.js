@@ -49,8 +49,55 @@ document.addEventListener('DOMContentLoaded', function() {
     });
 });
 
+// Intervalo de consulta del estado de los trabajos de exportación (milisegundos)
+const INTERVALO_CONSULTA_PDF = 1000;
+
+/**
+ * Descarga un archivo a partir de su URL mediante un enlace temporal.
+ */
+function descargarArchivo(url) {
+    const link = document.createElement('a');
+    link.href = url;
+    link.style.display = 'none';
+    
+    document.body.appendChild(link);
+    link.click();
+    document.body.removeChild(link);
+}
+
+/**
+ * Consulta periódicamente el estado de un trabajo de exportación hasta que termine.
+ * @param {string} urlEstado - URL de estado del trabajo
+ * @param {function(number)} alProgresar - Callback con el progreso (0-100)
+ * @returns {Promise<object>} Estado final del trabajo completado
+ */
+function esperarTrabajoPDF(urlEstado, alProgresar) {
+    return new Promise((resolve, reject) => {
+        function consultar() {
+            fetch(urlEstado, { credentials: 'same-origin' })
+                .then(response => response.json().then(estado => ({ ok: response.ok, estado })))
+                .then(({ ok, estado }) => {
+                    if (!ok || estado.estado === 'fallido') {
+                        reject(new Error(estado.error || 'No se pudo generar el PDF'));
+                    } else if (estado.estado === 'completado') {
+                        resolve(estado);
+                    } else {
+                        alProgresar(estado.progreso);
+                        setTimeout(consultar, INTERVALO_CONSULTA_PDF);
+                    }
+                })
+                .catch(reject);
+        }
+        consultar();
+    });
+}
+
 // Función global para exportar PDF (para uso desde HTML inline)
-function exportarPDF(origen, destino, btnElement) {
+// exigirCostera: true para exportar la ruta que pasa obligatoriamente por la costa
+// tokenResultado: token del resultado ya calculado (evita recalcular la ruta)
+// La exportación se encola como trabajo en segundo plano; el botón muestra el
+// progreso y el archivo se descarga al terminar, sin bloquear al servidor.
+function exportarPDF(origen, destino, btnElement, exigirCostera, tokenResultado) {
     if (!origen || !destino) {
         alert('Error: Faltan datos de origen y destino');
         return;
@@ -61,22 +108,38 @@ function exportarPDF(origen, destino, btnElement) {
     btnElement.innerHTML = '<i class="fas fa-spinner fa-spin"></i> Generando PDF...';
     btnElement.disabled = true;
     
-    // Construir la URL para la exportación
-    const url = `/grafos/exportar_pdf?origen=${encodeURIComponent(origen)}&destino=${encodeURIComponent(destino)}`;
-    
-    // Crear enlace temporal para descargar
-    const link = document.createElement('a');
-    link.href = url;
-    link.target = '_blank';
-    link.style.display = 'none';
-    
-    document.body.appendChild(link);
-    link.click();
-    document.body.removeChild(link);
-    
-    // Restaurar el botón
-    setTimeout(() => {
+    function restaurarBoton() {
         btnElement.innerHTML = originalContent;
         btnElement.disabled = false;
-    }, 2000);
+    }
+    
+    const datos = new FormData();
+    datos.append('origen', origen);
+    datos.append('destino', destino);
+    if (exigirCostera) {
+        datos.append('costera', '1');
+    }
+    if (tokenResultado) {
+        datos.append('resultado', tokenResultado);
+    }
+    
+    fetch('/grafos/exportar_pdf/trabajos', { method: 'POST', body: datos, credentials: 'same-origin' })
+        .then(response => response.json().then(trabajo => ({ ok: response.ok, trabajo })))
+        .then(({ ok, trabajo }) => {
+            if (!ok) {
+                throw new Error(trabajo.error || 'No se pudo iniciar la exportación');
+            }
+            return esperarTrabajoPDF(trabajo.url_estado, progreso => {
+                btnElement.innerHTML = `<i class="fas fa-spinner fa-spin"></i> Generando PDF... ${progreso}%`;
+            });
+        })
+        .then(trabajo => {
+            descargarArchivo(trabajo.url_descarga);
+            restaurarBoton();
+        })
+        .catch(error => {
+            console.error(error);
+            alert(`Error: ${error.message}`);
+            restaurarBoton();
+        });
 }
@@ -0,0 +1,189 @@
+/**
+ * Vista SVG del grafo dibujada en el navegador
+ *
+ * Descarga una sola vez la red en JSON (/grafos/grafo.json, validada con ETag)
+ * y la dibuja como SVG. Resaltar el camino calculado no requiere ningún
+ * trabajo del servidor. La imagen PNG se mantiene como vista por defecto.
+ */
+
+// Promesa compartida con la red descargada (una sola petición por página)
+let redGrafoPromesa = null;
+
+// Dimensiones del lienzo SVG (misma proporción que la imagen PNG del servidor)
+const SVG_ANCHO = 1200;
+const SVG_ALTO = 800;
+const SVG_MARGEN = 60;
+const SVG_NS = 'http://www.w3.org/2000/svg';
+
+/**
+ * Obtiene la red desde el servidor y la convierte a objetos.
+ * @param {string} url - URL del endpoint grafo.json
+ * @returns {Promise<{ciudades: Array, rutas: Array}>}
+ */
+function obtenerRedGrafo(url) {
+    if (!redGrafoPromesa) {
+        redGrafoPromesa = fetch(url, { credentials: 'same-origin' })
+            .then(response => {
+                if (!response.ok) {
+                    throw new Error(`Error ${response.status} obteniendo la red`);
+                }
+                return response.json();
+            })
+            .then(datos => ({
+                ciudades: filasAObjetos(datos.ciudades),
+                rutas: filasAObjetos(datos.rutas)
+            }))
+            .catch(error => {
+                redGrafoPromesa = null;  // Permitir reintentar
+                throw error;
+            });
+    }
+    return redGrafoPromesa;
+}
+
+/**
+ * Convierte una tabla compacta {campos, filas} en una lista de objetos.
+ */
+function filasAObjetos(tabla) {
+    return tabla.filas.map(fila => {
+        const objeto = {};
+        tabla.campos.forEach((campo, i) => { objeto[campo] = fila[i]; });
+        return objeto;
+    });
+}
+
+/**
+ * Crea un elemento SVG con sus atributos.
+ */
+function crearElementoSVG(etiqueta, atributos) {
+    const elemento = document.createElementNS(SVG_NS, etiqueta);
+    Object.entries(atributos || {}).forEach(([nombre, valor]) => elemento.setAttribute(nombre, valor));
+    return elemento;
+}
+
+/**
+ * Dibuja la red como SVG resaltando el camino indicado.
+ * @param {{ciudades: Array, rutas: Array}} red - Red descargada
+ * @param {Array<string>} camino - Nombres de las ciudades del camino
+ * @returns {SVGElement}
+ */
+function dibujarRedSVG(red, camino) {
+    const ciudades = red.ciudades.filter(c => c.x !== null && c.y !== null);
+    const porId = new Map(ciudades.map(c => [c.id, c]));
+
+    // Escalar las posiciones al lienzo (el eje y del servidor crece hacia arriba)
+    const xs = ciudades.map(c => c.x);
+    const ys = ciudades.map(c => c.y);
+    const minX = Math.min(...xs), maxX = Math.max(...xs);
+    const minY = Math.min(...ys), maxY = Math.max(...ys);
+    const escalaX = (SVG_ANCHO - 2 * SVG_MARGEN) / ((maxX - minX) || 1);
+    const escalaY = (SVG_ALTO - 2 * SVG_MARGEN) / ((maxY - minY) || 1);
+    const px = c => SVG_MARGEN + (c.x - minX) * escalaX;
+    const py = c => SVG_ALTO - SVG_MARGEN - (c.y - minY) * escalaY;
+
+    // Aristas y ciudades del camino (en ambas direcciones: el grafo es no dirigido)
+    const enCamino = new Set(camino);
+    const aristasCamino = new Set();
+    for (let i = 0; i < camino.length - 1; i++) {
+        aristasCamino.add(`${camino[i]}|${camino[i + 1]}`);
+        aristasCamino.add(`${camino[i + 1]}|${camino[i]}`);
+    }
+
+    const svg = crearElementoSVG('svg', {
+        viewBox: `0 0 ${SVG_ANCHO} ${SVG_ALTO}`,
+        width: '100%',
+        role: 'img',
+        'aria-label': 'Grafo de ciudades'
+    });
+    const capaAristas = crearElementoSVG('g');
+    const capaResaltado = crearElementoSVG('g');
+    const capaCostos = crearElementoSVG('g', { 'font-size': 12, 'text-anchor': 'middle' });
+    const capaNodos = crearElementoSVG('g', { 'font-size': 13, 'font-weight': 'bold', 'text-anchor': 'middle' });
+
+    red.rutas.forEach(ruta => {
+        const origen = porId.get(ruta.origen_id);
+        const destino = porId.get(ruta.destino_id);
+        if (!origen || !destino) {
+            return;
+        }
+        const resaltada = aristasCamino.has(`${origen.nombre}|${destino.nombre}`);
+        const linea = crearElementoSVG('line', {
+            x1: px(origen), y1: py(origen), x2: px(destino), y2: py(destino),
+            stroke: resaltada ? 'red' : 'black',
+            'stroke-width': resaltada ? 4 : 1
+        });
+        (resaltada ? capaResaltado : capaAristas).appendChild(linea);
+
+        const costo = crearElementoSVG('text', {
+            x: (px(origen) + px(destino)) / 2,
+            y: (py(origen) + py(destino)) / 2 + 4,
+            fill: 'black', stroke: 'white', 'stroke-width': 4, 'paint-order': 'stroke'
+        });
+        costo.textContent = ruta.costo;
+        capaCostos.appendChild(costo);
+    });
+
+    ciudades.forEach(ciudad => {
+        const resaltada = enCamino.has(ciudad.nombre);
+        const grupo = crearElementoSVG('g');
+        const titulo = crearElementoSVG('title');
+        titulo.textContent = `${ciudad.nombre} (${ciudad.provincia})${ciudad.es_costera ? ' - Costera' : ''}`;
+        grupo.appendChild(titulo);
+        grupo.appendChild(crearElementoSVG('circle', {
+            cx: px(ciudad), cy: py(ciudad), r: resaltada ? 27 : 26,
+            fill: resaltada ? 'orange' : 'lightblue'
+        }));
+        const nombre = crearElementoSVG('text', { x: px(ciudad), y: py(ciudad) + 5 });
+        nombre.textContent = ciudad.nombre;
+        grupo.appendChild(nombre);
+        capaNodos.appendChild(grupo);
+    });
+
+    [capaAristas, capaResaltado, capaCostos, capaNodos].forEach(capa => svg.appendChild(capa));
+    return svg;
+}
+
+/**
+ * Cambia un contenedor .grafo-vista entre la imagen PNG y la vista SVG.
+ */
+function mostrarVistaGrafo(contenedor, vista) {
+    const imagen = contenedor.querySelector('.grafo-png');
+    const lienzo = contenedor.querySelector('.grafo-svg');
+
+    contenedor.querySelectorAll('[data-vista]').forEach(boton => {
+        boton.classList.toggle('active', boton.dataset.vista === vista);
+    });
+
+    if (vista === 'png') {
+        lienzo.classList.add('d-none');
+        imagen.classList.remove('d-none');
+        return;
+    }
+
+    // El SVG se dibuja solo la primera vez que se solicita
+    if (!lienzo.dataset.dibujado) {
+        lienzo.innerHTML = '<p class="text-muted p-3"><i class="fas fa-spinner fa-spin"></i> Cargando red...</p>';
+        const camino = JSON.parse(contenedor.dataset.camino || '[]');
+        obtenerRedGrafo(contenedor.dataset.urlRed)
+            .then(red => {
+                lienzo.innerHTML = '';
+                lienzo.appendChild(dibujarRedSVG(red, camino));
+                lienzo.dataset.dibujado = '1';
+            })
+            .catch(error => {
+                console.error(error);
+                lienzo.innerHTML = '<p class="text-danger p-3">No se pudo cargar la vista interactiva</p>';
+            });
+    }
+
+    imagen.classList.add('d-none');
+    lienzo.classList.remove('d-none');
+}
+
+document.addEventListener('DOMContentLoaded', function() {
+    document.querySelectorAll('.grafo-vista').forEach(contenedor => {
+        contenedor.querySelectorAll('[data-vista]').forEach(boton => {
+            boton.addEventListener('click', () => mostrarVistaGrafo(contenedor, boton.dataset.vista));
+        });
+    });
+});
@@ -0,0 +1,394 @@
+"""
+Analítica de la Red de Rutas
+===========================
+
+Este módulo calcula métricas globales de la red a partir de las búsquedas
+de caminos más cortos desde cada ciudad:
+
+- Costo promedio de todos los pares de ciudades conectadas
+- Excentricidad de cada ciudad (costo a la ciudad alcanzable más lejana)
+- Diámetro y radio de la red (máxima y mínima excentricidad)
+- Centralidad de intermediación (betweenness) de cada ciudad, con el
+  algoritmo de Brandes para grafos ponderados
+
+Las búsquedas por ciudad de origen son independientes, por lo que se
+reparten en bloques entre un grupo de procesos (ProcessPoolExecutor con
+'spawn'); cada proceso recibe solo los arreglos CSR de la red. El pool se
+crea la primera vez y se reutiliza en los cálculos siguientes, de modo que
+los procesos no se vuelven a lanzar cada vez que cambia la red.
+
+El cálculo se ejecuta en un hilo en segundo plano y el resultado se publica
+como una instantánea asociada a la versión de la red. Si la red cambia
+mientras se calcula, las solicitudes se agrupan: el cálculo en curso se
+cancela y se ejecuta una sola vez más con la versión más reciente.
+
+IMPORTANTE: La instantánea se guarda en memoria del proceso web, igual que
+la versión de la red.
+
+Autor: Joaquín Bermeo
+Fecha: Julio 2025
+"""
+
+import time
+import heapq
+import atexit
+import threading
+import multiprocessing
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+import numpy as np
+
+# Métricas calculadas para una versión de la red:
+# versión, fecha de cálculo (epoch), número de ciudades, costo promedio,
+# diámetro, par (origen, destino) que lo alcanza, radio,
+# {ciudad: excentricidad} y {ciudad: intermediación normalizada}
+AnaliticaRed = namedtuple(
+    'AnaliticaRed',
+    'version calculada ciudades costo_promedio diametro extremos_diametro radio excentricidad intermediacion'
+)
+
+# Número de bloques de orígenes por proceso (más bloques dan un progreso más fino)
+_BLOQUES_POR_PROCESO = 4
+
+# Instantánea publicada (se reemplaza completa en una sola asignación)
+_analitica_actual = None
+
+# Estado del cálculo en segundo plano
+_en_curso = False
+_pendiente = False
+_version_objetivo = None
+_version_en_calculo = None
+_progreso = 0
+_candado = threading.Lock()
+
+# Pool de procesos de larga duración (solo lo usa el hilo de cálculo)
+_pool = None
+
+
+class _CalculoCancelado(Exception):
+    """Indica que el cálculo se abandonó porque la red cambió."""
+
+
+def _analizar_origenes(offsets, destinos, pesos, origenes):
+    """
+    Ejecuta las búsquedas de un bloque de orígenes (se ejecuta en un proceso trabajador).
+
+    Para cada origen recorre la red con Dijkstra contando los caminos más
+    cortos (sigma) y acumula las dependencias de Brandes en orden inverso.
+
+    Args:
+        offsets (np.ndarray): Inicio de los vecinos de cada nodo (CSR)
+        destinos (np.ndarray): Nodo vecino de cada arista (CSR)
+        pesos (np.ndarray): Costo de cada arista (CSR)
+        origenes (list): Índices de los nodos de origen del bloque
+
+    Returns:
+        tuple: (suma de costos, número de pares conectados,
+                {origen: (excentricidad, nodo más lejano)}, intermediación parcial)
+    """
+    offsets = offsets.tolist()
+    destinos = destinos.tolist()
+    pesos = pesos.tolist()
+    n = len(offsets) - 1
+
+    suma = 0.0
+    pares = 0
+    excentricidades = {}
+    intermediacion = [0.0] * n
+
+    for s in origenes:
+        # Dijkstra con conteo de caminos más cortos
+        orden = []
+        predecesores = {s: []}
+        sigma = dict.fromkeys(range(n), 0.0)
+        sigma[s] = 1.0
+        fijados = {}
+        vistos = {s: 0.0}
+        contador = 0
+        cola = [(0.0, contador, s, s)]
+        while cola:
+            distancia, _, previo, v = heapq.heappop(cola)
+            if v in fijados:
+                continue
+            sigma[v] += sigma[previo]
+            orden.append(v)
+            fijados[v] = distancia
+            for k in range(offsets[v], offsets[v + 1]):
+                w = destinos[k]
+                nueva = distancia + pesos[k]
+                if w not in fijados and (w not in vistos or nueva < vistos[w]):
+                    contador += 1
+                    vistos[w] = nueva
+                    heapq.heappush(cola, (nueva, contador, v, w))
+                    sigma[w] = 0.0
+                    predecesores[w] = [v]
+                elif nueva == vistos.get(w):
+                    sigma[w] += sigma[v]
+                    predecesores[w].append(v)
+
+        # Costos y excentricidad desde este origen
+        suma += sum(fijados.values())
+        pares += len(fijados) - 1
+        lejano = max(fijados, key=fijados.get)
+        excentricidades[s] = (fijados[lejano], lejano)
+
+        # Acumulación de dependencias (Brandes) en orden inverso de distancia
+        delta = dict.fromkeys(orden, 0.0)
+        for w in reversed(orden):
+            coeficiente = (1.0 + delta[w]) / sigma[w]
+            for v in predecesores[w]:
+                delta[v] += sigma[v] * coeficiente
+            if w != s:
+                intermediacion[w] += delta[w]
+
+    return suma, pares, excentricidades, np.array(intermediacion)
+
+
+def _obtener_pool(procesos):
+    """
+    Obtiene el pool de procesos, creándolo la primera vez.
+
+    Args:
+        procesos (int): Número de procesos trabajadores
+
+    Returns:
+        ProcessPoolExecutor: Pool de procesos del cálculo
+    """
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(
+            max_workers=procesos, mp_context=multiprocessing.get_context('spawn')
+        )
+    return _pool
+
+
+def calcular(grafo, version, procesos=0, reportar_progreso=None, cancelado=None):
+    """
+    Calcula las métricas de la red repartiendo los orígenes entre procesos.
+
+    Args:
+        grafo (GrafoCSR): Grafo compacto de la red
+        version (int): Versión de la red correspondiente al grafo
+        procesos (int): Número de procesos trabajadores (0 calcula en este hilo)
+        reportar_progreso (callable, optional): Función que recibe el avance (0-100)
+        cancelado (callable, optional): Función que retorna True si hay que abandonar
+
+    Returns:
+        AnaliticaRed: Métricas calculadas
+
+    Raises:
+        _CalculoCancelado: Si cancelado() retorna True durante el cálculo
+    """
+    global _pool
+
+    reportar_progreso = reportar_progreso or (lambda progreso: None)
+    cancelado = cancelado or (lambda: False)
+
+    # Las rutas duplicadas se reducen a la de menor costo, igual que en la matriz de rutas
+    matriz = grafo.matriz_dispersa()
+    offsets, destinos, pesos = matriz.indptr, matriz.indices, matriz.data
+    n = grafo.numero_nodos
+
+    bloques = [list(map(int, bloque)) for bloque in
+               np.array_split(np.arange(n), max(1, procesos) * _BLOQUES_POR_PROCESO) if len(bloque)]
+
+    suma = 0.0
+    pares = 0
+    excentricidades = {}
+    intermediacion = np.zeros(n)
+
+    def acumular(parcial, terminados):
+        nonlocal suma, pares, intermediacion
+        suma += parcial[0]
+        pares += parcial[1]
+        excentricidades.update(parcial[2])
+        intermediacion = intermediacion + parcial[3]
+        reportar_progreso(100 * terminados // len(bloques))
+
+    if procesos > 0:
+        pool = _obtener_pool(procesos)
+        try:
+            futuros = [pool.submit(_analizar_origenes, offsets, destinos, pesos, bloque)
+                       for bloque in bloques]
+            for terminados, futuro in enumerate(as_completed(futuros), start=1):
+                if cancelado():
+                    # Los bloques que ya empezaron terminan en el pool y se descartan
+                    for pendiente in futuros:
+                        pendiente.cancel()
+                    raise _CalculoCancelado()
+                acumular(futuro.result(), terminados)
+        except BrokenProcessPool:
+            # Un trabajador terminó de forma anormal: el siguiente cálculo crea un pool nuevo
+            _pool = None
+            pool.shutdown(wait=False)
+            raise
+    else:
+        for terminados, bloque in enumerate(bloques, start=1):
+            if cancelado():
+                raise _CalculoCancelado()
+            acumular(_analizar_origenes(offsets, destinos, pesos, bloque), terminados)
+
+    # Grafo no dirigido: cada par se cuenta desde sus dos extremos, lo que se
+    # compensa con la normalización 1 / ((n - 1)(n - 2)) (misma que NetworkX)
+    if n > 2:
+        intermediacion = intermediacion / ((n - 1) * (n - 2))
+
+    diametro = radio = None
+    extremos = None
+    if excentricidades:
+        origen_diametro = max(excentricidades, key=lambda i: excentricidades[i][0])
+        diametro, destino_diametro = excentricidades[origen_diametro]
+        extremos = (grafo.nombres[origen_diametro], grafo.nombres[destino_diametro])
+        radio = min(valor for valor, _ in excentricidades.values())
+
+    return AnaliticaRed(
+        version=version,
+        calculada=time.time(),
+        ciudades=n,
+        costo_promedio=suma / pares if pares else None,
+        diametro=diametro,
+        extremos_diametro=extremos,
+        radio=radio,
+        excentricidad={grafo.nombres[i]: valor for i, (valor, _) in excentricidades.items()},
+        intermediacion={grafo.nombres[i]: float(valor) for i, valor in enumerate(intermediacion)}
+    )
+
+
+def ciudades_centrales(analitica, cantidad):
+    """
+    Obtiene las ciudades con mayor centralidad de intermediación.
+
+    Args:
+        analitica (AnaliticaRed): Métricas de la red
+        cantidad (int): Número de ciudades a retornar
+
+    Returns:
+        list: Tuplas (nombre, intermediación) ordenadas de mayor a menor
+    """
+    return sorted(analitica.intermediacion.items(), key=lambda item: (-item[1], item[0]))[:cantidad]
+
+
+def obtener_analitica(version):
+    """
+    Obtiene la instantánea publicada si corresponde a la versión indicada.
+
+    Args:
+        version (int): Versión actual de la red
+
+    Returns:
+        AnaliticaRed: Métricas vigentes o None si aún no están disponibles
+    """
+    analitica = _analitica_actual
+    if analitica is not None and analitica.version == version:
+        return analitica
+    return None
+
+
+def estado():
+    """
+    Obtiene el estado del cálculo en segundo plano.
+
+    Returns:
+        dict: Si hay un cálculo en curso, su versión y progreso (0-100), y la
+              versión de la última instantánea publicada
+    """
+    with _candado:
+        return {
+            'calculando': _en_curso,
+            'version_en_calculo': _version_en_calculo,
+            'progreso': _progreso,
+            'version_disponible': _analitica_actual.version if _analitica_actual is not None else None
+        }
+
+
+def programar_analisis(app, version, obtener_red, procesos):
+    """
+    Lanza el cálculo de las métricas en un hilo en segundo plano.
+
+    Si ya hay un cálculo en curso para la misma versión no se hace nada. Si
+    la versión solicitada es más reciente, la solicitud se agrupa con las
+    demás: el cálculo en curso se abandona y al terminar se ejecuta una sola
+    vez más con la red vigente en ese momento.
+
+    Args:
+        app (Flask): Aplicación en cuyo contexto se obtiene la red
+        version (int): Versión de la red que necesita las métricas
+        obtener_red (callable): Función que retorna (versión, GrafoCSR) de la red actual
+        procesos (int): Número de procesos trabajadores
+
+    Returns:
+        bool: True si se lanzó un nuevo hilo de cálculo
+    """
+    global _en_curso, _pendiente, _version_objetivo, _progreso
+
+    with _candado:
+        if _en_curso:
+            if _version_objetivo is None or version > _version_objetivo:
+                _version_objetivo = version
+                _pendiente = True
+            return False
+        _en_curso = True
+        _version_objetivo = version
+        _progreso = 0
+
+    hilo = threading.Thread(
+        target=_ejecutar_analisis, args=(app, obtener_red, procesos),
+        name='analitica-red', daemon=True
+    )
+    hilo.start()
+    return True
+
+
+def _ejecutar_analisis(app, obtener_red, procesos):
+    """
+    Calcula y publica las métricas hasta que no queden solicitudes pendientes.
+
+    Args:
+        app (Flask): Aplicación en cuyo contexto se obtiene la red
+        obtener_red (callable): Función que retorna (versión, GrafoCSR) de la red actual
+        procesos (int): Número de procesos trabajadores
+    """
+    global _analitica_actual, _en_curso, _pendiente, _version_objetivo, _version_en_calculo, _progreso
+
+    def reportar_progreso(progreso):
+        global _progreso
+        with _candado:
+            _progreso = int(progreso)
+
+    while True:
+        try:
+            with app.app_context():
+                version, grafo = obtener_red()
+
+            if obtener_analitica(version) is None:
+                with _candado:
+                    _version_en_calculo = version
+                    if version >= _version_objetivo:
+                        # Esta vuelta ya usa la red más reciente solicitada
+                        _version_objetivo = version
+                        _pendiente = False
+                analitica = calcular(grafo, version, procesos, reportar_progreso, lambda: _pendiente)
+
+                # Publicación atómica: una sola asignación de referencia
+                _analitica_actual = analitica
+        except _CalculoCancelado:
+            pass  # La red cambió: se recalcula en la siguiente vuelta
+        except Exception as e:
+            print(f"Error calculando la analítica de la red: {e}")
+
+        with _candado:
+            _version_en_calculo = None
+            _progreso = 0
+            if not _pendiente:
+                _en_curso = False
+                _version_objetivo = None
+                return
+            _pendiente = False
+
+
+@atexit.register
+def _cerrar_pool():
+    """Detiene los procesos trabajadores al salir."""
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,257 @@
+"""
+Caché de Contenido Binario Acotada por Tamaño
+============================================
+
+Este módulo implementa una caché LRU (Least Recently Used) de contenido
+binario (imágenes PNG, documentos, etc.) acotada por el total de bytes
+almacenados, y no por el número de entradas.
+
+Opcionalmente usa un directorio en disco como segundo nivel: lo que se
+guarda en memoria se escribe también en disco, y ante un fallo en memoria
+se busca en disco antes de regenerar el contenido. El disco también está
+acotado por bytes y se depura eliminando los archivos usados hace más
+tiempo. Como los archivos se nombran a partir de la clave, el nivel de
+disco puede compartirse entre procesos y sobrevive a los reinicios si las
+claves no dependen del proceso.
+
+Para no recorrer el directorio en cada escritura, se lleva una estimación
+de los bytes en disco: se inicializa recorriendo el directorio una vez, se
+incrementa con cada archivo escrito y solo cuando supera la capacidad se
+recorre de nuevo el directorio para depurarlo y corregir la estimación.
+La depuración deja el disco por debajo del 90% de la capacidad, de modo
+que los recorridos se reparten entre muchas escrituras.
+
+Autor: Joaquín Bermeo
+Fecha: Julio 2025
+"""
+
+import os
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+
+# Fracción de la capacidad en disco que se conserva al depurar
+_FRACCION_DEPURACION = 0.9
+
+
+class CacheBytesLRU:
+    """
+    Caché LRU de valores bytes acotada por el total de bytes en memoria.
+
+    Es segura para uso concurrente desde varios hilos y lleva contadores de
+    aciertos (en memoria y en disco), fallos y desalojos.
+    """
+
+    def __init__(self, capacidad_bytes, directorio=None, capacidad_disco_bytes=0, extension='.bin'):
+        """
+        Inicializa la caché vacía.
+
+        Args:
+            capacidad_bytes (int): Total máximo de bytes almacenados en memoria
+            directorio (str, optional): Directorio del nivel en disco (None lo desactiva)
+            capacidad_disco_bytes (int): Total máximo de bytes almacenados en disco
+            extension (str): Extensión de los archivos del nivel en disco
+        """
+        self.capacidad_bytes = max(0, int(capacidad_bytes))
+        self.directorio = directorio
+        self.capacidad_disco_bytes = max(0, int(capacidad_disco_bytes or 0))
+        self.extension = extension
+        self._entradas = OrderedDict()
+        self._bytes = 0
+        self._bytes_disco = None  # Estimación de bytes en disco (None: sin recorrer aún)
+        self._candado = threading.Lock()
+        self.aciertos = 0
+        self.aciertos_disco = 0
+        self.fallos = 0
+        self.desalojos = 0
+
+        if self.directorio:
+            os.makedirs(self.directorio, exist_ok=True)
+
+    def obtener(self, clave):
+        """
+        Busca el contenido asociado a una clave en memoria y luego en disco.
+
+        Args:
+            clave (hashable): Clave de la entrada (su repr debe ser estable)
+
+        Returns:
+            bytes: Contenido almacenado o None si no existe
+        """
+        with self._candado:
+            datos = self._entradas.get(clave)
+            if datos is not None:
+                self._entradas.move_to_end(clave)  # Marcar como usada recientemente
+                self.aciertos += 1
+                return datos
+
+        datos = self._leer_disco(clave)
+
+        with self._candado:
+            if datos is None:
+                self.fallos += 1
+                return None
+            self.aciertos_disco += 1
+            self._guardar_memoria(clave, datos)
+            return datos
+
+    def guardar(self, clave, datos):
+        """
+        Almacena contenido en memoria (y en disco si está habilitado).
+
+        Args:
+            clave (hashable): Clave de la entrada (su repr debe ser estable)
+            datos (bytes): Contenido a almacenar
+        """
+        with self._candado:
+            self._guardar_memoria(clave, datos)
+        self._escribir_disco(clave, datos)
+
+    def _guardar_memoria(self, clave, datos):
+        """
+        Inserta en memoria y desaloja las entradas menos usadas (requiere el candado).
+
+        Args:
+            clave (hashable): Clave de la entrada
+            datos (bytes): Contenido a almacenar
+        """
+        # Un valor mayor que toda la capacidad no se guarda en memoria
+        if len(datos) > self.capacidad_bytes:
+            return
+
+        anterior = self._entradas.pop(clave, None)
+        if anterior is not None:
+            self._bytes -= len(anterior)
+
+        self._entradas[clave] = datos
+        self._bytes += len(datos)
+
+        while self._bytes > self.capacidad_bytes:
+            _, desalojado = self._entradas.popitem(last=False)
+            self._bytes -= len(desalojado)
+            self.desalojos += 1
+
+    def _ruta_disco(self, clave):
+        """
+        Calcula la ruta del archivo en disco correspondiente a una clave.
+
+        Args:
+            clave (hashable): Clave de la entrada
+
+        Returns:
+            str: Ruta del archivo
+        """
+        nombre = hashlib.sha1(repr(clave).encode('utf-8')).hexdigest()
+        return os.path.join(self.directorio, nombre + self.extension)
+
+    def _leer_disco(self, clave):
+        """
+        Lee el contenido de una clave desde el nivel en disco.
+
+        Args:
+            clave (hashable): Clave de la entrada
+
+        Returns:
+            bytes: Contenido del archivo o None si no existe o el disco está desactivado
+        """
+        if not self.directorio:
+            return None
+
+        ruta = self._ruta_disco(clave)
+        try:
+            with open(ruta, 'rb') as archivo:
+                datos = archivo.read()
+            os.utime(ruta)  # La fecha de modificación marca el último uso
+            return datos
+        except OSError:
+            return None
+
+    def _escribir_disco(self, clave, datos):
+        """
+        Escribe el contenido en disco de forma atómica y depura el directorio.
+
+        Args:
+            clave (hashable): Clave de la entrada
+            datos (bytes): Contenido a almacenar
+        """
+        if not self.directorio or len(datos) > self.capacidad_disco_bytes:
+            return
+
+        try:
+            descriptor, ruta_temporal = tempfile.mkstemp(dir=self.directorio, suffix='.tmp')
+            try:
+                with os.fdopen(descriptor, 'wb') as archivo:
+                    archivo.write(datos)
+                os.replace(ruta_temporal, self._ruta_disco(clave))
+            except Exception:
+                os.unlink(ruta_temporal)
+                raise
+        except OSError as e:
+            print(f"No se pudo escribir en la caché en disco: {e}")
+            return
+
+        # Reemplazar un archivo existente sobreestima el total; la
+        # estimación se corrige en el siguiente recorrido del directorio
+        with self._candado:
+            if self._bytes_disco is not None:
+                self._bytes_disco += len(datos)
+            depurar = self._bytes_disco is None or self._bytes_disco > self.capacidad_disco_bytes
+
+        if depurar:
+            try:
+                self._depurar_disco()
+            except OSError as e:
+                print(f"No se pudo depurar la caché en disco: {e}")
+
+    def _depurar_disco(self):
+        """
+        Elimina los archivos usados hace más tiempo hasta bajar del 90% de la
+        capacidad en disco y actualiza la estimación de bytes en disco.
+        """
+        archivos = []
+        total = 0
+        for entrada in os.scandir(self.directorio):
+            if entrada.is_file() and entrada.name.endswith(self.extension):
+                info = entrada.stat()
+                archivos.append((info.st_mtime, info.st_size, entrada.path))
+                total += info.st_size
+
+        limite = self.capacidad_disco_bytes * _FRACCION_DEPURACION if total > self.capacidad_disco_bytes \
+            else self.capacidad_disco_bytes
+        for _, tamano, ruta in sorted(archivos):
+            if total <= limite:
+                break
+            try:
+                os.remove(ruta)
+                total -= tamano
+                with self._candado:
+                    self.desalojos += 1
+            except OSError:
+                pass  # Otro proceso pudo haberlo eliminado
+
+        with self._candado:
+            self._bytes_disco = total
+
+    def estadisticas(self):
+        """
+        Obtiene las estadísticas de uso de la caché.
+
+        Returns:
+            dict: Entradas, bytes, capacidad, aciertos (memoria y disco), fallos,
+                  desalojos y tasa de aciertos
+        """
+        with self._candado:
+            aciertos = self.aciertos + self.aciertos_disco
+            consultas = aciertos + self.fallos
+            return {
+                'entradas': len(self._entradas),
+                'bytes': self._bytes,
+                'capacidad_bytes': self.capacidad_bytes,
+                'disco_habilitado': bool(self.directorio),
+                'aciertos': self.aciertos,
+                'aciertos_disco': self.aciertos_disco,
+                'fallos': self.fallos,
+                'desalojos': self.desalojos,
+                'tasa_aciertos': round(aciertos / consultas, 4) if consultas else 0.0
+            }
@@ -0,0 +1,62 @@
+"""
+Caché de los Datos del Dashboard
+===============================
+
+Este módulo conserva los datos consolidados del dashboard (estadísticas de
+usuarios y del grafo) en una caché de corta duración (DASHBOARD_CACHE_TTL
+segundos) compartida por todas las peticiones del proceso.
+
+La clave de validez incluye la versión de la red y si ya está disponible
+su analítica, por lo que los cambios administrativos y el fin del cálculo
+de la analítica invalidan los datos antes de que venza el TTL. Las demás
+escrituras que los afectan (p. ej. el registro de usuarios) llaman a
+invalidar_dashboard().
+
+Autor: Joaquín Bermeo
+Fecha: Julio 2025
+"""
+
+from flask import current_app
+from utils.cache_ttl import CacheTTL
+from utils.version_red import obtener_version_red
+from utils import analitica_red
+
+# Caché de los datos del dashboard (se crea con el TTL configurado)
+_cache_dashboard = None
+
+
+def _obtener_cache_dashboard():
+    """
+    Obtiene la caché de los datos del dashboard, creándola con la configuración de la aplicación.
+
+    Returns:
+        CacheTTL: Caché de corta duración de los datos del dashboard
+    """
+    global _cache_dashboard
+    if _cache_dashboard is None:
+        _cache_dashboard = CacheTTL(current_app.config.get('DASHBOARD_CACHE_TTL', 30))
+    return _cache_dashboard
+
+
+def obtener_datos_dashboard(construir, conservar=None):
+    """
+    Obtiene los datos del dashboard vigentes, construyéndolos si es necesario.
+
+    Args:
+        construir (callable): Función sin argumentos que recopila los datos
+        conservar (callable, optional): Función que recibe los datos construidos y
+                                        retorna False si no deben guardarse
+
+    Returns:
+        object: Datos construidos por construir() para la clave vigente
+    """
+    version = obtener_version_red()
+    clave = (version, analitica_red.obtener_analitica(version) is not None)
+    return _obtener_cache_dashboard().obtener(clave, construir, conservar)
+
+
+def invalidar_dashboard():
+    """
+    Descarta los datos del dashboard en caché tras una escritura que los afecta.
+    """
+    _obtener_cache_dashboard().invalidar()
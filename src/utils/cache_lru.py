@@ -0,0 +1,103 @@
+"""
+Caché LRU Versionada
+===================
+
+Este módulo implementa una caché acotada con política LRU (Least Recently
+Used) cuyas entradas se asocian a una versión de la red de rutas.
+
+Las entradas de versiones anteriores nunca se devuelven: al cambiar la
+versión de la red quedan invalidadas sin necesidad de vaciar la caché, y
+se descartan en cuanto se almacena la primera entrada de la nueva versión.
+
+Autor: Joaquín Bermeo
+Fecha: Julio 2025
+"""
+
+import threading
+from collections import OrderedDict
+
+
+class CacheLRUVersionado:
+    """
+    Caché LRU acotada por número de entradas con claves (clave, versión).
+
+    Es segura para uso concurrente desde varios hilos y lleva contadores de
+    aciertos y fallos para calcular la tasa de aciertos.
+    """
+
+    def __init__(self, capacidad):
+        """
+        Inicializa la caché vacía.
+
+        Args:
+            capacidad (int): Número máximo de entradas almacenadas
+        """
+        self.capacidad = max(1, int(capacidad))
+        self._entradas = OrderedDict()
+        self._candado = threading.Lock()
+        self._ultima_version = None
+        self.aciertos = 0
+        self.fallos = 0
+        self.desalojos = 0
+
+    def obtener(self, clave, version):
+        """
+        Busca una entrada para la clave y versión indicadas.
+
+        Args:
+            clave (hashable): Clave de la entrada
+            version (int): Versión de la red
+
+        Returns:
+            object: Valor almacenado o None si no existe
+        """
+        with self._candado:
+            valor = self._entradas.get((clave, version))
+            if valor is None:
+                self.fallos += 1
+                return None
+            self._entradas.move_to_end((clave, version))  # Marcar como usada recientemente
+            self.aciertos += 1
+            return valor
+
+    def guardar(self, clave, version, valor):
+        """
+        Almacena una entrada, desalojando las menos usadas si se supera la capacidad.
+
+        Args:
+            clave (hashable): Clave de la entrada
+            version (int): Versión de la red con la que se calculó el valor
+            valor (object): Valor a almacenar (no puede ser None)
+        """
+        with self._candado:
+            # Primera entrada de una nueva versión: descartar las versiones anteriores
+            if version != self._ultima_version:
+                for antigua in [k for k in self._entradas if k[1] != version]:
+                    del self._entradas[antigua]
+                    self.desalojos += 1
+                self._ultima_version = version
+
+            self._entradas[(clave, version)] = valor
+            self._entradas.move_to_end((clave, version))
+
+            while len(self._entradas) > self.capacidad:
+                self._entradas.popitem(last=False)
+                self.desalojos += 1
+
+    def estadisticas(self):
+        """
+        Obtiene las estadísticas de uso de la caché.
+
+        Returns:
+            dict: Entradas, capacidad, aciertos, fallos, desalojos y tasa de aciertos
+        """
+        with self._candado:
+            consultas = self.aciertos + self.fallos
+            return {
+                'entradas': len(self._entradas),
+                'capacidad': self.capacidad,
+                'aciertos': self.aciertos,
+                'fallos': self.fallos,
+                'desalojos': self.desalojos,
+                'tasa_aciertos': round(self.aciertos / consultas, 4) if consultas else 0.0
+            }
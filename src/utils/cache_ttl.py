@@ -0,0 +1,81 @@
+"""
+Caché de Corta Duración
+======================
+
+Este módulo implementa una caché de un único valor que se descarta cuando
+vence su tiempo de vida (TTL) o cuando cambia la clave con la que se
+construyó. Es útil para datos agregados que se consultan con frecuencia,
+como el panel principal, y que pueden mostrarse con unos segundos de
+retraso.
+
+La clave permite invalidar el valor sin esperar al vencimiento: por
+ejemplo, incluyendo la versión de la red, cualquier cambio administrativo
+produce una clave distinta. También puede invalidarse de forma explícita.
+
+Autor: Joaquín Bermeo
+Fecha: Julio 2025
+"""
+
+import time
+import threading
+
+
+class CacheTTL:
+    """
+    Caché de un único valor con tiempo de vida y clave de validez.
+
+    El valor se guarda junto con su clave y su vencimiento en una sola tupla
+    que se reemplaza completa, de modo que una lectura sin candado nunca ve
+    una mezcla de estados. Si varios hilos solicitan el valor a la vez, solo
+    uno ejecuta la construcción y el resto espera y reutiliza el resultado.
+    """
+
+    def __init__(self, segundos):
+        """
+        Inicializa la caché vacía.
+
+        Args:
+            segundos (float): Tiempo de vida del valor almacenado
+        """
+        self.segundos = segundos
+        self._entrada = None  # (clave, vencimiento, valor)
+        self._candado = threading.Lock()
+
+    def _vigente(self, entrada, clave):
+        """Indica si una entrada corresponde a la clave y no ha vencido."""
+        return entrada is not None and entrada[0] == clave and time.monotonic() < entrada[1]
+
+    def obtener(self, clave, constructor, conservar=None):
+        """
+        Obtiene el valor vigente para la clave, construyéndolo si es necesario.
+
+        Args:
+            clave (hashable): Clave de validez del valor (p. ej. la versión de la red)
+            constructor (callable): Función sin argumentos que construye el valor
+            conservar (callable, optional): Función que recibe el valor construido y
+                                            retorna False si no debe guardarse (p. ej.
+                                            porque refleja un error)
+
+        Returns:
+            object: Valor almacenado o recién construido
+        """
+        # Camino rápido: una sola lectura de la entrada actual
+        entrada = self._entrada
+        if self._vigente(entrada, clave):
+            return entrada[2]
+
+        with self._candado:
+            # Verificar de nuevo por si otro hilo lo construyó mientras esperábamos
+            entrada = self._entrada
+            if self._vigente(entrada, clave):
+                return entrada[2]
+
+            valor = constructor()
+            if conservar is None or conservar(valor):
+                self._entrada = (clave, time.monotonic() + self.segundos, valor)
+            return valor
+
+    def invalidar(self):
+        """Descarta el valor almacenado, forzando su reconstrucción."""
+        with self._candado:
+            self._entrada = None
@@ -0,0 +1,140 @@
+"""
+Diagrama Vectorial de Rutas para PDF
+===================================
+
+Este módulo dibuja la red con un camino resaltado usando las primitivas
+gráficas de ReportLab (Drawing, Line, Circle, String). El diagrama se
+inserta en el PDF como contenido vectorial: no se renderiza ninguna imagen
+con Matplotlib, el archivo resultante es mucho más pequeño y se ve nítido
+a cualquier escala.
+
+Se usan los mismos colores que las imágenes PNG del grafo:
+- Ciudades en azul claro y rutas en negro, con el costo de cada ruta
+- Ciudades del camino en naranja y sus rutas en rojo, más gruesas
+
+Las funciones de este módulo son puras: reciben el grafo y las posiciones
+persistidas de la red y no acceden a la base de datos ni a Flask.
+
+Autor: Joaquín Bermeo
+Fecha: Julio 2025
+"""
+
+from reportlab.graphics.shapes import Drawing, Line, Circle, Rect, String
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.lib import colors
+
+# Tamaño por defecto del diagrama en puntos (mismo espacio que ocupaba la imagen)
+ANCHO_DIAGRAMA = 400
+ALTO_DIAGRAMA = 300
+
+# Margen interior para que las ciudades de los bordes no queden cortadas
+_MARGEN = 20
+
+# Fuentes de los nombres de ciudades y de los costos
+_FUENTE_NOMBRE = 'Helvetica-Bold'
+_FUENTE_COSTO = 'Helvetica'
+
+
+def _escala(pos, ancho, alto):
+    """
+    Calcula la transformación de las posiciones del layout al área del diagrama.
+
+    Args:
+        pos (dict): Posiciones de los nodos {nombre: (x, y)}
+        ancho (float): Ancho del diagrama en puntos
+        alto (float): Alto del diagrama en puntos
+
+    Returns:
+        callable: Función que recibe (x, y) y retorna (x, y) en puntos
+    """
+    xs = [x for x, _ in pos.values()]
+    ys = [y for _, y in pos.values()]
+    min_x, min_y = min(xs), min(ys)
+    escala_x = (ancho - 2 * _MARGEN) / ((max(xs) - min_x) or 1)
+    escala_y = (alto - 2 * _MARGEN) / ((max(ys) - min_y) or 1)
+
+    # El eje y de ReportLab también crece hacia arriba, igual que el del layout
+    return lambda punto: (_MARGEN + (punto[0] - min_x) * escala_x,
+                          _MARGEN + (punto[1] - min_y) * escala_y)
+
+
+def _texto_con_fondo(x, y, texto, fuente, tamano):
+    """
+    Crea una etiqueta centrada con un fondo blanco que la separa de las líneas.
+
+    Args:
+        x (float): Centro horizontal de la etiqueta
+        y (float): Centro vertical de la etiqueta
+        texto (str): Contenido de la etiqueta
+        fuente (str): Nombre de la fuente
+        tamano (float): Tamaño de la fuente en puntos
+
+    Returns:
+        list: Rectángulo de fondo y texto
+    """
+    ancho = stringWidth(texto, fuente, tamano)
+    fondo = Rect(x - ancho / 2 - 1, y - tamano / 2, ancho + 2, tamano,
+                 fillColor=colors.white, strokeColor=None)
+    etiqueta = String(x, y - tamano / 3, texto, fontName=fuente, fontSize=tamano,
+                      textAnchor='middle')
+    return [fondo, etiqueta]
+
+
+def diagrama_camino(G, pos, camino, ancho=ANCHO_DIAGRAMA, alto=ALTO_DIAGRAMA):
+    """
+    Dibuja la red con un camino resaltado como diagrama vectorial de ReportLab.
+
+    Args:
+        G (nx.Graph): Grafo de la red (o subgrafo a dibujar)
+        pos (dict): Posiciones de los nodos {nombre: (x, y)}
+        camino (list): Lista de nombres de ciudades que forman la ruta
+        ancho (float): Ancho del diagrama en puntos
+        alto (float): Alto del diagrama en puntos
+
+    Returns:
+        Drawing: Diagrama listo para agregarse como elemento de un documento PDF
+    """
+    dibujo = Drawing(ancho, alto)
+    if not pos:
+        return dibujo
+
+    punto = _escala(pos, ancho, alto)
+    en_camino = set(camino)
+    aristas_camino = set(zip(camino[:-1], camino[1:]))
+    aristas_camino |= {(b, a) for a, b in aristas_camino}
+
+    # El tamaño de las ciudades y textos se reduce en redes grandes
+    radio = max(3.0, min(12.0, 0.35 * min(ancho, alto) / max(1, len(pos)) ** 0.5))
+    tamano_nombre = max(4.0, min(7.0, radio * 0.6))
+    tamano_costo = tamano_nombre - 1
+
+    # Rutas de la red y luego las del camino encima
+    lineas_camino = []
+    costos = []
+    for origen, destino, datos in G.edges(data=True):
+        x1, y1 = punto(pos[origen])
+        x2, y2 = punto(pos[destino])
+        if (origen, destino) in aristas_camino:
+            lineas_camino.append(Line(x1, y1, x2, y2, strokeColor=colors.red, strokeWidth=2.5))
+        else:
+            dibujo.add(Line(x1, y1, x2, y2, strokeColor=colors.black, strokeWidth=0.5))
+        if 'weight' in datos:
+            costos.append(((x1 + x2) / 2, (y1 + y2) / 2, f"{datos['weight']:g}"))
+
+    for linea in lineas_camino:
+        dibujo.add(linea)
+    for x, y, texto in costos:
+        for elemento in _texto_con_fondo(x, y, texto, _FUENTE_COSTO, tamano_costo):
+            dibujo.add(elemento)
+
+    # Ciudades con sus nombres
+    for nombre in G.nodes():
+        x, y = punto(pos[nombre])
+        resaltada = nombre in en_camino
+        dibujo.add(Circle(x, y, radio * (1.1 if resaltada else 1.0),
+                          fillColor=colors.orange if resaltada else colors.lightblue,
+                          strokeColor=None))
+        dibujo.add(String(x, y - tamano_nombre / 3, str(nombre), fontName=_FUENTE_NOMBRE,
+                          fontSize=tamano_nombre, textAnchor='middle'))
+
+    return dibujo
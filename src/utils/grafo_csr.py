@@ -0,0 +1,393 @@
+"""
+Motor de Grafos Compacto (CSR)
+=============================
+
+Este módulo implementa un motor de grafos alternativo a NetworkX que
+almacena la lista de adyacencia en arreglos contiguos de NumPy con el
+formato CSR (Compressed Sparse Row):
+
+- offsets: posición inicial de los vecinos de cada nodo (longitud n + 1)
+- destinos: índice del nodo vecino de cada arista
+- pesos: costo de cada arista (float64)
+
+Los nodos se identifican internamente por un índice denso (0..n-1) que se
+corresponde con el ID de la ciudad en la base de datos mediante la tabla
+de IDs, junto con la tabla de nombres para traducir nombre ↔ índice.
+
+Como el grafo es NO DIRIGIDO, cada ruta se almacena en ambas direcciones.
+
+Además del camino más corto libre, el motor resuelve el camino más corto
+que pasa por al menos una ciudad costera mediante una búsqueda sobre un
+grafo de estados de dos capas (ver dijkstra_costera).
+
+Autor: Joaquín Bermeo
+Fecha: Julio 2025
+"""
+
+import heapq
+import numpy as np
+
+
+class GrafoCSR:
+    """
+    Grafo no dirigido y ponderado almacenado en arreglos CSR de NumPy.
+
+    Ocupa mucha menos memoria que un nx.Graph (sin diccionarios por nodo ni
+    por arista) y permite recorrer los vecinos de un nodo como un segmento
+    contiguo de memoria.
+    """
+
+    def __init__(self, ids, nombres, offsets, destinos, pesos):
+        """
+        Inicializa el grafo a partir de sus arreglos ya construidos.
+
+        Args:
+            ids (np.ndarray): ID de ciudad de cada índice de nodo (int64)
+            nombres (list): Nombre de ciudad de cada índice de nodo
+            offsets (np.ndarray): Inicio de los vecinos de cada nodo (int64, n + 1)
+            destinos (np.ndarray): Nodo destino de cada arista (int32)
+            pesos (np.ndarray): Costo de cada arista (float64)
+        """
+        self.ids = ids
+        self.nombres = nombres
+        self.offsets = offsets
+        self.destinos = destinos
+        self.pesos = pesos
+
+        # Tablas de traducción nombre/ID de ciudad → índice de nodo
+        self.indice_por_nombre = {nombre: i for i, nombre in enumerate(nombres)}
+        self.indice_por_id = {int(ciudad_id): i for i, ciudad_id in enumerate(ids)}
+
+        # Matriz dispersa de SciPy, construida bajo demanda (ver matriz_dispersa)
+        self._matriz_dispersa = None
+
+    @classmethod
+    def desde_aristas(cls, aristas):
+        """
+        Construye el grafo CSR a partir de la lista de aristas de la base de datos.
+
+        Args:
+            aristas (list): Tuplas (origen_id, destino_id, origen_nombre, destino_nombre, costo)
+                            tal como las retorna cargar_aristas()
+
+        Returns:
+            GrafoCSR: Grafo construido
+        """
+        # Tabla de nombres por ID de ciudad
+        nombre_por_id = {}
+        for origen_id, destino_id, origen, destino, _ in aristas:
+            nombre_por_id[origen_id] = origen
+            nombre_por_id[destino_id] = destino
+
+        # Índice denso ordenado por ID de ciudad
+        ids = np.array(sorted(nombre_por_id), dtype=np.int64)
+        nombres = [nombre_por_id[int(ciudad_id)] for ciudad_id in ids]
+        n = len(ids)
+
+        if not aristas:
+            return cls(ids, nombres, np.zeros(n + 1, dtype=np.int64),
+                       np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.float64))
+
+        origen_ids = np.array([a[0] for a in aristas], dtype=np.int64)
+        destino_ids = np.array([a[1] for a in aristas], dtype=np.int64)
+        costos = np.array([a[4] for a in aristas], dtype=np.float64)
+
+        # Traducir IDs de ciudad a índices densos (ids está ordenado)
+        origenes = np.searchsorted(ids, origen_ids)
+        destinos = np.searchsorted(ids, destino_ids)
+
+        # Grafo no dirigido: cada ruta se agrega en ambas direcciones
+        fuentes = np.concatenate([origenes, destinos])
+        objetivos = np.concatenate([destinos, origenes]).astype(np.int32)
+        pesos = np.concatenate([costos, costos])
+
+        # Ordenar las aristas por nodo fuente para obtener segmentos contiguos
+        orden = np.argsort(fuentes, kind='stable')
+        conteos = np.bincount(fuentes, minlength=n)
+        offsets = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(conteos, out=offsets[1:])
+
+        return cls(ids, nombres, offsets, objetivos[orden], pesos[orden])
+
+    @property
+    def numero_nodos(self):
+        """int: Número de nodos (ciudades con al menos una ruta) del grafo."""
+        return len(self.nombres)
+
+    def vecinos(self, indice):
+        """
+        Obtiene los vecinos de un nodo y los costos de las aristas hacia ellos.
+
+        Args:
+            indice (int): Índice del nodo
+
+        Returns:
+            tuple: (destinos, pesos) como segmentos de los arreglos CSR
+        """
+        inicio, fin = self.offsets[indice], self.offsets[indice + 1]
+        return self.destinos[inicio:fin], self.pesos[inicio:fin]
+
+    def peso_arista(self, u, v):
+        """
+        Obtiene el costo de la arista directa entre dos nodos.
+
+        Si existen rutas duplicadas entre los mismos nodos, retorna la de menor costo.
+
+        Args:
+            u (int): Índice del primer nodo
+            v (int): Índice del segundo nodo
+
+        Returns:
+            float: Costo de la arista o None si no existe conexión directa
+        """
+        destinos, pesos = self.vecinos(u)
+        coincidencias = pesos[destinos == v]
+        return float(coincidencias.min()) if len(coincidencias) else None
+
+    def matriz_dispersa(self):
+        """
+        Construye la matriz de adyacencia dispersa de SciPy equivalente al grafo.
+
+        Las rutas duplicadas entre los mismos nodos se reducen a la de menor
+        costo (SciPy sumaría las entradas repetidas). La matriz se construye
+        una sola vez por grafo, ya que el grafo no se modifica.
+
+        Returns:
+            scipy.sparse.csr_matrix: Matriz n x n con los costos de las aristas
+        """
+        if self._matriz_dispersa is not None:
+            return self._matriz_dispersa
+
+        from scipy.sparse import csr_matrix
+
+        n = self.numero_nodos
+        fuentes = np.repeat(np.arange(n, dtype=np.int32), np.diff(self.offsets))
+
+        # Ordenar por (fuente, destino, peso) y conservar la primera de cada par
+        orden = np.lexsort((self.pesos, self.destinos, fuentes))
+        fuentes, destinos, pesos = fuentes[orden], self.destinos[orden], self.pesos[orden]
+        unicas = np.ones(len(fuentes), dtype=bool)
+        unicas[1:] = (fuentes[1:] != fuentes[:-1]) | (destinos[1:] != destinos[:-1])
+
+        self._matriz_dispersa = csr_matrix((pesos[unicas], (fuentes[unicas], destinos[unicas])), shape=(n, n))
+        return self._matriz_dispersa
+
+    def dijkstra(self, origen, destino=None):
+        """
+        Algoritmo de Dijkstra con cola de prioridad (heap) sobre los arreglos CSR.
+
+        En una sola pasada obtiene el árbol de predecesores, las distancias y
+        el costo del tramo (arista) con el que se llegó a cada nodo.
+
+        Args:
+            origen (int): Índice del nodo origen
+            destino (int, optional): Índice del nodo destino. Si se indica, la
+                                     búsqueda termina al fijar su distancia
+
+        Returns:
+            tuple: (distancias, predecesores, costos_tramo) como arreglos de NumPy.
+                   Las distancias no alcanzadas son infinito y los nodos sin
+                   predecesor tienen -1.
+        """
+        n = self.numero_nodos
+        offsets = self.offsets
+        destinos = self.destinos
+        pesos = self.pesos
+
+        distancias = [float('inf')] * n
+        predecesores = [-1] * n
+        costos_tramo = [0.0] * n
+        visitados = [False] * n
+
+        distancias[origen] = 0.0
+        heap = [(0.0, origen)]
+
+        while heap:
+            distancia, u = heapq.heappop(heap)
+            if visitados[u]:
+                continue  # Entrada obsoleta en el heap
+            visitados[u] = True
+
+            if u == destino:
+                break
+
+            inicio, fin = offsets[u], offsets[u + 1]
+            for v, peso in zip(destinos[inicio:fin].tolist(), pesos[inicio:fin].tolist()):
+                nueva = distancia + peso
+                if nueva < distancias[v]:
+                    distancias[v] = nueva
+                    predecesores[v] = u
+                    costos_tramo[v] = peso
+                    heapq.heappush(heap, (nueva, v))
+
+        return (np.array(distancias, dtype=np.float64),
+                np.array(predecesores, dtype=np.int32),
+                np.array(costos_tramo, dtype=np.float64))
+
+    @staticmethod
+    def reconstruir_camino(predecesores, destino):
+        """
+        Reconstruye el camino desde el origen hasta un destino recorriendo predecesores.
+
+        Args:
+            predecesores (np.ndarray): Arreglo de predecesores retornado por dijkstra()
+            destino (int): Índice del nodo destino
+
+        Returns:
+            list: Índices de los nodos del camino, desde el origen hasta el destino
+        """
+        camino = [destino]
+        actual = int(predecesores[destino])
+        while actual != -1:
+            camino.append(actual)
+            actual = int(predecesores[actual])
+        camino.reverse()
+        return camino
+
+    def mascara_costera(self, costeras):
+        """
+        Construye la máscara booleana de nodos costeros.
+
+        Args:
+            costeras (set): Conjunto de nombres de ciudades costeras
+
+        Returns:
+            np.ndarray: Arreglo booleano con True en los índices de nodos costeros
+        """
+        return np.array([nombre in costeras for nombre in self.nombres], dtype=bool)
+
+    def dijkstra_costera(self, origen, es_costera, destino=None):
+        """
+        Dijkstra sobre el grafo de estados de dos capas para exigir paso por la costa.
+
+        Cada nodo v se duplica en dos estados: v (capa 0, aún no se ha visitado
+        una ciudad costera) y n + v (capa 1, ya se visitó al menos una). Moverse
+        a una ciudad costera lleva siempre a la capa 1. El camino más corto al
+        estado n + destino es la ruta más barata que pasa por la costa, y se
+        obtiene con una sola búsqueda sin importar cuántas ciudades costeras existan.
+
+        Args:
+            origen (int): Índice del nodo origen
+            es_costera (np.ndarray): Máscara booleana de nodos costeros
+            destino (int, optional): Índice del nodo destino. Si se indica, la
+                                     búsqueda termina al fijar el estado n + destino
+
+        Returns:
+            tuple: (distancias, predecesores, costos_tramo) como arreglos de NumPy
+                   de longitud 2n indexados por estado
+        """
+        n = self.numero_nodos
+        offsets = self.offsets
+        destinos = self.destinos
+        pesos = self.pesos
+        costera = es_costera.tolist()
+
+        distancias = [float('inf')] * (2 * n)
+        predecesores = [-1] * (2 * n)
+        costos_tramo = [0.0] * (2 * n)
+        visitados = [False] * (2 * n)
+
+        inicio_estado = n + origen if costera[origen] else origen
+        objetivo = n + destino if destino is not None else None
+        distancias[inicio_estado] = 0.0
+        heap = [(0.0, inicio_estado)]
+
+        while heap:
+            distancia, estado = heapq.heappop(heap)
+            if visitados[estado]:
+                continue  # Entrada obsoleta en el heap
+            visitados[estado] = True
+
+            if estado == objetivo:
+                break
+
+            # Separar el estado en nodo y capa
+            u, capa = (estado - n, 1) if estado >= n else (estado, 0)
+
+            inicio, fin = offsets[u], offsets[u + 1]
+            for v, peso in zip(destinos[inicio:fin].tolist(), pesos[inicio:fin].tolist()):
+                siguiente = n + v if capa or costera[v] else v
+                nueva = distancia + peso
+                if nueva < distancias[siguiente]:
+                    distancias[siguiente] = nueva
+                    predecesores[siguiente] = estado
+                    costos_tramo[siguiente] = peso
+                    heapq.heappush(heap, (nueva, siguiente))
+
+        return (np.array(distancias, dtype=np.float64),
+                np.array(predecesores, dtype=np.int32),
+                np.array(costos_tramo, dtype=np.float64))
+
+    def arbol(self, origen, es_costera=None, destino=None):
+        """
+        Calcula el árbol de caminos más cortos desde una ciudad.
+
+        Args:
+            origen (str): Nombre de la ciudad origen
+            es_costera (np.ndarray, optional): Máscara de nodos costeros. Si se
+                                               indica, se usa la búsqueda costera
+            destino (str, optional): Nombre de la ciudad destino para terminar
+                                     la búsqueda en cuanto se alcance. Sin
+                                     destino se obtiene el árbol completo
+
+        Returns:
+            tuple: (distancias, predecesores, costos_tramo) o None si el origen
+                   no existe en el grafo
+        """
+        i = self.indice_por_nombre.get(origen)
+        if i is None:
+            return None
+        j = self.indice_por_nombre.get(destino) if destino is not None else None
+
+        if es_costera is None:
+            return self.dijkstra(i, j)
+        return self.dijkstra_costera(i, es_costera, j)
+
+    def camino_en_arbol(self, arbol, destino, exigir_costera=False):
+        """
+        Reconstruye el camino hacia un destino recorriendo un árbol ya calculado.
+
+        Args:
+            arbol (tuple): (distancias, predecesores, costos_tramo) de arbol()
+            destino (str): Nombre de la ciudad destino
+            exigir_costera (bool): Si el árbol proviene de la búsqueda costera
+
+        Returns:
+            tuple: (camino, costo, costos_tramos) con la lista de nombres de
+                   ciudades, el costo total y el costo de cada tramo, o
+                   ([], None, []) si no existe camino
+        """
+        j = self.indice_por_nombre.get(destino)
+        if arbol is None or j is None:
+            return [], None, []
+
+        distancias, predecesores, costos_tramo = arbol
+        if exigir_costera:
+            j = self.numero_nodos + j  # Estado del destino en la capa costera
+        if distancias[j] == float('inf'):
+            return [], None, []
+
+        # Los estados de la capa costera se traducen a su nodo (módulo n)
+        estados = self.reconstruir_camino(predecesores, j)
+        return ([self.nombres[k % self.numero_nodos] for k in estados],
+                float(distancias[j]),
+                [float(costos_tramo[k]) for k in estados[1:]])
+
+    def camino_mas_corto(self, origen, destino, es_costera=None):
+        """
+        Calcula el camino más corto entre dos ciudades identificadas por nombre.
+
+        Args:
+            origen (str): Nombre de la ciudad origen
+            destino (str): Nombre de la ciudad destino
+            es_costera (np.ndarray, optional): Máscara de nodos costeros. Si se
+                                               indica, el camino debe pasar por
+                                               al menos una ciudad costera
+
+        Returns:
+            tuple: (camino, costo, costos_tramos) con la lista de nombres de
+                   ciudades, el costo total y el costo de cada tramo, o
+                   ([], None, []) si no existe camino
+        """
+        arbol = self.arbol(origen, es_costera, destino)
+        return self.camino_en_arbol(arbol, destino, es_costera is not None)
@@ -13,9 +13,28 @@ IMPORTANTE: Este sistema maneja grafos NO DIRIGIDOS (undirected graphs).
 
 Funcionalidades principales:
 - Construcción de grafos desde base de datos
+- Carga masiva de aristas con una sola consulta
+- Caché del grafo asociada a la versión de la red
+- Motor de grafos seleccionable por configuración (NetworkX o CSR)
+- Matriz precalculada de rutas entre todos los pares de ciudades
+- Caché LRU de árboles de caminos más cortos por ciudad de origen
+- Cálculo de rutas por lotes sobre una misma instantánea de la red
+- Matrices de costos origen × destino entre conjuntos de ciudades
 - Algoritmo de Dijkstra para rutas óptimas
-- Visualización de grafos y caminos
+- Rutas óptimas que pasan obligatoriamente por una ciudad costera
+- Posiciones del grafo persistidas y reutilizadas por todas las visualizaciones
+- Visualización de grafos y caminos por capas (red base en caché + resaltado)
+- Caché de imágenes PNG acotada por bytes
+- Renderizado opcional en procesos trabajadores dedicados
+- Caché de reportes PDF de rutas acotada por bytes (memoria y disco)
+- Resultados de rutas recientes identificados por un token opaco
+- Diagrama vectorial de rutas para los reportes PDF (sin Matplotlib)
+- Representación JSON compacta de la red para el renderizado en el cliente (SVG)
+- Niveles de detalle: vista agregada por provincias, detalle de una provincia
+  y subgrafo local alrededor de un camino resaltado
 - Estadísticas del sistema de rutas
+- Analítica de la red (costo promedio, diámetro, excentricidad, intermediación)
+  calculada en segundo plano por cada versión de la red
 - Validaciones de ciudades
 
 Autor: Joaquín Bermeo
@@ -24,11 +43,103 @@ Fecha: Julio 2025
 
 import matplotlib
 matplotlib.use('Agg')  # Backend sin interfaz gráfica para uso en servidor
-import matplotlib.pyplot as plt
 import networkx as nx
 import io
+import heapq
+import hashlib
+import json
+from collections import namedtuple
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from flask import current_app
+from sqlalchemy.orm import aliased
+from extensions import db
 from models import Ciudad
 from models import Ruta
+from models import Provincia
+from utils.version_red import CacheVersionado, obtener_version_red
+from utils.grafo_csr import GrafoCSR
+from utils import matriz_rutas
+from utils.cache_lru import CacheLRUVersionado
+from utils import layout_grafo
+from utils import render_grafo
+from utils import diagrama_pdf
+from utils import analitica_red
+from utils.cache_bytes import CacheBytesLRU
+from utils.resultados_rutas import AlmacenResultados
+from utils import pool_render
+
+# Cachés por versión de la red (se reconstruyen solo cuando la red cambia)
+_cache_grafo = CacheVersionado()
+_cache_grafo_csr = CacheVersionado()
+_cache_costeras = CacheVersionado()
+_cache_instantanea = CacheVersionado()
+_cache_ciudades = CacheVersionado()
+_cache_posiciones = CacheVersionado()
+_cache_capa_base = CacheVersionado()
+_cache_huella = CacheVersionado()
+_cache_red_json = CacheVersionado()
+_cache_vista_provincias = CacheVersionado()
+
+# Instantánea coherente de la red usada para calcular rutas:
+# versión, motor, grafo del motor, ciudades costeras y máscara costera (solo CSR)
+InstantaneaRed = namedtuple('InstantaneaRed', 'version motor grafo costeras mascara_costera')
+
+# Caché LRU de árboles de caminos más cortos (se crea con la capacidad configurada)
+_cache_arboles = None
+
+# Caché de imágenes PNG renderizadas, acotada por bytes (se crea con la configuración)
+_cache_imagenes = None
+
+# Caché de reportes PDF de rutas, acotada por bytes (se crea con la configuración)
+_cache_pdf = None
+
+# Resultados de rutas recientes identificados por token (se crea con la configuración)
+_almacen_resultados = None
+
+
+def cargar_aristas(ciudad_id=None):
+    """
+    Carga todas las aristas del grafo con una única consulta a la base de datos.
+    
+    Realiza un JOIN entre rutas y ciudades (origen y destino) seleccionando
+    solo las columnas necesarias, sin construir objetos del ORM. Esto evita
+    las consultas adicionales por cada ruta que provocan las relaciones
+    perezosas (lazy) al acceder a ruta.ciudad_origen y ruta.ciudad_destino.
+    
+    Args:
+        ciudad_id (int, optional): Si se indica, solo carga las rutas conectadas
+                                   a esa ciudad (en cualquier dirección)
+        
+    Returns:
+        list: Lista de tuplas (origen_id, destino_id, origen_nombre, destino_nombre, costo)
+    """
+    # Alias para unir la tabla de ciudades dos veces (origen y destino)
+    CiudadOrigen = aliased(Ciudad)
+    CiudadDestino = aliased(Ciudad)
+    
+    consulta = db.session.query(
+        Ruta.ciudad_origen_id,
+        Ruta.ciudad_destino_id,
+        CiudadOrigen.nombre,
+        CiudadDestino.nombre,
+        Ruta.costo
+    ).join(
+        CiudadOrigen, Ruta.ciudad_origen_id == CiudadOrigen.id
+    ).join(
+        CiudadDestino, Ruta.ciudad_destino_id == CiudadDestino.id
+    )
+    
+    # Filtrar por ciudad si se solicitó (grafo no dirigido: ambas direcciones)
+    if ciudad_id is not None:
+        consulta = consulta.filter(
+            (Ruta.ciudad_origen_id == ciudad_id) | (Ruta.ciudad_destino_id == ciudad_id)
+        )
+    
+    return [
+        (origen_id, destino_id, origen, destino, float(costo))
+        for origen_id, destino_id, origen, destino, costo in consulta.all()
+    ]
 
 
 def construir_grafo():
@@ -37,47 +148,479 @@ def construir_grafo():
     
     El grafo se crea dinámicamente obteniendo todas las rutas almacenadas
     en la base de datos. Cada ruta representa una arista bidireccional.
+    Cada nodo guarda además el ID de la ciudad en el atributo 'id'.
+    
+    Si existen rutas duplicadas entre las mismas ciudades se conserva la de
+    menor costo, igual que en el motor CSR y en la matriz precalculada, para
+    que todos los motores calculen los mismos costos y caminos.
     
     Returns:
         nx.Graph: Grafo no dirigido con ciudades como nodos y rutas como aristas ponderadas
     """
     G = nx.Graph()  # Grafo no dirigido (bidireccional)
     
-    # Obtener todas las rutas de la base de datos
-    rutas = Ruta.query.all()
-    
-    # Agregar cada ruta como arista ponderada
-    for ruta in rutas:
-        origen = ruta.ciudad_origen.nombre
-        destino = ruta.ciudad_destino.nombre
-        costo = float(ruta.costo)
-        
+    # Obtener todas las aristas con una sola consulta
+    for origen_id, destino_id, origen, destino, costo in cargar_aristas():
         # En un grafo no dirigido, una arista conecta en ambas direcciones automáticamente
+        if G.has_edge(origen, destino) and G[origen][destino]['weight'] <= costo:
+            continue  # Ya existe una ruta duplicada más barata
         G.add_edge(origen, destino, weight=costo)
+        G.nodes[origen]['id'] = origen_id
+        G.nodes[destino]['id'] = destino_id
     
     return G
 
 
+def obtener_grafo():
+    """
+    Obtiene el grafo de la red desde la caché versionada.
+    
+    El grafo se construye desde la base de datos una sola vez por cada
+    versión de la red. Las operaciones administrativas incrementan la
+    versión, lo que provoca su reconstrucción en la siguiente lectura.
+    
+    IMPORTANTE: El grafo retornado es compartido; no debe modificarse.
+    
+    Returns:
+        nx.Graph: Grafo no dirigido correspondiente a la versión actual de la red
+    """
+    return _cache_grafo.obtener(construir_grafo)
+
+
+def obtener_grafo_csr():
+    """
+    Obtiene el grafo compacto (CSR) de la red desde la caché versionada.
+    
+    Returns:
+        GrafoCSR: Grafo en arreglos de NumPy correspondiente a la versión actual de la red
+    """
+    return _cache_grafo_csr.obtener(lambda: GrafoCSR.desde_aristas(cargar_aristas()))
+
+
+def _motor_grafo():
+    """
+    Obtiene el motor de grafos configurado para el cálculo de rutas.
+    
+    Returns:
+        str: 'networkx' (por defecto) o 'csr'
+    """
+    return current_app.config.get('MOTOR_GRAFO', 'networkx')
+
+
 def obtener_ciudades_costeras():
     """
     Obtiene el conjunto de ciudades costeras desde la base de datos.
     
+    El conjunto se almacena en caché junto con la versión de la red.
+    
     Returns:
-        set: Conjunto con los nombres de las ciudades costeras
+        frozenset: Conjunto con los nombres de las ciudades costeras
     """
-    ciudades_costeras = Ciudad.obtener_costeras()
-    return {ciudad.nombre for ciudad in ciudades_costeras}
+    def _cargar():
+        ciudades_costeras = Ciudad.obtener_costeras()
+        return frozenset(ciudad.nombre for ciudad in ciudades_costeras)
+    
+    return _cache_costeras.obtener(_cargar)
 
 
 def obtener_ciudades():
     """
     Obtiene la lista de todas las ciudades desde la base de datos.
     
+    Se consulta solo la columna del nombre, sin construir objetos del ORM.
+    
     Returns:
         list: Lista con los nombres de todas las ciudades ordenadas alfabéticamente
     """
-    ciudades = Ciudad.obtener_todas()
-    return [ciudad.nombre for ciudad in ciudades]
+    filas = db.session.query(Ciudad.nombre).order_by(Ciudad.nombre).all()
+    return [nombre for (nombre,) in filas]
+
+
+def cargar_ciudades():
+    """
+    Obtiene la tabla de ciudades con su provincia desde la caché versionada.
+    
+    Se carga con una única consulta de columnas (JOIN con provincias), sin
+    construir objetos del ORM.
+    
+    Returns:
+        list: Tuplas (id, nombre, es_costera, provincia_id, provincia_nombre)
+              ordenadas por nombre de ciudad
+    """
+    def _cargar():
+        filas = db.session.query(
+            Ciudad.id, Ciudad.nombre, Ciudad.es_costera, Ciudad.provincia_id, Provincia.nombre
+        ).join(Provincia, Ciudad.provincia_id == Provincia.id).order_by(Ciudad.nombre).all()
+        return [tuple(fila) for fila in filas]
+    
+    return _cache_ciudades.obtener(_cargar)
+
+
+def seleccionar_ciudades(criterio):
+    """
+    Selecciona un conjunto de ciudades según un criterio.
+    
+    Los filtros presentes en el criterio se combinan (todos deben cumplirse):
+    - nombres: lista de nombres de ciudades
+    - provincia: nombre de la provincia
+    - es_costera: True para ciudades costeras, False para ciudades del interior
+    Un criterio vacío selecciona todas las ciudades.
+    
+    Args:
+        criterio (dict): Filtros de selección
+        
+    Returns:
+        tuple: (nombres, desconocidas) con los nombres seleccionados ordenados
+               alfabéticamente y los nombres solicitados que no existen
+    """
+    ciudades = cargar_ciudades()
+    seleccion = ciudades
+    desconocidas = []
+    
+    if criterio.get('nombres') is not None:
+        solicitados = set(criterio['nombres'])
+        existentes = {c[1] for c in ciudades}
+        desconocidas = sorted(solicitados - existentes)
+        seleccion = [c for c in seleccion if c[1] in solicitados]
+    
+    if criterio.get('provincia') is not None:
+        seleccion = [c for c in seleccion if c[4] == criterio['provincia']]
+    
+    if criterio.get('es_costera') is not None:
+        seleccion = [c for c in seleccion if bool(c[2]) == bool(criterio['es_costera'])]
+    
+    return [c[1] for c in seleccion], desconocidas
+
+
+def calcular_matriz_costos(origenes, destinos):
+    """
+    Calcula la matriz de costos mínimos entre un conjunto de orígenes y destinos.
+    
+    Reemplaza miles de llamadas individuales a camino_optimo_con_costera por una
+    sola llamada vectorizada a scipy.sparse.csgraph.dijkstra limitada a los orígenes.
+    
+    Args:
+        origenes (list): Nombres de las ciudades de origen
+        destinos (list): Nombres de las ciudades de destino
+        
+    Returns:
+        tuple: (version, costos) con la versión de la red utilizada y la matriz
+               len(origenes) x len(destinos) de costos (infinito si no hay camino)
+    """
+    import numpy as np
+    
+    # Leer la versión antes que el grafo: el grafo nunca será más antiguo
+    version = obtener_version_red()
+    grafo = obtener_grafo_csr()
+    matriz = grafo.matriz_dispersa()
+    
+    # Las ciudades sin rutas no están en el grafo: sus costos quedan en infinito
+    filas = [i for i, nombre in enumerate(origenes) if nombre in grafo.indice_por_nombre]
+    columnas = [j for j, nombre in enumerate(destinos) if nombre in grafo.indice_por_nombre]
+    
+    sub = matriz_rutas.submatriz_costos(
+        matriz,
+        [grafo.indice_por_nombre[origenes[i]] for i in filas],
+        [grafo.indice_por_nombre[destinos[j]] for j in columnas]
+    )
+    
+    costos = np.full((len(origenes), len(destinos)), np.inf)
+    costos[np.ix_(filas, columnas)] = sub
+    return version, costos
+
+
+def _construir_posiciones():
+    """
+    Construye las posiciones de los nodos a partir de las guardadas en disco.
+    
+    Reutiliza las posiciones persistidas de las ciudades existentes, ubica
+    de forma incremental las ciudades nuevas y actualiza el archivo solo si
+    hubo cambios.
+    
+    Returns:
+        dict: Diccionario {nombre_ciudad: (x, y)}
+    """
+    G = obtener_grafo()
+    ruta_archivo = current_app.config['LAYOUT_GRAFO_ARCHIVO']
+    
+    guardadas = layout_grafo.cargar_posiciones(ruta_archivo)
+    posiciones, por_id, modificadas = layout_grafo.calcular_posiciones(G, guardadas)
+    
+    if modificadas:
+        try:
+            layout_grafo.guardar_posiciones(ruta_archivo, por_id)
+        except OSError as e:
+            # Sin archivo se sigue usando la caché en memoria de esta versión
+            print(f"No se pudieron guardar las posiciones del grafo: {e}")
+    
+    return posiciones
+
+
+def obtener_posiciones_grafo():
+    """
+    Obtiene las posiciones de los nodos del grafo para la versión actual de la red.
+    
+    Todas las visualizaciones (imágenes del grafo y diagramas de los PDF) usan
+    estas posiciones en lugar de ejecutar spring layout en cada petición.
+    
+    IMPORTANTE: El diccionario retornado es compartido; no debe modificarse.
+    
+    Returns:
+        dict: Diccionario {nombre_ciudad: (x, y)}
+    """
+    return _cache_posiciones.obtener(_construir_posiciones)
+
+
+def _construir_capa_base():
+    """
+    Renderiza la capa base de la red (ciudades, rutas y costos).
+    
+    Returns:
+        render_grafo.CapaBase: Raster RGBA de la red y geometría de sus ejes
+    """
+    return render_grafo.renderizar_base(obtener_grafo(), obtener_posiciones_grafo())
+
+
+def obtener_capa_base():
+    """
+    Obtiene la capa base de la red renderizada para la versión actual.
+    
+    La red completa se dibuja una sola vez por versión; las imágenes con
+    caminos resaltados se componen sobre esta capa.
+    
+    Returns:
+        render_grafo.CapaBase: Raster RGBA de la red y geometría de sus ejes
+    """
+    return _cache_capa_base.obtener(_construir_capa_base)
+
+
+def _construir_huella_red():
+    """
+    Calcula una huella del contenido de la red tal como se dibuja.
+    
+    La huella resume las aristas con sus costos, las posiciones de los
+    nodos y los datos de cada ciudad (si es costera y su provincia), de modo
+    que dos redes con la misma huella producen las mismas imágenes y los
+    mismos reportes aunque pertenezcan a procesos o versiones distintas.
+    
+    Returns:
+        str: Huella hexadecimal (SHA-1) del contenido de la red
+    """
+    G = obtener_grafo()
+    pos = obtener_posiciones_grafo()
+    
+    huella = hashlib.sha1()
+    for _, nombre, es_costera, _, provincia in cargar_ciudades():
+        huella.update(f'{nombre}\x1f{bool(es_costera)}\x1f{provincia}\n'.encode('utf-8'))
+    for origen, destino, costo in sorted((min(u, v), max(u, v), w) for u, v, w in G.edges(data='weight')):
+        huella.update(f'{origen}\x1f{destino}\x1f{costo!r}\n'.encode('utf-8'))
+    for nombre in sorted(pos):
+        x, y = pos[nombre]
+        huella.update(f'{nombre}\x1f{x!r}\x1f{y!r}\n'.encode('utf-8'))
+    return huella.hexdigest()
+
+
+def obtener_huella_red():
+    """
+    Obtiene la huella del contenido de la red para la versión actual.
+    
+    Returns:
+        str: Huella hexadecimal del contenido de la red
+    """
+    return _cache_huella.obtener(_construir_huella_red)
+
+
+def _obtener_cache_imagenes():
+    """
+    Obtiene la caché de imágenes PNG, creándola con la configuración de la aplicación.
+    
+    Returns:
+        CacheBytesLRU: Caché de imágenes acotada por bytes
+    """
+    global _cache_imagenes
+    if _cache_imagenes is None:
+        config = current_app.config
+        _cache_imagenes = CacheBytesLRU(
+            config.get('CACHE_IMAGENES_MAX_BYTES', 64 * 1024 * 1024),
+            directorio=config.get('CACHE_IMAGENES_DIRECTORIO'),
+            capacidad_disco_bytes=config.get('CACHE_IMAGENES_DISCO_MAX_BYTES', 0),
+            extension='.png'
+        )
+    return _cache_imagenes
+
+
+def _imagen_en_cache(vista, generar):
+    """
+    Obtiene una imagen PNG desde la caché o la genera y la almacena.
+    
+    La clave es (huella de la red, vista, tamaño de la imagen), donde la vista
+    identifica qué se dibuja: ('completa', camino), ('provincias',),
+    ('provincia', nombre) o ('local', camino).
+    
+    Args:
+        vista (tuple): Vista dibujada, incluido el camino resaltado si lo hay
+        generar (callable): Función sin argumentos que retorna el buffer PNG
+        
+    Returns:
+        io.BytesIO: Buffer con la imagen PNG
+    """
+    cache = _obtener_cache_imagenes()
+    clave = (obtener_huella_red(), vista, render_grafo.TAMANO_FIGURA, render_grafo.DPI)
+    
+    datos = cache.obtener(clave)
+    if datos is None:
+        datos = generar().getvalue()
+        cache.guardar(clave, datos)
+    
+    return io.BytesIO(datos)
+
+
+def _obtener_cache_pdf():
+    """
+    Obtiene la caché de reportes PDF, creándola con la configuración de la aplicación.
+    
+    Returns:
+        CacheBytesLRU: Caché de documentos PDF acotada por bytes
+    """
+    global _cache_pdf
+    if _cache_pdf is None:
+        config = current_app.config
+        _cache_pdf = CacheBytesLRU(
+            config.get('CACHE_PDF_MAX_BYTES', 32 * 1024 * 1024),
+            directorio=config.get('CACHE_PDF_DIRECTORIO'),
+            capacidad_disco_bytes=config.get('CACHE_PDF_DISCO_MAX_BYTES', 0),
+            extension='.pdf'
+        )
+    return _cache_pdf
+
+
+def obtener_pdf_ruta(origen, destino, exigir_costera, generar):
+    """
+    Obtiene el reporte PDF de una ruta desde la caché o lo genera y lo almacena.
+    
+    La clave es (origen, destino, modo de ruta, huella de la red). La huella
+    cubre todo el contenido de la red que aparece en el reporte (rutas,
+    costos, ciudades costeras, provincias y posiciones del dibujo), por lo
+    que un PDF almacenado nunca contradice la red actual.
+    
+    Args:
+        origen (str): Ciudad de origen
+        destino (str): Ciudad de destino
+        exigir_costera (bool): Si la ruta debe pasar por una ciudad costera
+        generar (callable): Función sin argumentos que retorna los bytes del PDF,
+                            o None si la ruta no existe
+        
+    Returns:
+        bytes: Contenido del PDF o None si la ruta no existe
+    """
+    cache = _obtener_cache_pdf()
+    clave = ('pdf', origen, destino, bool(exigir_costera), obtener_huella_red())
+    
+    datos = cache.obtener(clave)
+    if datos is None:
+        datos = generar()
+        if datos is not None:
+            cache.guardar(clave, datos)
+    
+    return datos
+
+
+def _obtener_almacen_resultados():
+    """
+    Obtiene el almacén de resultados de rutas, creándolo con la configuración de la aplicación.
+    
+    Returns:
+        AlmacenResultados: Almacén acotado de resultados con expiración
+    """
+    global _almacen_resultados
+    if _almacen_resultados is None:
+        config = current_app.config
+        _almacen_resultados = AlmacenResultados(
+            config.get('RESULTADOS_RUTAS_CAPACIDAD', 500),
+            config.get('RESULTADOS_RUTAS_EXPIRACION', 900)
+        )
+    return _almacen_resultados
+
+
+def guardar_resultado_ruta(propietario, origen, destino, exigir_costera, resultado):
+    """
+    Guarda el resultado de una ruta calculada y retorna su token.
+    
+    Junto al resultado se guarda la huella de la red con la que se calculó,
+    para no reutilizarlo si la red cambia después.
+    
+    Args:
+        propietario (str): Identificador del usuario que calculó la ruta
+        origen (str): Ciudad de origen
+        destino (str): Ciudad de destino
+        exigir_costera (bool): Si la ruta debía pasar por una ciudad costera
+        resultado (dict): Resultado de camino_optimo_con_costera
+        
+    Returns:
+        str: Token opaco del resultado
+    """
+    return _obtener_almacen_resultados().guardar(propietario, {
+        'origen': origen,
+        'destino': destino,
+        'exigir_costera': bool(exigir_costera),
+        'resultado': dict(resultado),
+        'huella': obtener_huella_red()
+    })
+
+
+def obtener_resultado_ruta(token, propietario):
+    """
+    Obtiene un resultado de ruta guardado a partir de su token.
+    
+    No consulta el grafo ni ejecuta Dijkstra: solo compara la huella guardada
+    con la de la versión actual de la red (que está en caché).
+    
+    Args:
+        token (str): Token retornado por guardar_resultado_ruta
+        propietario (str): Identificador del usuario que lo consulta
+        
+    Returns:
+        dict: Datos con origen, destino, exigir_costera y resultado, o None si el
+              token no existe, expiró, es de otro usuario o la red cambió desde el cálculo
+    """
+    if not token:
+        return None
+    
+    datos = _obtener_almacen_resultados().obtener(token, propietario)
+    if datos is None or datos['huella'] != obtener_huella_red():
+        return None
+    return datos
+
+
+def _renderizar_png(camino):
+    """
+    Renderiza la imagen PNG de la red con un camino resaltado (o sin resaltar).
+    
+    Si RENDER_WORKERS es mayor que cero la imagen se genera en el pool de
+    procesos trabajadores, con el tiempo límite RENDER_TIMEOUT; en caso
+    contrario, o si el pool falla incluso tras reintentar, se compone en
+    este proceso sobre la capa base en caché.
+    
+    Args:
+        camino (tuple): Camino a resaltar (vacío para la red completa)
+        
+    Returns:
+        io.BytesIO: Buffer con la imagen PNG
+    """
+    procesos = current_app.config.get('RENDER_WORKERS', 0)
+    if procesos > 0:
+        try:
+            datos = pool_render.renderizar(
+                procesos, current_app.config.get('RENDER_TIMEOUT', 30),
+                obtener_huella_red(), obtener_grafo(), obtener_posiciones_grafo(), camino
+            )
+            return io.BytesIO(datos)
+        except BrokenProcessPool as e:
+            # El pool falló incluso tras reintentar: se renderiza en este proceso
+            print(f"Error en los procesos de renderizado, se usa el proceso web: {e}")
+    
+    base = obtener_capa_base()
+    return render_grafo.imagen_camino(obtener_grafo(), obtener_posiciones_grafo(), base, list(camino))
 
 
 def grafo_a_imagen():
@@ -85,86 +628,478 @@ def grafo_a_imagen():
     Genera una imagen visual del grafo completo del sistema.
     
     Crea una representación gráfica usando NetworkX y Matplotlib,
-    mostrando todas las ciudades y sus conexiones.
+    mostrando todas las ciudades y sus conexiones. La imagen se obtiene
+    de la capa base renderizada en caché para la versión actual de la red,
+    y el PNG resultante se guarda en la caché de imágenes.
     
     Returns:
         io.BytesIO: Buffer con la imagen PNG del grafo
     """
-    # Construir el grafo desde la base de datos
-    G = construir_grafo()
+    return _imagen_en_cache(('completa', ()), lambda: _renderizar_png(()))
+
+
+def _construir_red_json():
+    """
+    Construye la representación JSON compacta de la red.
+    
+    Las ciudades y las rutas se serializan como listas de filas con un
+    encabezado de campos, sin repetir los nombres de las claves en cada
+    elemento, para que el contenido sea pequeño y se comprima bien con gzip.
+    
+    Returns:
+        bytes: Documento JSON codificado en UTF-8
+    """
+    G = obtener_grafo()
+    pos = obtener_posiciones_grafo()
+    
+    ciudades = []
+    for ciudad_id, nombre, es_costera, _, provincia in cargar_ciudades():
+        # Las ciudades sin rutas no forman parte del grafo dibujado ni tienen posición
+        x, y = pos.get(nombre, (None, None))
+        ciudades.append([
+            ciudad_id, nombre, bool(es_costera), provincia,
+            round(x, 4) if x is not None else None,
+            round(y, 4) if y is not None else None
+        ])
+    
+    rutas = [[G.nodes[u]['id'], G.nodes[v]['id'], costo] for u, v, costo in G.edges(data='weight')]
+    
+    datos = {
+        'ciudades': {'campos': ['id', 'nombre', 'es_costera', 'provincia', 'x', 'y'], 'filas': ciudades},
+        'rutas': {'campos': ['origen_id', 'destino_id', 'costo'], 'filas': rutas}
+    }
+    return json.dumps(datos, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def obtener_red_json():
+    """
+    Obtiene la representación JSON compacta de la red para la versión actual.
+    
+    Incluye las ciudades (ID, nombre, si es costera, provincia y posición en
+    el dibujo) y las rutas (IDs de origen y destino y costo). Se construye
+    una sola vez por versión de la red.
+    
+    Returns:
+        bytes: Documento JSON codificado en UTF-8
+    """
+    return _cache_red_json.obtener(_construir_red_json)
+
+
+def obtener_instantanea_red():
+    """
+    Obtiene la instantánea de la red para la versión actual.
+    
+    Agrupa en un solo objeto la versión, el grafo del motor configurado y las
+    ciudades costeras, de modo que un cálculo que involucra varias búsquedas
+    (por ejemplo, un lote de rutas) trabaje siempre sobre los mismos datos.
+    
+    Returns:
+        InstantaneaRed: Instantánea correspondiente a la versión actual de la red
+    """
+    def _construir():
+        # Leer la versión antes que los datos: los datos nunca serán más antiguos
+        version = obtener_version_red()
+        motor = _motor_grafo()
+        costeras = obtener_ciudades_costeras()
+        if motor == 'csr':
+            grafo = obtener_grafo_csr()
+            return InstantaneaRed(version, motor, grafo, costeras, grafo.mascara_costera(costeras))
+        return InstantaneaRed(version, motor, obtener_grafo(), costeras, None)
     
-    # Calcular posiciones de los nodos usando algoritmo spring layout
-    pos = nx.spring_layout(G, seed=8)  # seed para posiciones consistentes
+    return _cache_instantanea.obtener(_construir)
+
+
+def _matriz_vigente(instantanea):
+    """
+    Obtiene la matriz precalculada de rutas para la versión de la instantánea.
+    
+    Si la matriz aún no existe para esta versión, programa su precálculo en
+    segundo plano y retorna None para que la consulta use Dijkstra en vivo.
+    
+    Args:
+        instantanea (InstantaneaRed): Instantánea de la red
+        
+    Returns:
+        MatrizRutas: Matriz vigente o None si no está disponible
+    """
+    if not current_app.config.get('PRECALCULAR_MATRIZ_RUTAS', False):
+        return None
     
-    # Obtener los pesos de las aristas para mostrar en las etiquetas
-    pesos = nx.get_edge_attributes(G, 'weight')
+    matriz = matriz_rutas.obtener_matriz(instantanea.version)
+    if matriz is None:
+        grafo_csr = instantanea.grafo if instantanea.motor == 'csr' else obtener_grafo_csr()
+        matriz_rutas.programar_precalculo(
+            grafo_csr, instantanea.version,
+            current_app.config.get('MATRIZ_RUTAS_MAX_CIUDADES', 2000)
+        )
+    return matriz
 
-    # Crear la figura y dibujar el grafo
-    fig, ax = plt.subplots(figsize=(12, 8))
+
+def _dijkstra(G, origen, destino=None):
+    """
+    Algoritmo de Dijkstra con cola de prioridad (heap) sobre un grafo de NetworkX.
     
-    # Dibujar nodos y aristas (sin flechas porque es grafo no dirigido)
-    nx.draw(G, pos, with_labels=True, node_color='lightblue', node_size=2000, 
-            font_weight='bold')
+    En una sola pasada obtiene las distancias, el árbol de predecesores y el
+    costo del tramo (arista) con el que se llegó a cada ciudad.
     
-    # Dibujar etiquetas con los costos de las aristas
-    nx.draw_networkx_edge_labels(G, pos, edge_labels=pesos)
+    Args:
+        G (nx.Graph): Grafo no dirigido y ponderado
+        origen (str): Nombre de la ciudad origen
+        destino (str, optional): Nombre de la ciudad destino. Si se indica, la
+                                 búsqueda termina al fijar su distancia
+        
+    Returns:
+        tuple: (distancias, predecesores, costos_tramo) como diccionarios
+               indexados por nombre de ciudad
+    """
+    adyacencia = G.adj
+    distancias = {origen: 0.0}
+    predecesores = {origen: None}
+    costos_tramo = {origen: 0.0}
+    visitados = set()
+    heap = [(0.0, origen)]
     
-    # Guardar la imagen en un buffer de memoria
-    buf = io.BytesIO()
-    plt.savefig(buf, format='png')
-    buf.seek(0)
-    plt.close()  # Liberar memoria
+    while heap:
+        distancia, u = heapq.heappop(heap)
+        if u in visitados:
+            continue  # Entrada obsoleta en el heap
+        visitados.add(u)
+        
+        if u == destino:
+            break
+        
+        for v, datos in adyacencia[u].items():
+            peso = datos['weight']
+            nueva = distancia + peso
+            if nueva < distancias.get(v, float('inf')):
+                distancias[v] = nueva
+                predecesores[v] = u
+                costos_tramo[v] = peso
+                heapq.heappush(heap, (nueva, v))
     
-    return buf
+    return distancias, predecesores, costos_tramo
 
 
-def camino_optimo_con_costera(origen='Ibarra', destino='Loja'):
+def _dijkstra_costera(G, origen, costeras, destino=None):
+    """
+    Dijkstra sobre el grafo de estados de dos capas para exigir paso por la costa.
+    
+    Cada estado es una tupla (ciudad, capa): la capa 0 indica que aún no se ha
+    visitado ninguna ciudad costera y la capa 1 que ya se visitó al menos una.
+    Llegar a una ciudad costera lleva siempre a la capa 1. El camino más corto
+    al estado (destino, 1) es la ruta más barata que pasa por la costa, y se
+    obtiene con una sola búsqueda sin importar cuántas ciudades costeras existan.
+    
+    Args:
+        G (nx.Graph): Grafo no dirigido y ponderado
+        origen (str): Nombre de la ciudad origen
+        costeras (set): Conjunto de nombres de ciudades costeras
+        destino (str, optional): Nombre de la ciudad destino. Si se indica, la
+                                 búsqueda termina al fijar el estado (destino, 1)
+        
+    Returns:
+        tuple: (distancias, predecesores, costos_tramo) como diccionarios
+               indexados por estado (ciudad, capa)
+    """
+    adyacencia = G.adj
+    inicio = (origen, 1 if origen in costeras else 0)
+    objetivo = (destino, 1) if destino is not None else None
+    distancias = {inicio: 0.0}
+    predecesores = {inicio: None}
+    costos_tramo = {inicio: 0.0}
+    visitados = set()
+    heap = [(0.0, inicio)]
+    
+    while heap:
+        distancia, estado = heapq.heappop(heap)
+        if estado in visitados:
+            continue  # Entrada obsoleta en el heap
+        visitados.add(estado)
+        
+        if estado == objetivo:
+            break
+        
+        u, capa = estado
+        for v, datos in adyacencia[u].items():
+            siguiente = (v, 1 if capa or v in costeras else 0)
+            peso = datos['weight']
+            nueva = distancia + peso
+            if nueva < distancias.get(siguiente, float('inf')):
+                distancias[siguiente] = nueva
+                predecesores[siguiente] = estado
+                costos_tramo[siguiente] = peso
+                heapq.heappush(heap, (nueva, siguiente))
+    
+    return distancias, predecesores, costos_tramo
+
+
+def _reconstruir_camino(predecesores, costos_tramo, destino):
+    """
+    Reconstruye el camino y los costos por tramo recorriendo el árbol de predecesores.
+    
+    Funciona tanto con ciudades como con estados (ciudad, capa) de la
+    búsqueda costera.
+    
+    Args:
+        predecesores (dict): Predecesor de cada ciudad o estado (None para el origen)
+        costos_tramo (dict): Costo de la arista con la que se llegó a cada ciudad o estado
+        destino (str|tuple): Ciudad o estado destino
+        
+    Returns:
+        tuple: (camino, costos_tramos) desde el origen hasta el destino
+    """
+    camino = [destino]
+    tramos = []
+    actual = destino
+    while predecesores[actual] is not None:
+        tramos.append(costos_tramo[actual])
+        actual = predecesores[actual]
+        camino.append(actual)
+    camino.reverse()
+    tramos.reverse()
+    return camino, tramos
+
+
+def _resultado_ruta(camino, costo, costos_tramos, costeras, exigir_costera=False):
+    """
+    Construye el diccionario de resultado de una ruta.
+    
+    Args:
+        camino (list): Lista de nombres de ciudades de la ruta (vacía si no hay ruta)
+        costo (float): Costo total de la ruta o None
+        costos_tramos (list): Costo de cada tramo de la ruta
+        costeras (set): Conjunto de nombres de ciudades costeras
+        exigir_costera (bool): Si la ruta se calculó exigiendo paso por la costa
+        
+    Returns:
+        dict: Resultado con camino, costo, costos por tramo, validez y ciudades costeras
+    """
+    # Un único recorrido del camino para detectar las ciudades costeras
+    # (sin repetir ciudades si la ruta regresa por la misma ciudad)
+    costeras_en_ruta = list(dict.fromkeys(c for c in camino if c in costeras))
+    return {
+        "camino": camino,
+        "costo": costo,
+        "costos_tramos": costos_tramos,
+        "valido": bool(costeras_en_ruta),
+        "ciudades_costeras_en_ruta": costeras_en_ruta,
+        "exigir_costera": exigir_costera
+    }
+
+
+def _obtener_cache_arboles():
+    """
+    Obtiene la caché LRU de árboles de rutas, creándola con la capacidad configurada.
+    
+    Returns:
+        CacheLRUVersionado: Caché de árboles de caminos más cortos
+    """
+    global _cache_arboles
+    if _cache_arboles is None:
+        _cache_arboles = CacheLRUVersionado(current_app.config.get('CACHE_ARBOLES_CAPACIDAD', 64))
+    return _cache_arboles
+
+
+def obtener_arbol_rutas(origen, exigir_costera=False, instantanea=None):
+    """
+    Obtiene el árbol completo de caminos más cortos desde una ciudad de origen.
+    
+    Los árboles (distancias y predecesores de todas las ciudades) se guardan en
+    una caché LRU con clave (ID de ciudad de origen, versión de la red), por lo
+    que cualquier consulta posterior desde el mismo origen hacia cualquier
+    destino se resuelve recorriendo predecesores, sin ejecutar Dijkstra.
+    
+    Args:
+        origen (str): Nombre de la ciudad origen
+        exigir_costera (bool): Si es True, usa la búsqueda de dos capas (costera)
+        instantanea (InstantaneaRed, optional): Instantánea de la red a usar.
+                                                Por defecto, la de la versión actual
+        
+    Returns:
+        tuple: (distancias, predecesores, costos_tramo) en el formato del motor
+               de la instantánea, o None si el origen no tiene rutas
+    """
+    if instantanea is None:
+        instantanea = obtener_instantanea_red()
+    grafo = instantanea.grafo
+    
+    if instantanea.motor == 'csr':
+        indice = grafo.indice_por_nombre.get(origen)
+        if indice is None:
+            return None
+        ciudad_id = int(grafo.ids[indice])
+    else:
+        if origen not in grafo:
+            return None
+        ciudad_id = grafo.nodes[origen]['id']
+    
+    cache = _obtener_cache_arboles()
+    arbol = cache.obtener((ciudad_id, exigir_costera), instantanea.version)
+    if arbol is not None:
+        return arbol
+    
+    # Calcular el árbol completo (sin destino) para reutilizarlo con cualquier destino
+    if instantanea.motor == 'csr':
+        arbol = grafo.arbol(origen, instantanea.mascara_costera if exigir_costera else None)
+    elif exigir_costera:
+        arbol = _dijkstra_costera(grafo, origen, instantanea.costeras)
+    else:
+        arbol = _dijkstra(grafo, origen)
+    
+    cache.guardar((ciudad_id, exigir_costera), instantanea.version, arbol)
+    return arbol
+
+
+def _camino_en_arbol(instantanea, arbol, destino, exigir_costera=False):
+    """
+    Reconstruye el camino hacia un destino a partir de un árbol de rutas.
+    
+    Args:
+        instantanea (InstantaneaRed): Instantánea con la que se calculó el árbol
+        arbol (tuple): Árbol retornado por obtener_arbol_rutas()
+        destino (str): Nombre de la ciudad destino
+        exigir_costera (bool): Si el árbol proviene de la búsqueda costera
+        
+    Returns:
+        tuple: (camino, costo, costos_tramos) o ([], None, []) si no existe camino
+    """
+    if arbol is None:
+        return [], None, []
+    
+    if instantanea.motor == 'csr':
+        return instantanea.grafo.camino_en_arbol(arbol, destino, exigir_costera)
+    
+    distancias, predecesores, costos_tramo = arbol
+    objetivo = (destino, 1) if exigir_costera else destino
+    if objetivo not in distancias:
+        return [], None, []
+    
+    camino, tramos = _reconstruir_camino(predecesores, costos_tramo, objetivo)
+    if exigir_costera:
+        camino = [ciudad for ciudad, _ in camino]  # Estados (ciudad, capa) → ciudades
+    return camino, distancias[objetivo], tramos
+
+
+def _calcular_ruta(instantanea, origen, destino, exigir_costera=False):
+    """
+    Calcula una ruta sobre una instantánea de la red.
+    
+    Args:
+        instantanea (InstantaneaRed): Instantánea de la red
+        origen (str): Nombre de la ciudad origen
+        destino (str): Nombre de la ciudad destino
+        exigir_costera (bool): Si es True, la ruta debe pasar por una ciudad costera
+        
+    Returns:
+        dict: Resultado con el formato de camino_optimo_con_costera()
+    """
+    # Ruta libre: reconstruir desde la matriz precalculada si está disponible
+    if not exigir_costera:
+        matriz = _matriz_vigente(instantanea)
+        if matriz is not None:
+            camino, costo, tramos = matriz.camino_mas_corto(origen, destino)
+            return _resultado_ruta(camino, costo, tramos, instantanea.costeras, exigir_costera)
+
+    # Recorrer el árbol de caminos más cortos del origen (desde la caché LRU)
+    arbol = obtener_arbol_rutas(origen, exigir_costera, instantanea)
+    camino, costo, tramos = _camino_en_arbol(instantanea, arbol, destino, exigir_costera)
+    return _resultado_ruta(camino, costo, tramos, instantanea.costeras, exigir_costera)
+
+
+def camino_optimo_con_costera(origen='Ibarra', destino='Loja', exigir_costera=False):
     """
     Calcula el camino óptimo entre dos ciudades usando el algoritmo de Dijkstra.
     
     Esta función implementa la lógica principal del sistema: encontrar la ruta
     más corta entre dos puntos y verificar si pasa por ciudades costeras.
+    El camino, el costo total y los costos por tramo se obtienen de una
+    única búsqueda.
+    
+    Las rutas libres se reconstruyen desde la matriz precalculada de todos
+    los pares cuando está disponible para la versión actual de la red. En
+    otro caso se recorre el árbol de caminos más cortos del origen, que se
+    reutiliza desde la caché LRU de árboles.
+    
+    Con exigir_costera=True se calcula la ruta más barata que pasa por al
+    menos una ciudad costera, usando una búsqueda sobre un grafo de estados
+    de dos capas (una sola ejecución de Dijkstra).
     
     Args:
         origen (str): Nombre de la ciudad origen
         destino (str): Nombre de la ciudad destino
+        exigir_costera (bool): Si es True, la ruta debe pasar por una ciudad costera
         
     Returns:
         dict: Diccionario con el camino, costo, validez y ciudades costeras
               - camino: Lista de ciudades en la ruta óptima
               - costo: Costo total de la ruta
+              - costos_tramos: Costo de cada tramo de la ruta
               - valido: True si pasa por al menos una ciudad costera
               - ciudades_costeras_en_ruta: Lista de ciudades costeras en la ruta
+              - exigir_costera: Modo de cálculo utilizado
     """
-    # Construir el grafo desde la base de datos
-    G = construir_grafo()
-    
-    # Obtener conjunto de ciudades costeras
-    costeras = obtener_ciudades_costeras()
+    return _calcular_ruta(obtener_instantanea_red(), origen, destino, exigir_costera)
 
-    try:
-        # Aplicar algoritmo de Dijkstra para encontrar el camino más corto
-        camino = nx.dijkstra_path(G, origen, destino, weight='weight')
-        costo = nx.dijkstra_path_length(G, origen, destino, weight='weight')
 
-        # Verificar si el camino pasa por al menos una ciudad costera
-        contiene_costera = any(ciudad in costeras for ciudad in camino)
+def calcular_rutas_lote(pares, exigir_costera=False):
+    """
+    Calcula las rutas de muchos pares origen/destino sobre una misma instantánea.
+    
+    Los pares se agrupan por ciudad de origen y se ejecuta (o se reutiliza de la
+    caché) una sola búsqueda de origen único por cada origen distinto; cada
+    destino se resuelve recorriendo el árbol de predecesores.
+    
+    Args:
+        pares (list): Lista de tuplas (origen, destino) con nombres de ciudades
+        exigir_costera (bool): Si es True, las rutas deben pasar por una ciudad costera
         
-        # Retornar resultado estructurado
-        return {
-            "camino": camino,
-            "costo": costo,
-            "valido": contiene_costera,
-            "ciudades_costeras_en_ruta": [c for c in camino if c in costeras]
-        }
-    except nx.NetworkXNoPath:
-        # Manejar caso donde no existe camino entre origen y destino
-        return {
-            "camino": [],
-            "costo": None,
-            "valido": False,
-            "ciudades_costeras_en_ruta": []
-        }
+    Returns:
+        tuple: (version, resultados) con la versión de la red utilizada y un
+               diccionario {(origen, destino): resultado} con el formato de
+               camino_optimo_con_costera()
+    """
+    instantanea = obtener_instantanea_red()
+    
+    # Agrupar destinos por origen para una sola búsqueda por origen
+    destinos_por_origen = {}
+    for origen, destino in pares:
+        destinos_por_origen.setdefault(origen, []).append(destino)
+    
+    resultados = {}
+    matriz = None if exigir_costera else _matriz_vigente(instantanea)
+    for origen, destinos in destinos_por_origen.items():
+        arbol = None if matriz is not None else obtener_arbol_rutas(origen, exigir_costera, instantanea)
+        for destino in destinos:
+            if matriz is not None:
+                camino, costo, tramos = matriz.camino_mas_corto(origen, destino)
+            else:
+                camino, costo, tramos = _camino_en_arbol(instantanea, arbol, destino, exigir_costera)
+            resultados[(origen, destino)] = _resultado_ruta(
+                camino, costo, tramos, instantanea.costeras, exigir_costera
+            )
+    
+    return instantanea.version, resultados
+
+
+def estadisticas_cache_rutas():
+    """
+    Obtiene el estado de las cachés del cálculo de rutas.
+    
+    Returns:
+        dict: Versión de la red, disponibilidad de la matriz precalculada y
+              estadísticas (entradas, aciertos, tasa de aciertos) de las cachés
+              de árboles de rutas, de imágenes y de reportes PDF, y número de
+              resultados de rutas guardados por token
+    """
+    version = obtener_version_red()
+    return {
+        'version_red': version,
+        'matriz_precalculada': matriz_rutas.obtener_matriz(version) is not None,
+        'arboles_rutas': _obtener_cache_arboles().estadisticas(),
+        'imagenes': _obtener_cache_imagenes().estadisticas(),
+        'pdf': _obtener_cache_pdf().estadisticas(),
+        'resultados_rutas': len(_obtener_almacen_resultados())
+    }
 
 
 def grafo_a_imagen_camino(camino):
@@ -172,7 +1107,10 @@ def grafo_a_imagen_camino(camino):
     Genera una imagen del grafo con un camino específico resaltado.
     
     Útil para visualizar la ruta óptima encontrada por el algoritmo de Dijkstra,
-    destacándola en color diferente sobre el grafo completo.
+    destacándola en color diferente sobre el grafo completo. Solo se dibuja
+    el camino (aristas en rojo y ciudades en naranja) sobre una capa
+    transparente que se compone encima de la capa base en caché. El PNG
+    resultante se guarda en la caché de imágenes.
     
     Args:
         camino (list): Lista de nombres de ciudades que forman la ruta
@@ -180,43 +1118,259 @@ def grafo_a_imagen_camino(camino):
     Returns:
         io.BytesIO: Buffer con la imagen PNG del grafo con camino resaltado
     """
-    # Construir el grafo desde la base de datos
-    G = construir_grafo()
+    # Un camino de menos de dos ciudades no resalta nada: es la imagen de la red completa
+    clave_camino = tuple(camino) if camino and len(camino) > 1 else ()
+    
+    return _imagen_en_cache(('completa', clave_camino), lambda: _renderizar_png(clave_camino))
+
+
+def _construir_vista_provincias():
+    """
+    Construye el grafo agregado por provincias.
+    
+    Cada provincia es un nodo ubicado en el centroide de las posiciones de
+    sus ciudades, y dos provincias se conectan si existe alguna ruta entre
+    sus ciudades, con el costo mínimo entre todas esas rutas.
+    
+    Returns:
+        tuple: (grafo de provincias, posiciones {provincia: (x, y)})
+    """
+    G = obtener_grafo()
+    pos = obtener_posiciones_grafo()
+    provincia_de = {nombre: provincia for _, nombre, _, _, provincia in cargar_ciudades()}
+    
+    P = nx.Graph()
+    sumas = {}
+    for nombre in G.nodes:
+        provincia = provincia_de.get(nombre, 'Sin provincia')
+        P.add_node(provincia)
+        x, y = pos[nombre]
+        suma_x, suma_y, cantidad = sumas.get(provincia, (0.0, 0.0, 0))
+        sumas[provincia] = (suma_x + x, suma_y + y, cantidad + 1)
+    
+    for u, v, costo in G.edges(data='weight'):
+        pu = provincia_de.get(u, 'Sin provincia')
+        pv = provincia_de.get(v, 'Sin provincia')
+        if pu != pv and (not P.has_edge(pu, pv) or costo < P[pu][pv]['weight']):
+            P.add_edge(pu, pv, weight=costo)
+    
+    posiciones = {provincia: (suma_x / cantidad, suma_y / cantidad)
+                  for provincia, (suma_x, suma_y, cantidad) in sumas.items()}
+    return P, posiciones
+
+
+def obtener_vista_provincias():
+    """
+    Obtiene el grafo agregado por provincias para la versión actual de la red.
+    
+    IMPORTANTE: El grafo y las posiciones retornados son compartidos; no deben modificarse.
+    
+    Returns:
+        tuple: (grafo de provincias, posiciones {provincia: (x, y)})
+    """
+    return _cache_vista_provincias.obtener(_construir_vista_provincias)
+
+
+def _imagen_subgrafo(G, pos, camino=()):
+    """
+    Renderiza un grafo pequeño (vista de detalle) con un camino opcional resaltado.
+    
+    Args:
+        G (nx.Graph): Grafo a dibujar
+        pos (dict): Posiciones de los nodos {nombre: (x, y)}
+        camino (tuple): Camino a resaltar (vacío para no resaltar)
+        
+    Returns:
+        io.BytesIO: Buffer con la imagen PNG
+    """
+    base = render_grafo.renderizar_base(G, pos)
+    return render_grafo.imagen_camino(G, pos, base, list(camino))
+
+
+def grafo_a_imagen_provincias():
+    """
+    Genera la imagen de la vista general agregada por provincias.
     
-    # Calcular posiciones consistentes de los nodos
-    pos = nx.spring_layout(G, seed=8)
+    El costo de dibujo depende del número de provincias y no del número de
+    ciudades, por lo que es la vista adecuada para redes grandes.
     
-    # Obtener pesos de las aristas para etiquetas
-    pesos = nx.get_edge_attributes(G, 'weight')
+    Returns:
+        io.BytesIO: Buffer con la imagen PNG de la vista por provincias
+    """
+    def generar():
+        P, posiciones = obtener_vista_provincias()
+        return _imagen_subgrafo(P, posiciones)
+    
+    return _imagen_en_cache(('provincias',), generar)
 
-    # Crear figura con fondo blanco
-    fig, ax = plt.subplots(figsize=(12, 8), facecolor='white')
 
-    # Dibujar todos los nodos y aristas en colores base
-    nx.draw(G, pos, with_labels=True, node_color='lightblue', node_size=2000, 
-            font_weight='bold', ax=ax)
-    nx.draw_networkx_edge_labels(G, pos, edge_labels=pesos, ax=ax)
+def grafo_a_imagen_provincia(provincia):
+    """
+    Genera la imagen de detalle de una provincia (sus ciudades y rutas internas).
+    
+    Args:
+        provincia (str): Nombre de la provincia
+        
+    Returns:
+        io.BytesIO: Buffer con la imagen PNG o None si la provincia no tiene
+                    ciudades en la red
+    """
+    ciudades = [nombre for _, nombre, _, _, nombre_provincia in cargar_ciudades()
+                if nombre_provincia == provincia]
+    G = obtener_grafo()
+    nodos = [nombre for nombre in ciudades if nombre in G]
+    if not nodos:
+        return None
+    
+    def generar():
+        pos = obtener_posiciones_grafo()
+        return _imagen_subgrafo(G.subgraph(nodos), {nombre: pos[nombre] for nombre in nodos})
+    
+    return _imagen_en_cache(('provincia', provincia), generar)
 
-    # Si hay camino proporcionado, resaltarlo en el grafo
-    if camino and len(camino) > 1:
-        # Crear lista de aristas que forman el camino
-        edges_camino = list(zip(camino[:-1], camino[1:]))
+
+def grafo_a_imagen_camino_local(camino):
+    """
+    Genera la imagen de un camino resaltado sobre el subgrafo local que lo rodea.
+    
+    Solo se dibujan las ciudades del camino y sus vecinas directas, con las
+    posiciones persistidas de la red completa, de modo que el costo depende
+    de la longitud del camino y no del tamaño de la red.
+    
+    Args:
+        camino (list): Lista de nombres de ciudades que forman la ruta
         
-        # Dibujar las aristas del camino en color rojo y más gruesas
-        nx.draw_networkx_edges(G, pos, edgelist=edges_camino, edge_color='red', 
-                            width=4, ax=ax)
+    Returns:
+        io.BytesIO: Buffer con la imagen PNG del subgrafo con el camino resaltado
+    """
+    clave_camino = tuple(camino) if camino and len(camino) > 1 else ()
+    
+    def generar():
+        G = obtener_grafo()
+        pos = obtener_posiciones_grafo()
+        nodos = set(clave_camino)
+        for nombre in clave_camino:
+            nodos.update(G.neighbors(nombre))
+        sub = G.subgraph(nodos)
+        return _imagen_subgrafo(sub, {nombre: pos[nombre] for nombre in sub}, clave_camino)
+    
+    return _imagen_en_cache(('local', clave_camino), generar)
+
+
+def diagrama_pdf_camino(camino, ancho=diagrama_pdf.ANCHO_DIAGRAMA, alto=diagrama_pdf.ALTO_DIAGRAMA):
+    """
+    Genera el diagrama vectorial de un camino para insertarlo en un reporte PDF.
+    
+    Usa el grafo y las posiciones en caché de la versión actual de la red.
+    En redes grandes (ver usar_vista_reducida) solo se dibuja el camino con
+    sus ciudades vecinas, igual que la imagen local del camino. Los nombres
+    del camino que no están en la red no se dibujan.
+    
+    Args:
+        camino (list): Lista de nombres de ciudades que forman la ruta
+        ancho (float): Ancho del diagrama en puntos
+        alto (float): Alto del diagrama en puntos
         
-        # Resaltar los nodos del camino en color naranja y más grandes
-        nx.draw_networkx_nodes(G, pos, nodelist=camino, node_color='orange', 
-                            node_size=2200, ax=ax)
+    Returns:
+        Drawing: Diagrama de ReportLab con la ruta resaltada en rojo
+    """
+    G = obtener_grafo()
+    pos = obtener_posiciones_grafo()
+    
+    if usar_vista_reducida():
+        # Las ciudades del camino que no existen en la red se ignoran
+        nodos = {nombre for nombre in camino if nombre in G}
+        for nombre in list(nodos):
+            nodos.update(G.neighbors(nombre))
+        G = G.subgraph(nodos)
+    
+    return diagrama_pdf.diagrama_camino(G, {nombre: pos[nombre] for nombre in G}, list(camino), ancho, alto)
+
+
+def usar_vista_reducida():
+    """
+    Indica si la red es lo bastante grande como para usar las vistas reducidas por defecto.
+    
+    Returns:
+        bool: True si el número de ciudades del grafo supera LOD_UMBRAL_CIUDADES
+    """
+    return obtener_grafo().number_of_nodes() > current_app.config.get('LOD_UMBRAL_CIUDADES', 150)
+
+
+def _red_para_analitica():
+    """
+    Obtiene la versión actual de la red y su grafo CSR para la analítica.
+    
+    Returns:
+        tuple: (versión, GrafoCSR)
+    """
+    version = obtener_version_red()
+    return version, obtener_grafo_csr()
+
+
+def programar_analitica_red():
+    """
+    Programa el cálculo en segundo plano de la analítica de la red actual.
+    
+    Las operaciones administrativas lo llaman después de modificar la red;
+    si ya hay un cálculo en curso, las solicitudes se agrupan en uno solo.
+    """
+    analitica_red.programar_analisis(
+        current_app._get_current_object(), obtener_version_red(), _red_para_analitica,
+        current_app.config.get('ANALITICA_PROCESOS', 2)
+    )
 
-    # Guardar la imagen en un buffer de memoria
-    buf = io.BytesIO()
-    plt.savefig(buf, format='png', facecolor=fig.get_facecolor())
-    buf.seek(0)
-    plt.close()  # Liberar memoria
+
+def obtener_analitica_red():
+    """
+    Obtiene la analítica de la versión actual de la red sin esperar su cálculo.
     
-    return buf
+    Si todavía no existe para esta versión (por ejemplo, tras reiniciar la
+    aplicación), programa su cálculo y retorna None.
+    
+    Returns:
+        AnaliticaRed: Métricas vigentes o None si se están calculando
+    """
+    analitica = analitica_red.obtener_analitica(obtener_version_red())
+    if analitica is None:
+        programar_analitica_red()
+    return analitica
+
+
+def resumen_analitica_red():
+    """
+    Obtiene un resumen serializable a JSON de la analítica y del estado de su cálculo.
+    
+    Returns:
+        dict: Estado del cálculo ('lista' o 'calculando'), progreso y, si está
+              disponible, costo promedio, diámetro, radio, ciudades centrales y
+              excentricidad de cada ciudad
+    """
+    analitica = obtener_analitica_red()
+    estado = analitica_red.estado()
+    resumen = {
+        'estado': 'lista' if analitica is not None else 'calculando',
+        'version_red': obtener_version_red(),
+        'progreso': 100 if analitica is not None else estado['progreso']
+    }
+    if analitica is None:
+        return resumen
+    
+    resumen.update({
+        'calculada': datetime.fromtimestamp(analitica.calculada).strftime('%d/%m/%Y %H:%M:%S'),
+        'ciudades': analitica.ciudades,
+        'costo_promedio': round(analitica.costo_promedio, 2) if analitica.costo_promedio is not None else None,
+        'diametro': analitica.diametro,
+        'extremos_diametro': list(analitica.extremos_diametro) if analitica.extremos_diametro else None,
+        'radio': analitica.radio,
+        'ciudades_centrales': [
+            {'nombre': nombre, 'intermediacion': round(valor, 4)}
+            for nombre, valor in analitica_red.ciudades_centrales(
+                analitica, current_app.config.get('ANALITICA_CIUDADES_CENTRALES', 5))
+        ],
+        'excentricidad': analitica.excentricidad
+    })
+    return resumen
 
 
 def obtener_estadisticas_grafo():
@@ -226,51 +1380,67 @@ def obtener_estadisticas_grafo():
     Calcula métricas importantes del sistema como número de ciudades,
     conexiones, rutas posibles y ejemplos de costos promedio.
     
+    Los conteos se obtienen con una sola consulta de agregación y los nombres
+    de las ciudades como columnas sueltas. El costo promedio, el diámetro y
+    las ciudades centrales se leen de la analítica de la red calculada en
+    segundo plano; mientras se calcula, el costo promedio se estima con
+    rutas de ejemplo resueltas por el cálculo por lotes (matriz precalculada
+    o árboles de rutas en caché).
+    
     Returns:
         dict: Diccionario con todas las estadísticas del grafo
     """
-    # Obtener datos básicos desde la base de datos
-    ciudades = Ciudad.obtener_todas()
-    ciudades_costeras = Ciudad.obtener_costeras()
-    rutas = Ruta.obtener_todas()
+    # Conteos de ciudades, ciudades costeras y rutas en una sola consulta
+    total_rutas = db.session.query(db.func.count(Ruta.id)).scalar_subquery()
+    total_ciudades, total_costeras, total_conexiones = db.session.query(
+        db.func.count(Ciudad.id),
+        db.func.coalesce(db.func.sum(db.case((Ciudad.es_costera == True, 1), else_=0)), 0),
+        total_rutas
+    ).one()
     
     # En un grafo no dirigido, el número máximo de conexiones es n*(n-1)/2
-    max_conexiones_posibles = len(ciudades) * (len(ciudades) - 1) // 2 if len(ciudades) > 1 else 0
+    max_conexiones_posibles = total_ciudades * (total_ciudades - 1) // 2 if total_ciudades > 1 else 0
     
     # Calcular algunas rutas de ejemplo para estadísticas de costo
     rutas_ejemplo = []
-    ciudades_nombres = [c.nombre for c in ciudades]
+    ciudades_nombres = obtener_ciudades()
+    analitica = resumen_analitica_red()
     
-    if len(ciudades_nombres) >= 3:
+    if analitica['estado'] != 'lista' and len(ciudades_nombres) >= 3:
         # Usar las primeras ciudades disponibles para calcular rutas de ejemplo
         ejemplos = [
             (ciudades_nombres[0], ciudades_nombres[-1]),  # Primera a última
             (ciudades_nombres[1], ciudades_nombres[-2]) if len(ciudades_nombres) > 3 else (ciudades_nombres[0], ciudades_nombres[1]),
         ]
         
-        # Calcular rutas de ejemplo usando Dijkstra
-        for origen, destino in ejemplos:
-            try:
-                resultado = camino_optimo_con_costera(origen, destino)
-                if resultado['costo'] is not None:
-                    rutas_ejemplo.append(resultado)
-            except:
-                continue  # Ignorar errores en rutas de ejemplo
-    
-    # Calcular costo promedio de las rutas de ejemplo
+        # Calcular las rutas de ejemplo sobre la instantánea en caché de la red
+        try:
+            _, resultados = calcular_rutas_lote(ejemplos)
+            rutas_ejemplo = [resultados[par] for par in ejemplos if resultados[par]['costo'] is not None]
+        except Exception as e:
+            # Las estadísticas se muestran igual, sin costo promedio de ejemplo
+            print(f"Error calculando rutas de ejemplo para estadísticas: {e}")
+    
+    # Costo promedio de todos los pares conectados, o de las rutas de ejemplo
     costo_promedio = 0
-    if rutas_ejemplo:
+    if analitica.get('costo_promedio') is not None:
+        costo_promedio = analitica['costo_promedio']
+    elif rutas_ejemplo:
         costo_promedio = sum(r['costo'] for r in rutas_ejemplo) / len(rutas_ejemplo)
     
     # Retornar estadísticas completas
     return {
-        'total_ciudades': len(ciudades),
-        'ciudades_costeras': len(ciudades_costeras),
-        'total_conexiones': len(rutas),
+        'total_ciudades': total_ciudades,
+        'ciudades_costeras': int(total_costeras),
+        'total_conexiones': total_conexiones,
         'conexiones_posibles': max_conexiones_posibles,
         'costo_promedio': round(costo_promedio, 2),
         'ciudades': ciudades_nombres,
-        'tipo_grafo': 'No dirigido'
+        'tipo_grafo': 'No dirigido',
+        'diametro': analitica.get('diametro'),
+        'ciudades_centrales': analitica.get('ciudades_centrales', []),
+        'analitica_estado': analitica['estado'],
+        'analitica_progreso': analitica['progreso']
     }
 
 
@@ -300,6 +1470,23 @@ def validar_ciudades_existen(origen, destino):
     return True, "Ciudades válidas"
 
 
+def ciudades_fuera_de_red(nombres):
+    """
+    Obtiene los nombres que no corresponden a ciudades de la red.
+    
+    Se comprueban contra el grafo en caché de la versión actual de la red,
+    sin consultar la base de datos.
+    
+    Args:
+        nombres (list): Nombres de ciudades a comprobar
+        
+    Returns:
+        list: Nombres desconocidos, sin repetir y ordenados alfabéticamente
+    """
+    G = obtener_grafo()
+    return sorted({nombre for nombre in nombres if nombre not in G})
+
+
 def obtener_rutas_desde_ciudad(ciudad_nombre):
     """
     Obtiene todas las rutas conectadas a una ciudad específica.
@@ -317,15 +1504,11 @@ def obtener_rutas_desde_ciudad(ciudad_nombre):
     if not ciudad:
         return []
     
-    # Obtener todas las rutas que involucran esta ciudad
-    rutas = Ruta.obtener_por_ciudad(ciudad.id)
+    # Obtener todas las aristas que involucran esta ciudad con una sola consulta
     conexiones = []
-    
-    # Procesar cada ruta para obtener la ciudad conectada
-    for ruta in rutas:
-        ciudad_conectada = ruta.get_ciudad_conectada(ciudad.id)
-        if ciudad_conectada:
-            conexiones.append((ciudad_conectada.nombre, float(ruta.costo)))
+    for origen_id, destino_id, origen, destino, costo in cargar_aristas(ciudad.id):
+        # Tomar el extremo opuesto a la ciudad consultada
+        conexiones.append((destino if origen_id == ciudad.id else origen, costo))
     
     return conexiones
 
@@ -339,5 +1522,4 @@ def obtener_todas_las_conexiones():
     Returns:
         list: Lista de tuplas (origen, destino, costo) con todas las rutas
     """
-    rutas = Ruta.obtener_todas()
-    return [(ruta.ciudad_origen.nombre, ruta.ciudad_destino.nombre, float(ruta.costo)) for ruta in rutas]
+    return [(origen, destino, costo) for _, _, origen, destino, costo in cargar_aristas()]
@@ -0,0 +1,111 @@
+"""
+Posiciones Persistentes del Grafo
+================================
+
+Este módulo calcula y almacena las posiciones (layout) de los nodos del
+grafo usadas por todas las visualizaciones de la red.
+
+El algoritmo spring layout es la parte más costosa de generar una imagen
+del grafo, por lo que las posiciones se guardan en un archivo JSON indexado
+por el ID de cada ciudad y se reutilizan entre peticiones y reinicios:
+- Si no existen posiciones guardadas, se calcula el layout completo
+- Si aparecen ciudades nuevas, solo ellas se ubican de forma incremental,
+  manteniendo fijas las posiciones de las ciudades existentes
+- Las ciudades eliminadas se descartan del archivo
+
+Autor: Joaquín Bermeo
+Fecha: Julio 2025
+"""
+
+import os
+import json
+import tempfile
+import networkx as nx
+
+# Semilla del spring layout para obtener posiciones reproducibles
+SEMILLA_LAYOUT = 8
+
+
+def cargar_posiciones(ruta_archivo):
+    """
+    Carga las posiciones guardadas desde el archivo JSON.
+
+    Args:
+        ruta_archivo (str): Ruta del archivo de posiciones
+
+    Returns:
+        dict: Diccionario {ciudad_id: (x, y)}; vacío si el archivo no existe o es inválido
+    """
+    try:
+        with open(ruta_archivo, 'r', encoding='utf-8') as archivo:
+            datos = json.load(archivo)
+        return {int(ciudad_id): (float(x), float(y))
+                for ciudad_id, (x, y) in datos.get('ciudades', {}).items()}
+    except FileNotFoundError:
+        return {}
+    except (ValueError, TypeError, AttributeError) as e:
+        print(f"Archivo de posiciones inválido, se recalculará: {e}")
+        return {}
+
+
+def guardar_posiciones(ruta_archivo, posiciones):
+    """
+    Guarda las posiciones en el archivo JSON de forma atómica.
+
+    El contenido se escribe primero en un archivo temporal del mismo
+    directorio y luego se reemplaza el archivo final, para que un lector
+    concurrente nunca vea un archivo a medio escribir.
+
+    Args:
+        ruta_archivo (str): Ruta del archivo de posiciones
+        posiciones (dict): Diccionario {ciudad_id: (x, y)}
+    """
+    directorio = os.path.dirname(ruta_archivo) or '.'
+    os.makedirs(directorio, exist_ok=True)
+
+    datos = {'ciudades': {str(ciudad_id): [x, y] for ciudad_id, (x, y) in posiciones.items()}}
+    descriptor, ruta_temporal = tempfile.mkstemp(dir=directorio, suffix='.tmp')
+    try:
+        with os.fdopen(descriptor, 'w', encoding='utf-8') as archivo:
+            json.dump(datos, archivo)
+        os.replace(ruta_temporal, ruta_archivo)
+    except Exception:
+        os.unlink(ruta_temporal)
+        raise
+
+
+def calcular_posiciones(G, guardadas):
+    """
+    Calcula las posiciones de los nodos reutilizando las ya guardadas.
+
+    Los nodos con posición guardada permanecen fijos y solo los nodos nuevos
+    se ubican con spring layout. Si no hay ninguna posición reutilizable se
+    calcula el layout completo, igual que antes de persistirlo.
+
+    Args:
+        G (nx.Graph): Grafo con el ID de cada ciudad en el atributo de nodo 'id'
+        guardadas (dict): Posiciones previas {ciudad_id: (x, y)}
+
+    Returns:
+        tuple: (posiciones por nombre {nombre: (x, y)},
+                posiciones por ID {ciudad_id: (x, y)},
+                bool indicando si hubo cambios respecto a las guardadas)
+    """
+    ids = nx.get_node_attributes(G, 'id')
+
+    # Posiciones reutilizables de las ciudades que siguen en la red
+    previas = {nombre: guardadas[ids[nombre]] for nombre in G.nodes if ids.get(nombre) in guardadas}
+    nuevas = [nombre for nombre in G.nodes if nombre not in previas]
+
+    if not previas:
+        pos = nx.spring_layout(G, seed=SEMILLA_LAYOUT) if len(G) else {}
+    elif nuevas:
+        # Colocación incremental: solo se mueven las ciudades nuevas
+        pos = nx.spring_layout(G, pos=previas, fixed=list(previas), seed=SEMILLA_LAYOUT)
+    else:
+        pos = previas
+
+    posiciones = {nombre: (float(x), float(y)) for nombre, (x, y) in pos.items()}
+    por_id = {ids[nombre]: xy for nombre, xy in posiciones.items() if nombre in ids}
+
+    return posiciones, por_id, bool(nuevas) or len(por_id) != len(guardadas)
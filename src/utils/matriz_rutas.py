@@ -0,0 +1,209 @@
+"""
+Matriz Precalculada de Rutas
+===========================
+
+Este módulo precalcula, para una versión de la red, la matriz de distancias
+entre todos los pares de ciudades y la matriz de siguiente salto, usando
+scipy.sparse.csgraph sobre el grafo compacto (CSR).
+
+Con estas matrices cualquier ruta origen → destino se reconstruye con
+búsquedas en tabla (O(longitud del camino)), sin ejecutar Dijkstra.
+
+También calcula submatrices de costos origen × destino con una sola
+llamada vectorizada a scipy.sparse.csgraph.dijkstra limitada a los orígenes.
+
+El precálculo se ejecuta en un hilo en segundo plano, fuera del ciclo de
+las peticiones, y la matriz resultante se publica de forma atómica solo si
+la versión de la red no cambió mientras se calculaba. Mientras no exista
+una matriz para la versión actual, las consultas usan Dijkstra en vivo.
+
+Autor: Joaquín Bermeo
+Fecha: Julio 2025
+"""
+
+import threading
+import numpy as np
+from utils.version_red import obtener_version_red
+
+# Matriz publicada actualmente (se reemplaza completa en una sola asignación)
+_matriz_actual = None
+
+# Versión cuyo precálculo está en curso (None si no hay ninguno)
+_version_en_calculo = None
+_candado_precalculo = threading.Lock()
+
+
+class MatrizRutas:
+    """
+    Matrices de distancias (float32) y siguiente salto (int32) de todos los pares.
+
+    siguiente[i, j] es el índice del nodo al que hay que avanzar desde i para
+    seguir el camino más corto hacia j (negativo si j no es alcanzable).
+    """
+
+    def __init__(self, version, grafo, distancias, siguiente):
+        """
+        Inicializa la matriz de rutas.
+
+        Args:
+            version (int): Versión de la red con la que se calculó
+            grafo (GrafoCSR): Grafo compacto usado para el cálculo
+            distancias (np.ndarray): Matriz n x n de distancias mínimas (float32)
+            siguiente (np.ndarray): Matriz n x n de siguiente salto (int32)
+        """
+        self.version = version
+        self.grafo = grafo
+        self.distancias = distancias
+        self.siguiente = siguiente
+
+    @classmethod
+    def calcular(cls, grafo, version):
+        """
+        Calcula las matrices de todos los pares con scipy.sparse.csgraph.
+
+        Args:
+            grafo (GrafoCSR): Grafo compacto de la red
+            version (int): Versión de la red correspondiente al grafo
+
+        Returns:
+            MatrizRutas: Matrices calculadas
+        """
+        from scipy.sparse.csgraph import shortest_path
+
+        # El grafo CSR ya contiene ambas direcciones de cada ruta
+        distancias, predecesores = shortest_path(
+            grafo.matriz_dispersa(), method='D', directed=True, return_predecessors=True
+        )
+
+        # En un grafo no dirigido el siguiente salto de i hacia j es el
+        # predecesor de i en el árbol de caminos más cortos con raíz en j
+        siguiente = np.ascontiguousarray(predecesores.T, dtype=np.int32)
+
+        return cls(version, grafo, distancias.astype(np.float32), siguiente)
+
+    def camino_mas_corto(self, origen, destino):
+        """
+        Reconstruye el camino más corto entre dos ciudades por búsqueda en tabla.
+
+        Args:
+            origen (str): Nombre de la ciudad origen
+            destino (str): Nombre de la ciudad destino
+
+        Returns:
+            tuple: (camino, costo, costos_tramos) o ([], None, []) si no existe camino
+        """
+        i = self.grafo.indice_por_nombre.get(origen)
+        j = self.grafo.indice_por_nombre.get(destino)
+        if i is None or j is None or not np.isfinite(self.distancias[i, j]):
+            return [], None, []
+
+        # Avanzar salto a salto usando la matriz de siguiente salto
+        indices = [i]
+        tramos = []
+        actual = i
+        while actual != j:
+            siguiente = int(self.siguiente[actual, j])
+            tramos.append(self.grafo.peso_arista(actual, siguiente))
+            indices.append(siguiente)
+            actual = siguiente
+
+        # El costo se suma en float64 desde los tramos (la matriz guarda float32)
+        return [self.grafo.nombres[k] for k in indices], sum(tramos), tramos
+
+
+def submatriz_costos(matriz_dispersa, indices_origen, indices_destino):
+    """
+    Calcula la submatriz de costos mínimos entre un conjunto de orígenes y destinos.
+
+    Ejecuta Dijkstra vectorizado de SciPy solo desde los orígenes solicitados
+    (parámetro indices=) y selecciona las columnas de los destinos.
+
+    Args:
+        matriz_dispersa (scipy.sparse.csr_matrix): Matriz de adyacencia del grafo
+        indices_origen (list): Índices de nodo de los orígenes
+        indices_destino (list): Índices de nodo de los destinos
+
+    Returns:
+        np.ndarray: Matriz len(origenes) x len(destinos) de costos (float64),
+                    con infinito para los pares sin camino
+    """
+    from scipy.sparse.csgraph import dijkstra
+
+    if not indices_origen or not indices_destino:
+        return np.full((len(indices_origen), len(indices_destino)), np.inf)
+
+    distancias = dijkstra(matriz_dispersa, directed=True, indices=indices_origen)
+    return distancias[:, indices_destino]
+
+
+def obtener_matriz(version):
+    """
+    Obtiene la matriz publicada si corresponde a la versión indicada.
+
+    Args:
+        version (int): Versión actual de la red
+
+    Returns:
+        MatrizRutas: Matriz vigente o None si aún no está disponible
+    """
+    matriz = _matriz_actual
+    if matriz is not None and matriz.version == version:
+        return matriz
+    return None
+
+
+def programar_precalculo(grafo, version, max_ciudades):
+    """
+    Lanza el precálculo de la matriz en un hilo en segundo plano.
+
+    Si ya hay un precálculo en curso no se lanza otro; cuando termine, la
+    siguiente consulta volverá a programarlo si la versión cambió.
+
+    Args:
+        grafo (GrafoCSR): Grafo compacto de la red
+        version (int): Versión de la red correspondiente al grafo
+        max_ciudades (int): Número máximo de ciudades para precalcular
+                            (la memoria crece con el cuadrado de las ciudades)
+
+    Returns:
+        bool: True si se lanzó un nuevo precálculo
+    """
+    global _version_en_calculo
+
+    if grafo.numero_nodos > max_ciudades:
+        return False
+
+    with _candado_precalculo:
+        if _version_en_calculo is not None:
+            return False
+        _version_en_calculo = version
+
+    hilo = threading.Thread(
+        target=_ejecutar_precalculo, args=(grafo, version),
+        name=f'precalculo-rutas-v{version}', daemon=True
+    )
+    hilo.start()
+    return True
+
+
+def _ejecutar_precalculo(grafo, version):
+    """
+    Calcula la matriz y la publica si la red no cambió durante el cálculo.
+
+    Args:
+        grafo (GrafoCSR): Grafo compacto de la red
+        version (int): Versión de la red correspondiente al grafo
+    """
+    global _matriz_actual, _version_en_calculo
+
+    try:
+        matriz = MatrizRutas.calcular(grafo, version)
+
+        # Publicación atómica: una sola asignación de referencia
+        if obtener_version_red() == version:
+            _matriz_actual = matriz
+    except Exception as e:
+        print(f"Error precalculando matriz de rutas: {e}")
+    finally:
+        with _candado_precalculo:
+            _version_en_calculo = None
@@ -0,0 +1,213 @@
+"""
+Procesos Trabajadores de Renderizado
+===================================
+
+Este módulo mantiene un grupo (pool) de procesos de larga duración que
+renderizan las imágenes del grafo fuera del proceso web. El renderizado
+con Matplotlib usa CPU y retiene el GIL, por lo que ejecutarlo en procesos
+separados evita que una imagen lenta detenga las demás peticiones y permite
+aprovechar varios núcleos.
+
+Funcionamiento:
+- El proceso web publica la red (grafo y posiciones) en un archivo temporal
+  identificado por la huella de la red, una sola vez por huella
+- Cada trabajo enviado al pool lleva solo la huella, la ruta de ese archivo,
+  el camino a resaltar y el tamaño de la imagen
+- Cada proceso trabajador conserva en memoria la última red cargada y sus
+  capas base por tamaño, y solo vuelve a cargarla cuando cambia la huella
+- El resultado se devuelve como bytes PNG
+
+Los procesos se crean con el método 'spawn', que no hereda el estado del
+proceso web (conexiones, hilos, candados).
+
+Recuperación ante fallos:
+- Si un trabajador termina de forma anormal (el pool queda roto), el pool
+  se descarta y el trabajo se reintenta una vez en un pool nuevo; si vuelve
+  a fallar se propaga BrokenProcessPool para que el llamador renderice la
+  imagen en su propio proceso
+- Un trabajo que supera el tiempo límite no puede interrumpirse y sigue
+  ocupando su proceso hasta terminar. Para que los siguientes trabajos no
+  esperen detrás de él, el pool se retira: los trabajos que ya tenía
+  terminan normalmente, sus procesos se cierran al acabar y los trabajos
+  nuevos se envían a un pool nuevo
+
+Autor: Joaquín Bermeo
+Fecha: Julio 2025
+"""
+
+import os
+import atexit
+import pickle
+import shutil
+import tempfile
+import threading
+import multiprocessing
+from concurrent import futures
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from utils import render_grafo
+
+# Pool de procesos y estado de publicación de la red (solo en el proceso web)
+_pool = None
+_directorio_redes = None
+_redes_publicadas = []
+_candado_pool = threading.Lock()
+
+# Número de archivos de red que se conservan (los trabajos en curso pueden usar la anterior)
+_REDES_CONSERVADAS = 2
+
+# Red cargada en el proceso trabajador: (huella, grafo, posiciones, {tamaño: capa base})
+_red_trabajador = None
+
+
+def _obtener_pool(procesos):
+    """
+    Obtiene el pool de procesos, creándolo la primera vez (requiere el candado).
+
+    Args:
+        procesos (int): Número de procesos trabajadores
+
+    Returns:
+        ProcessPoolExecutor: Pool de procesos de renderizado
+    """
+    global _pool, _directorio_redes
+    if _pool is None:
+        _pool = ProcessPoolExecutor(
+            max_workers=procesos, mp_context=multiprocessing.get_context('spawn')
+        )
+        if _directorio_redes is None:
+            _directorio_redes = tempfile.mkdtemp(prefix='render-red-')
+    return _pool
+
+
+def _retirar_pool(pool):
+    """
+    Deja de usar un pool para los trabajos nuevos y lo cierra sin esperar.
+
+    Los trabajos que el pool ya tenía terminan normalmente (o fallan si el
+    pool está roto) y sus procesos se cierran al quedar libres.
+
+    Args:
+        pool (ProcessPoolExecutor): Pool a retirar
+    """
+    global _pool
+    with _candado_pool:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False)
+
+
+def _publicar_red(huella, G, pos):
+    """
+    Escribe la red en un archivo para los trabajadores si aún no existe (requiere el candado).
+
+    Args:
+        huella (str): Huella del contenido de la red
+        G (nx.Graph): Grafo de la red
+        pos (dict): Posiciones de los nodos {nombre: (x, y)}
+
+    Returns:
+        str: Ruta del archivo con la red serializada
+    """
+    ruta = os.path.join(_directorio_redes, f'{huella}.pickle')
+    if huella in _redes_publicadas:
+        return ruta
+
+    ruta_temporal = ruta + '.tmp'
+    with open(ruta_temporal, 'wb') as archivo:
+        pickle.dump((G, pos), archivo, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(ruta_temporal, ruta)
+    _redes_publicadas.append(huella)
+
+    # Eliminar las redes antiguas que ya no usará ningún trabajo
+    while len(_redes_publicadas) > _REDES_CONSERVADAS:
+        antigua = _redes_publicadas.pop(0)
+        try:
+            os.remove(os.path.join(_directorio_redes, f'{antigua}.pickle'))
+        except OSError:
+            pass
+
+    return ruta
+
+
+def renderizar(procesos, tiempo_limite, huella, G, pos, camino=(),
+               tamano=render_grafo.TAMANO_FIGURA, dpi=render_grafo.DPI):
+    """
+    Renderiza una imagen del grafo en un proceso trabajador.
+
+    Args:
+        procesos (int): Número de procesos del pool (se usa al crearlo)
+        tiempo_limite (float): Segundos máximos de espera por el resultado
+        huella (str): Huella del contenido de la red
+        G (nx.Graph): Grafo de la red (solo se serializa una vez por huella)
+        pos (dict): Posiciones de los nodos {nombre: (x, y)}
+        camino (tuple): Camino a resaltar (vacío para la red completa)
+        tamano (tuple): Tamaño de la imagen en pulgadas
+        dpi (int): Resolución en puntos por pulgada
+
+    Returns:
+        bytes: Imagen PNG
+
+    Raises:
+        concurrent.futures.TimeoutError: Si el trabajo no termina dentro del tiempo límite
+        BrokenProcessPool: Si el pool falla también en el reintento
+    """
+    for intento in range(2):
+        with _candado_pool:
+            pool = _obtener_pool(procesos)
+            ruta_red = _publicar_red(huella, G, pos)
+
+        try:
+            futuro = pool.submit(_trabajo_renderizado, huella, ruta_red, tuple(camino), tamano, dpi)
+            return futuro.result(timeout=tiempo_limite)
+        except BrokenProcessPool:
+            # Un trabajador terminó de forma anormal: se reintenta una vez en un pool nuevo
+            _retirar_pool(pool)
+            if intento > 0:
+                raise
+        except futures.TimeoutError:  # Solo es el TimeoutError nativo desde Python 3.11
+            # Si el trabajo ya empezó sigue ocupando su proceso: se retira el pool
+            if not futuro.cancel():
+                _retirar_pool(pool)
+            raise
+
+
+def _trabajo_renderizado(huella, ruta_red, camino, tamano, dpi):
+    """
+    Ejecuta un trabajo de renderizado dentro del proceso trabajador.
+
+    Args:
+        huella (str): Huella del contenido de la red
+        ruta_red (str): Archivo con la red serializada
+        camino (tuple): Camino a resaltar (vacío para la red completa)
+        tamano (tuple): Tamaño de la imagen en pulgadas
+        dpi (int): Resolución en puntos por pulgada
+
+    Returns:
+        bytes: Imagen PNG
+    """
+    global _red_trabajador
+
+    # Cargar la red solo si cambió desde el último trabajo de este proceso
+    if _red_trabajador is None or _red_trabajador[0] != huella:
+        with open(ruta_red, 'rb') as archivo:
+            G, pos = pickle.load(archivo)
+        _red_trabajador = (huella, G, pos, {})
+
+    _, G, pos, capas_base = _red_trabajador
+
+    base = capas_base.get((tamano, dpi))
+    if base is None:
+        base = render_grafo.renderizar_base(G, pos, tamano, dpi)
+        capas_base[(tamano, dpi)] = base
+
+    return render_grafo.imagen_camino(G, pos, base, list(camino)).getvalue()
+
+
+@atexit.register
+def _cerrar_pool():
+    """Detiene los procesos trabajadores y elimina los archivos de red al salir."""
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+    if _directorio_redes is not None:
+        shutil.rmtree(_directorio_redes, ignore_errors=True)
@@ -0,0 +1,208 @@
+"""
+Renderizado por Capas del Grafo
+==============================
+
+Este módulo genera las imágenes del grafo en dos capas:
+- Capa base: todas las ciudades, rutas y etiquetas de costos. Se dibuja
+  una sola vez por versión de la red y se conserva como una matriz RGBA.
+- Capa de resaltado: solo las aristas y ciudades de un camino, dibujadas
+  sobre un lienzo transparente con los mismos ejes que la capa base y
+  compuestas encima de ella.
+
+Así el costo de resaltar una ruta depende de la longitud del camino y no
+del tamaño de la red. Las funciones de este módulo son puras: reciben el
+grafo y las posiciones y no acceden a la base de datos ni a Flask.
+
+IMPORTANTE: No se usa matplotlib.pyplot. Cada imagen se dibuja en su propia
+Figure con un lienzo FigureCanvasAgg y todas las funciones de NetworkX
+reciben los ejes explícitamente, por lo que no hay estado global compartido
+y varias imágenes pueden renderizarse en paralelo desde distintos hilos.
+
+Autor: Joaquín Bermeo
+Fecha: Julio 2025
+"""
+
+import io
+from collections import namedtuple
+import numpy as np
+import networkx as nx
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+import matplotlib.image as mpimg
+
+# Tamaño de las imágenes del grafo en pulgadas y resolución por defecto
+TAMANO_FIGURA = (12, 8)
+DPI = 100
+
+# Capa base renderizada: matriz RGBA (alto x ancho x 4, uint8) y la geometría
+# de los ejes necesaria para dibujar capas superpuestas alineadas con ella
+CapaBase = namedtuple('CapaBase', 'raster posicion_ejes limites_x limites_y tamano dpi')
+
+
+def _crear_figura(tamano, dpi, transparente=False):
+    """
+    Crea una figura de Matplotlib con su lienzo Agg, sin usar pyplot.
+
+    Args:
+        tamano (tuple): Tamaño (ancho, alto) en pulgadas
+        dpi (int): Resolución en puntos por pulgada
+        transparente (bool): Si el fondo de la figura debe ser transparente
+
+    Returns:
+        tuple: (figura, lienzo)
+    """
+    figura = Figure(figsize=tamano, dpi=dpi, facecolor='none' if transparente else 'white')
+    lienzo = FigureCanvasAgg(figura)
+    return figura, lienzo
+
+
+def _raster(lienzo):
+    """
+    Dibuja el lienzo y obtiene su contenido como matriz RGBA.
+
+    Args:
+        lienzo (FigureCanvasAgg): Lienzo a rasterizar
+
+    Returns:
+        np.ndarray: Copia de la imagen como matriz (alto, ancho, 4) de uint8
+    """
+    lienzo.draw()
+    return np.array(lienzo.buffer_rgba(), dtype=np.uint8)
+
+
+def renderizar_base(G, pos, tamano=TAMANO_FIGURA, dpi=DPI):
+    """
+    Renderiza la capa base con todas las ciudades, rutas y costos.
+
+    Args:
+        G (nx.Graph): Grafo de la red
+        pos (dict): Posiciones de los nodos {nombre: (x, y)}
+        tamano (tuple): Tamaño de la imagen en pulgadas
+        dpi (int): Resolución en puntos por pulgada
+
+    Returns:
+        CapaBase: Raster RGBA de la red y geometría de sus ejes
+    """
+    figura, lienzo = _crear_figura(tamano, dpi)
+    ax = figura.add_subplot()
+
+    # Dibujar nodos, aristas y nombres (equivalente a nx.draw, que usa el estado de pyplot)
+    nx.draw_networkx_nodes(G, pos, node_color='lightblue', node_size=2000, ax=ax)
+    nx.draw_networkx_edges(G, pos, node_size=2000, ax=ax)
+    nx.draw_networkx_labels(G, pos, font_weight='bold', ax=ax)
+    ax.set_axis_off()
+
+    # Dibujar etiquetas con los costos de las aristas
+    pesos = nx.get_edge_attributes(G, 'weight')
+    nx.draw_networkx_edge_labels(G, pos, edge_labels=pesos, ax=ax)
+
+    raster = _raster(lienzo)
+    return CapaBase(raster, ax.get_position().bounds, ax.get_xlim(), ax.get_ylim(), tamano, dpi)
+
+
+def renderizar_resaltado(G, pos, base, camino):
+    """
+    Renderiza la capa transparente con un camino resaltado.
+
+    Los ejes se crean con la misma posición y límites que los de la capa
+    base, de modo que cada elemento cae exactamente sobre su lugar en ella.
+
+    Args:
+        G (nx.Graph): Grafo de la red
+        pos (dict): Posiciones de los nodos {nombre: (x, y)}
+        base (CapaBase): Capa base sobre la que se compondrá el resaltado
+        camino (list): Lista de nombres de ciudades que forman la ruta
+
+    Returns:
+        np.ndarray: Capa RGBA (alto, ancho, 4) con fondo transparente
+    """
+    figura, lienzo = _crear_figura(base.tamano, base.dpi, transparente=True)
+    ax = figura.add_axes(base.posicion_ejes)
+    ax.set_xlim(base.limites_x)
+    ax.set_ylim(base.limites_y)
+    ax.set_autoscale_on(False)
+    ax.set_axis_off()
+
+    # Dibujar las aristas del camino en color rojo y más gruesas
+    edges_camino = list(zip(camino[:-1], camino[1:]))
+    nx.draw_networkx_edges(G, pos, edgelist=edges_camino, edge_color='red',
+                           width=4, ax=ax)
+
+    # Resaltar los nodos del camino en color naranja y más grandes, con sus nombres
+    nx.draw_networkx_nodes(G, pos, nodelist=camino, node_color='orange',
+                           node_size=2200, ax=ax)
+    nx.draw_networkx_labels(G, pos, labels={nombre: nombre for nombre in camino},
+                            font_weight='bold', ax=ax)
+
+    return _raster(lienzo)
+
+
+def componer(base, capa):
+    """
+    Compone una capa RGBA transparente sobre el raster de la capa base.
+
+    Solo se procesa el rectángulo que contiene píxeles visibles de la capa,
+    por lo que el costo depende del área resaltada.
+
+    Args:
+        base (np.ndarray): Raster RGBA opaco de la capa base
+        capa (np.ndarray): Raster RGBA de la capa superpuesta (mismo tamaño)
+
+    Returns:
+        np.ndarray: Nueva matriz RGBA con ambas capas compuestas
+    """
+    resultado = base.copy()
+
+    filas = np.flatnonzero(capa[:, :, 3].any(axis=1))
+    columnas = np.flatnonzero(capa[:, :, 3].any(axis=0))
+    if not len(filas):
+        return resultado
+
+    region = (slice(filas[0], filas[-1] + 1), slice(columnas[0], columnas[-1] + 1))
+    superior = capa[region].astype(np.float32)
+    inferior = resultado[region].astype(np.float32)
+
+    # Operador "over" sobre un fondo opaco (el raster de Agg no está premultiplicado)
+    alfa = superior[:, :, 3:] / 255.0
+    inferior[:, :, :3] = superior[:, :, :3] * alfa + inferior[:, :, :3] * (1.0 - alfa)
+    resultado[region] = np.rint(inferior).astype(np.uint8)
+
+    return resultado
+
+
+def raster_a_png(raster, dpi=DPI):
+    """
+    Codifica un raster RGBA como imagen PNG.
+
+    Args:
+        raster (np.ndarray): Matriz RGBA (alto, ancho, 4) de uint8
+        dpi (int): Resolución registrada en la imagen
+
+    Returns:
+        io.BytesIO: Buffer con la imagen PNG
+    """
+    buf = io.BytesIO()
+    mpimg.imsave(buf, raster, format='png', dpi=dpi)
+    buf.seek(0)
+    return buf
+
+
+def imagen_camino(G, pos, base, camino):
+    """
+    Genera la imagen PNG de la red con un camino resaltado.
+
+    Args:
+        G (nx.Graph): Grafo de la red
+        pos (dict): Posiciones de los nodos {nombre: (x, y)}
+        base (CapaBase): Capa base de la versión actual de la red
+        camino (list): Lista de nombres de ciudades que forman la ruta
+
+    Returns:
+        io.BytesIO: Buffer con la imagen PNG
+    """
+    # Sin camino que resaltar la imagen es directamente la capa base
+    if not camino or len(camino) < 2:
+        return raster_a_png(base.raster, base.dpi)
+
+    capa = renderizar_resaltado(G, pos, base, camino)
+    return raster_a_png(componer(base.raster, capa), base.dpi)
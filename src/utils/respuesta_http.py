@@ -0,0 +1,47 @@
+"""
+Respuestas HTTP Condicionales
+============================
+
+Este módulo construye respuestas con validación condicional por ETag,
+compartidas por los controladores que sirven contenido revalidable
+(imágenes del grafo, red en JSON, datos del dashboard).
+
+Si el cliente envía un If-None-Match que coincide con la ETag vigente se
+responde 304 sin generar el contenido, de modo que el navegador reutiliza
+su copia sin que se vuelva a transferir ni a calcular.
+
+Autor: Joaquín Bermeo
+Fecha: Julio 2025
+"""
+
+from flask import request, Response, current_app
+
+
+def respuesta_condicional(etag, generar, mimetype='image/png', cache_control=None):
+    """
+    Construye una respuesta con validación condicional por ETag.
+
+    Si el cliente envía un If-None-Match que coincide con la ETag actual
+    se responde 304 sin generar el contenido; en caso contrario se genera
+    y se envía con su ETag y la cabecera Cache-Control indicada.
+
+    Args:
+        etag (str): ETag fuerte del contenido solicitado
+        generar (callable): Función sin argumentos que retorna el contenido (bytes)
+        mimetype (str): Tipo de contenido de la respuesta
+        cache_control (str, optional): Cabecera Cache-Control (por defecto CACHE_CONTROL_IMAGENES)
+
+    Returns:
+        Response: Contenido solicitado o respuesta 304 (Not Modified)
+    """
+    if cache_control is None:
+        cache_control = current_app.config.get('CACHE_CONTROL_IMAGENES', 'private, no-cache')
+
+    if request.if_none_match.contains(etag):
+        respuesta = Response(status=304)
+    else:
+        respuesta = Response(generar(), mimetype=mimetype)
+
+    respuesta.set_etag(etag)
+    respuesta.headers['Cache-Control'] = cache_control
+    return respuesta
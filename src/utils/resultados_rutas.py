@@ -0,0 +1,103 @@
+"""
+Almacén de Resultados de Rutas
+=============================
+
+Este módulo conserva por poco tiempo los resultados de rutas ya calculadas,
+identificados por un token opaco. La página de resultados entrega ese token
+al navegador y las acciones posteriores (exportar a PDF, ver la imagen con
+la ruta resaltada) lo envían en lugar de pedir que se vuelva a calcular la
+ruta.
+
+Características:
+- Cada token pertenece al usuario que calculó la ruta
+- Los resultados expiran tras un tiempo configurable
+- El número de resultados está acotado; al superarlo se descartan los
+  usados hace más tiempo (LRU)
+
+IMPORTANTE: Los resultados se guardan en memoria del proceso. Si la
+aplicación corre en varios procesos, un token solo es válido en el proceso
+que lo creó; los endpoints deben seguir funcionando sin token.
+
+Autor: Joaquín Bermeo
+Fecha: Julio 2025
+"""
+
+import time
+import secrets
+import threading
+from collections import OrderedDict
+
+
+class AlmacenResultados:
+    """
+    Almacén LRU de resultados con expiración, seguro para varios hilos.
+    """
+
+    def __init__(self, capacidad, expiracion_segundos):
+        """
+        Inicializa el almacén vacío.
+
+        Args:
+            capacidad (int): Número máximo de resultados conservados
+            expiracion_segundos (float): Tiempo de vida de cada resultado
+        """
+        self.capacidad = max(1, int(capacidad))
+        self.expiracion_segundos = expiracion_segundos
+        self._entradas = OrderedDict()
+        self._candado = threading.Lock()
+
+    def guardar(self, propietario, datos):
+        """
+        Guarda un resultado y genera su token.
+
+        Args:
+            propietario (str): Identificador del usuario dueño del resultado
+            datos (dict): Resultado a conservar
+
+        Returns:
+            str: Token opaco del resultado
+        """
+        token = secrets.token_urlsafe(16)
+        with self._candado:
+            self._depurar()
+            self._entradas[token] = (propietario, time.time() + self.expiracion_segundos, datos)
+            while len(self._entradas) > self.capacidad:
+                self._entradas.popitem(last=False)
+        return token
+
+    def obtener(self, token, propietario):
+        """
+        Obtiene un resultado no expirado del usuario indicado.
+
+        Args:
+            token (str): Token del resultado
+            propietario (str): Identificador del usuario que lo consulta
+
+        Returns:
+            dict: Resultado guardado o None si no existe, expiró o es de otro usuario
+        """
+        with self._candado:
+            entrada = self._entradas.get(token)
+            if entrada is None:
+                return None
+
+            dueno, expira, datos = entrada
+            if expira < time.time():
+                del self._entradas[token]
+                return None
+            if dueno != propietario:
+                return None
+
+            self._entradas.move_to_end(token)  # Marcar como usado recientemente
+            return datos
+
+    def __len__(self):
+        """Número de resultados conservados (incluidos los expirados aún no depurados)."""
+        with self._candado:
+            return len(self._entradas)
+
+    def _depurar(self):
+        """Elimina los resultados expirados (requiere el candado)."""
+        ahora = time.time()
+        for token in [t for t, (_, expira, _) in self._entradas.items() if expira < ahora]:
+            del self._entradas[token]
@@ -0,0 +1,197 @@
+"""
+Trabajos en Segundo Plano
+========================
+
+Este módulo ejecuta tareas lentas (como la generación de reportes PDF)
+en un grupo local de hilos, fuera del ciclo de las peticiones web.
+
+Funcionamiento:
+- Al encolar una tarea se obtiene un identificador opaco del trabajo
+- La tarea informa su progreso (0 a 100) mediante una función callback
+- El resultado (bytes) queda disponible para su descarga
+- Los trabajos terminados expiran automáticamente tras un tiempo
+  configurable, y el número de trabajos en curso está acotado
+- El total de bytes de los resultados conservados también está acotado:
+  al superarlo se descartan primero los trabajos terminados hace más tiempo
+
+Cada tarea se ejecuta dentro del contexto de la aplicación Flask que la
+encoló, por lo que puede usar la base de datos y la configuración.
+
+IMPORTANTE: Los trabajos se guardan en memoria del proceso. Las consultas
+de estado y las descargas deben llegar al mismo proceso que los creó.
+
+Autor: Joaquín Bermeo
+Fecha: Julio 2025
+"""
+
+import time
+import uuid
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Estados posibles de un trabajo
+PENDIENTE = 'pendiente'
+EN_PROCESO = 'en_proceso'
+COMPLETADO = 'completado'
+FALLIDO = 'fallido'
+
+
+class Trabajo:
+    """
+    Estado de un trabajo en segundo plano.
+    """
+
+    def __init__(self, propietario, descripcion):
+        """
+        Inicializa un trabajo pendiente.
+
+        Args:
+            propietario (str): Identificador del usuario que creó el trabajo
+            descripcion (dict): Datos descriptivos del trabajo (se devuelven en el estado)
+        """
+        self.id = uuid.uuid4().hex
+        self.propietario = propietario
+        self.descripcion = descripcion
+        self.estado = PENDIENTE
+        self.progreso = 0
+        self.resultado = None
+        self.error = None
+        self.creado = time.time()
+        self.terminado = None
+
+    def a_dict(self):
+        """
+        Convierte el estado del trabajo a un diccionario serializable a JSON.
+
+        Returns:
+            dict: Identificador, estado, progreso, descripción y error del trabajo
+        """
+        return {
+            'id': self.id,
+            'estado': self.estado,
+            'progreso': self.progreso,
+            'descripcion': self.descripcion,
+            'error': self.error
+        }
+
+
+class GestorTrabajos:
+    """
+    Ejecuta tareas en un grupo de hilos y conserva sus resultados por un tiempo limitado.
+    """
+
+    def __init__(self, hilos, expiracion_segundos, max_activos, max_bytes_resultados):
+        """
+        Inicializa el gestor sin trabajos.
+
+        Args:
+            hilos (int): Número de hilos del grupo de ejecución
+            expiracion_segundos (float): Tiempo que se conserva un trabajo terminado
+            max_activos (int): Número máximo de trabajos pendientes o en proceso
+            max_bytes_resultados (int): Total máximo de bytes de los resultados conservados
+        """
+        self.expiracion_segundos = expiracion_segundos
+        self.max_activos = max_activos
+        self.max_bytes_resultados = max_bytes_resultados
+        self._ejecutor = ThreadPoolExecutor(max_workers=max(1, int(hilos)), thread_name_prefix='trabajo')
+        self._trabajos = {}
+        self._candado = threading.Lock()
+
+    def encolar(self, app, propietario, descripcion, tarea):
+        """
+        Encola una tarea para ejecutarla en segundo plano.
+
+        Args:
+            app (Flask): Aplicación en cuyo contexto se ejecutará la tarea
+            propietario (str): Identificador del usuario que crea el trabajo
+            descripcion (dict): Datos descriptivos del trabajo
+            tarea (callable): Función tarea(reportar_progreso) que retorna bytes;
+                              puede lanzar ValueError con un mensaje para el usuario
+
+        Returns:
+            Trabajo: Trabajo creado, o None si se alcanzó el máximo de trabajos activos
+        """
+        with self._candado:
+            self._depurar()
+            activos = sum(1 for t in self._trabajos.values() if t.estado in (PENDIENTE, EN_PROCESO))
+            if activos >= self.max_activos:
+                return None
+            trabajo = Trabajo(propietario, descripcion)
+            self._trabajos[trabajo.id] = trabajo
+
+        self._ejecutor.submit(self._ejecutar, app, trabajo, tarea)
+        return trabajo
+
+    def obtener(self, trabajo_id, propietario):
+        """
+        Obtiene un trabajo no expirado perteneciente al usuario indicado.
+
+        Args:
+            trabajo_id (str): Identificador del trabajo
+            propietario (str): Identificador del usuario que lo consulta
+
+        Returns:
+            Trabajo: Trabajo encontrado o None si no existe, expiró o es de otro usuario
+        """
+        with self._candado:
+            self._depurar()
+            trabajo = self._trabajos.get(trabajo_id)
+            if trabajo is None or trabajo.propietario != propietario:
+                return None
+            return trabajo
+
+    def _ejecutar(self, app, trabajo, tarea):
+        """
+        Ejecuta una tarea dentro del contexto de la aplicación y registra su resultado.
+
+        Args:
+            app (Flask): Aplicación en cuyo contexto se ejecuta la tarea
+            trabajo (Trabajo): Trabajo a actualizar
+            tarea (callable): Función tarea(reportar_progreso) que retorna bytes
+        """
+        def reportar_progreso(progreso):
+            trabajo.progreso = max(trabajo.progreso, min(99, int(progreso)))
+
+        trabajo.estado = EN_PROCESO
+        try:
+            with app.app_context():
+                resultado = tarea(reportar_progreso)
+            trabajo.resultado = resultado
+            trabajo.progreso = 100
+            trabajo.estado = COMPLETADO
+        except ValueError as e:
+            trabajo.error = str(e)
+            trabajo.estado = FALLIDO
+        except Exception as e:
+            print(f"Error en trabajo en segundo plano {trabajo.id}: {e}")
+            trabajo.error = 'Error interno procesando el trabajo'
+            trabajo.estado = FALLIDO
+        finally:
+            trabajo.terminado = time.time()
+
+        # El nuevo resultado puede superar el límite de bytes conservados
+        with self._candado:
+            self._depurar()
+
+    def _depurar(self):
+        """
+        Elimina los trabajos terminados que expiraron y, si los resultados
+        conservados superan el límite de bytes, los terminados hace más tiempo
+        (requiere el candado).
+
+        El trabajo terminado más reciente se conserva siempre, aunque su
+        resultado por sí solo supere el límite.
+        """
+        limite = time.time() - self.expiracion_segundos
+        for trabajo_id in [t.id for t in self._trabajos.values()
+                           if t.terminado is not None and t.terminado < limite]:
+            del self._trabajos[trabajo_id]
+
+        terminados = sorted((t for t in self._trabajos.values() if t.terminado is not None),
+                            key=lambda t: t.terminado)
+        total = sum(len(t.resultado or b'') for t in terminados)
+        for trabajo in terminados[:-1]:
+            if total <= self.max_bytes_resultados:
+                break
+            total -= len(trabajo.resultado or b'')
+            del self._trabajos[trabajo.id]
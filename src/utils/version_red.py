@@ -0,0 +1,127 @@
+"""
+Versionado de la Red de Rutas
+============================
+
+Este módulo mantiene un número de versión global (por proceso) de la red
+de ciudades y rutas. Cada operación de escritura administrativa incrementa
+la versión, y las estructuras derivadas de la base de datos (grafo, datos
+auxiliares, etc.) se almacenan en caché asociadas a la versión con la que
+fueron construidas.
+
+De esta forma las lecturas reutilizan estructuras ya construidas y la
+reconstrucción ocurre una sola vez por cada cambio en la red.
+
+IMPORTANTE: La versión es local al proceso. Cada proceso de la aplicación
+mantiene su propio contador y sus propias cachés. Por eso la etiqueta de
+versión usada en cabeceras HTTP (ETag) combina la versión con un
+identificador aleatorio del proceso.
+
+Como consecuencia, si la aplicación se ejecuta con varios procesos (por
+ejemplo varios workers de gunicorn), una escritura administrativa solo
+incrementa la versión del proceso que la atendió: los demás procesos
+siguen usando el grafo y las estructuras derivadas anteriores hasta que se
+reinician. En ese caso debe ejecutarse un solo proceso (con varios hilos)
+o reiniciar los procesos tras modificar ciudades o rutas.
+
+Autor: Joaquín Bermeo
+Fecha: Julio 2025
+"""
+
+import threading
+import uuid
+
+# Contador monotónico de versión de la red y candado que lo protege
+_version_red = 0
+_candado_version = threading.Lock()
+
+# Identificador aleatorio de este proceso (distingue contadores de distintos procesos)
+_identificador_proceso = uuid.uuid4().hex[:12]
+
+
+def obtener_version_red():
+    """
+    Obtiene la versión actual de la red de rutas.
+
+    Returns:
+        int: Número de versión actual (monotónicamente creciente)
+    """
+    return _version_red
+
+
+def obtener_etiqueta_version():
+    """
+    Obtiene una etiqueta única de la versión actual de la red.
+
+    A diferencia del número de versión, la etiqueta no se repite entre
+    procesos ni entre reinicios, por lo que puede usarse en ETags HTTP.
+
+    Returns:
+        str: Etiqueta con el formato "<identificador_proceso>-<version>"
+    """
+    return f'{_identificador_proceso}-{_version_red}'
+
+
+def incrementar_version_red():
+    """
+    Incrementa la versión de la red de rutas.
+
+    Debe llamarse después de confirmar (commit) cualquier cambio en ciudades
+    o rutas, para que las cachés dependientes se reconstruyan en la
+    siguiente lectura.
+
+    Returns:
+        int: Nueva versión de la red
+    """
+    global _version_red
+    with _candado_version:
+        _version_red += 1
+        return _version_red
+
+
+class CacheVersionado:
+    """
+    Caché de un único valor asociado a una versión de la red.
+
+    El valor se construye bajo demanda la primera vez que se solicita para
+    una versión dada. Si varios hilos lo solicitan a la vez, solo uno
+    ejecuta la construcción y el resto espera y reutiliza el resultado.
+
+    La versión y el valor se guardan juntos en una sola tupla que se
+    reemplaza completa, de modo que una lectura sin candado nunca combina
+    la versión de una construcción con el valor de otra.
+    """
+
+    def __init__(self):
+        """Inicializa la caché vacía."""
+        self._entrada = None  # (versión, valor)
+        self._candado = threading.Lock()
+
+    def obtener(self, constructor):
+        """
+        Obtiene el valor para la versión actual, construyéndolo si es necesario.
+
+        Args:
+            constructor (callable): Función sin argumentos que construye el valor
+
+        Returns:
+            object: Valor correspondiente a la versión actual de la red
+        """
+        version = obtener_version_red()
+
+        # Camino rápido: una sola lectura de la entrada actual
+        entrada = self._entrada
+        if entrada is not None and entrada[0] == version:
+            return entrada[1]
+
+        with self._candado:
+            # Verificar de nuevo por si otro hilo lo construyó mientras esperábamos
+            entrada = self._entrada
+            if entrada is None or entrada[0] != version:
+                entrada = (version, constructor())
+                self._entrada = entrada
+            return entrada[1]
+
+    def invalidar(self):
+        """Descarta el valor almacenado, forzando su reconstrucción."""
+        with self._candado:
+            self._entrada = None
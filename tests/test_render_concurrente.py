@@ -0,0 +1,132 @@
+"""
+Pruebas de Renderizado Concurrente de Imágenes
+=============================================
+
+Verifica que las imágenes del grafo generadas desde muchos hilos a la vez
+(como en un servidor con varios hilos) son idénticas byte a byte a las
+generadas de forma secuencial, tanto para la red completa como para los
+caminos resaltados, con el renderizado en el proceso web y en el pool de
+procesos trabajadores.
+
+Autor: Joaquín Bermeo
+Fecha: Julio 2025
+"""
+
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from flask import Flask
+from config import Config
+from extensions import db, login_manager
+from models import Provincia, Ciudad, Ruta, User
+from routes import register_blueprints
+from utils import grafo_db_utils
+from utils.version_red import incrementar_version_red
+
+# Red de prueba: (ciudad, es_costera, provincia) y (origen, destino, costo)
+CIUDADES = [
+    ('Ibarra', False, 'Imbabura'), ('Quito', False, 'Pichincha'),
+    ('Santo Domingo', False, 'Santo Domingo'), ('Manta', True, 'Manabí'),
+    ('Portoviejo', True, 'Manabí'), ('Guayaquil', True, 'Guayas'),
+    ('Cuenca', False, 'Azuay'), ('Loja', False, 'Loja')
+]
+RUTAS = [
+    ('Ibarra', 'Quito', 10), ('Quito', 'Santo Domingo', 15), ('Quito', 'Manta', 30),
+    ('Santo Domingo', 'Manta', 12), ('Manta', 'Portoviejo', 5), ('Portoviejo', 'Guayaquil', 20),
+    ('Guayaquil', 'Cuenca', 25), ('Cuenca', 'Loja', 18), ('Quito', 'Cuenca', 35),
+    ('Santo Domingo', 'Guayaquil', 22), ('Guayaquil', 'Loja', 40)
+]
+
+# URLs de imágenes solicitadas: red completa y caminos resaltados en ambas vistas
+URLS = [
+    '/grafos/grafo_imagen',
+    '/grafos/grafo_imagen_camino?camino=Ibarra&camino=Quito&camino=Cuenca&camino=Loja',
+    '/grafos/grafo_imagen_camino?camino=Quito&camino=Santo+Domingo&camino=Manta',
+    '/grafos/grafo_imagen_camino?camino=Manta&camino=Portoviejo&camino=Guayaquil&vista=completa',
+    '/grafos/grafo_imagen_camino?camino=Ibarra&camino=Quito&vista=local',
+]
+
+HILOS = 16
+REPETICIONES = 4
+
+
+@pytest.fixture(params=[0, 2], ids=['en_proceso', 'pool_procesos'])
+def app(request, tmp_path):
+    """Aplicación con una base SQLite temporal y RENDER_WORKERS según el parámetro."""
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    app.config.update(
+        SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'rutas.db'}",
+        TESTING=True,
+        RENDER_WORKERS=request.param,
+        CACHE_IMAGENES_DIRECTORIO=None,
+        LAYOUT_GRAFO_ARCHIVO=str(tmp_path / 'layout.json')
+    )
+    db.init_app(app)
+    login_manager.init_app(app)
+    register_blueprints(app)
+
+    with app.app_context():
+        db.create_all()
+        provincias = {}
+        ciudades = {}
+        for nombre, es_costera, provincia in CIUDADES:
+            if provincia not in provincias:
+                provincias[provincia] = Provincia(nombre=provincia)
+                db.session.add(provincias[provincia])
+                db.session.flush()
+            ciudad = Ciudad(nombre=nombre, es_costera=es_costera, provincia_id=provincias[provincia].id)
+            db.session.add(ciudad)
+            db.session.flush()
+            ciudades[nombre] = ciudad.id
+        for origen, destino, costo in RUTAS:
+            db.session.add(Ruta(ciudad_origen_id=ciudades[origen], ciudad_destino_id=ciudades[destino], costo=costo))
+        usuario = User(username='admin', email='admin@example.com')
+        usuario.set_password('123456')
+        db.session.add(usuario)
+        db.session.commit()
+
+    _reiniciar_caches()
+    yield app
+    _reiniciar_caches()
+
+
+def _reiniciar_caches():
+    """Descarta las imágenes y capas en caché para que se vuelvan a renderizar."""
+    incrementar_version_red()
+    grafo_db_utils._cache_imagenes = None
+
+
+def _cliente(app):
+    """Cliente de pruebas con la sesión del usuario de prueba iniciada."""
+    cliente = app.test_client()
+    cliente.post('/login', data={'username': 'admin', 'password': '123456'})
+    return cliente
+
+
+def _descargar(app, url):
+    """Solicita una imagen con un cliente propio (un hilo por cliente) y retorna sus bytes."""
+    respuesta = _cliente(app).get(url)
+    assert respuesta.status_code == 200, respuesta.get_data(as_text=True)
+    assert respuesta.mimetype == 'image/png'
+    return respuesta.get_data()
+
+
+def test_imagenes_concurrentes_iguales_a_secuenciales(app):
+    # Referencia: cada imagen renderizada una sola vez, de forma secuencial
+    esperadas = {url: _descargar(app, url) for url in URLS}
+    assert all(datos.startswith(b'\x89PNG') for datos in esperadas.values())
+
+    # Sin cachés, muchos hilos renderizan a la vez las mismas imágenes
+    _reiniciar_caches()
+    solicitudes = URLS * REPETICIONES
+    with ThreadPoolExecutor(max_workers=HILOS) as ejecutor:
+        obtenidas = list(ejecutor.map(lambda url: _descargar(app, url), solicitudes))
+
+    for url, datos in zip(solicitudes, obtenidas):
+        assert datos == esperadas[url], url